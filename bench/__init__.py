@@ -0,0 +1 @@
+"""Benchmarks offline da integração Tarifas de Energia Brasil."""
@@ -0,0 +1,145 @@
+"""Benchmark do ciclo de atualização com centenas de entradas contra o worker simulado.
+
+Mede vazão, latências p50/p99 e bloqueio do event loop de:
+
+- ``TarifasEnergiaCoordinator._async_update_data`` em todas as entradas ao mesmo tempo;
+- ``_parse_api_response``;
+- ``DatabaseManager.async_save_tarifa_snapshots``;
+- setup completo das entradas de configuração.
+"""
+import asyncio
+import time
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tarifas_energia_brasil.const import CONF_CONCESSIONARIA, DOMAIN
+from custom_components.tarifas_energia_brasil.coordinator import (
+    TarifasEnergiaCoordinator,
+    _campos_gravacao,
+    async_get_hub,
+)
+from homeassistant.config_entries import ConfigEntryState
+
+from .conftest import ENTRADAS, aguardar_thread_banco
+from .medicao import MonitorLoop, medir_concorrente, percentis_ms, relatorio
+
+_REPETICOES_PARSE = 20000
+_TEMPO_MAXIMO_SETUP = 120
+
+
+def _resultado(duracoes: list[float], total: float, erros: list, monitor: MonitorLoop) -> dict:
+    return {
+        "operacoes": len(duracoes),
+        "erros": len(erros),
+        "total_s": round(total, 3),
+        "vazao_por_s": round(len(duracoes) / total, 1) if total else 0.0,
+        **percentis_ms(duracoes),
+        **monitor.como_dict(),
+    }
+
+
+async def bench_atualizacao_concorrente(hass, worker, api, db) -> None:
+    """Todas as entradas atualizam juntas; as buscas convergem para o hub."""
+    hub = async_get_hub(hass, api)
+    coordinators = [
+        TarifasEnergiaCoordinator(hass, api, db, nome, hub) for nome in worker.nomes()[:ENTRADAS]
+    ]
+    remover = [hub.async_register(coord) for coord in coordinators]
+    try:
+        for rodada in ("fria", "quente"):
+            antes = sum(worker.requisicoes.values())
+            async with MonitorLoop() as monitor:
+                duracoes, total, erros = await medir_concorrente(
+                    [coord._async_update_data for coord in coordinators]
+                )
+            resultado = _resultado(duracoes, total, erros, monitor)
+            resultado["requisicoes_ao_worker"] = sum(worker.requisicoes.values()) - antes
+            relatorio(f"_async_update_data, {ENTRADAS} entradas ({rodada})", resultado)
+            assert not erros
+    finally:
+        for funcao in remover:
+            funcao()
+
+
+async def bench_parse_api_response(worker) -> None:
+    respostas = [worker.tarifa(nome) for nome in worker.nomes()]
+    duracoes = []
+    inicio_total = time.perf_counter()
+    for i in range(_REPETICOES_PARSE):
+        inicio = time.perf_counter()
+        TarifasEnergiaCoordinator._parse_api_response(respostas[i % len(respostas)])
+        duracoes.append(time.perf_counter() - inicio)
+    total = time.perf_counter() - inicio_total
+    relatorio(
+        "_parse_api_response",
+        {
+            "operacoes": _REPETICOES_PARSE,
+            "vazao_por_s": round(_REPETICOES_PARSE / total, 1),
+            **percentis_ms(duracoes),
+        },
+    )
+
+
+async def bench_save_tarifa_snapshots(hass, worker, db) -> None:
+    """Gravação concorrente de todas as entradas; a segunda rodada não muda nada."""
+    campos = {
+        nome: {
+            "B1": _campos_gravacao(
+                TarifasEnergiaCoordinator._parse_api_response(worker.tarifa(nome))
+            )
+        }
+        for nome in worker.nomes()[:ENTRADAS]
+    }
+    for rodada in ("insercao", "sem_alteracao"):
+        async with MonitorLoop() as monitor:
+            duracoes, total, erros = await medir_concorrente(
+                [
+                    lambda nome=nome: db.async_save_tarifa_snapshots(nome, campos[nome])
+                    for nome in campos
+                ]
+            )
+        relatorio(
+            f"async_save_tarifa_snapshots ({rodada})",
+            _resultado(duracoes, total, erros, monitor),
+        )
+        assert not erros
+
+
+async def bench_setup_entradas(hass, worker, api) -> None:
+    """Setup de todas as entradas e o tempo até todas terem dados da API."""
+    entradas = [
+        MockConfigEntry(domain=DOMAIN, title=nome, data={CONF_CONCESSIONARIA: nome})
+        for nome in worker.nomes()[:ENTRADAS]
+    ]
+    for entrada in entradas:
+        entrada.add_to_hass(hass)
+
+    inicio = time.perf_counter()
+    async with MonitorLoop() as monitor:
+        duracoes, total, erros = await medir_concorrente(
+            [
+                lambda entrada=entrada: hass.config_entries.async_setup(entrada.entry_id)
+                for entrada in entradas
+            ]
+        )
+        setup = _resultado(duracoes, total, erros, monitor)
+        # A busca na API roda em tarefas de segundo plano após o setup.
+        coordinators = [hass.data[DOMAIN][entrada.entry_id] for entrada in entradas]
+        while any(
+            coord.data is None or coord.data["B1"].api_status != "online"
+            for coord in coordinators
+        ):
+            assert time.perf_counter() - inicio < _TEMPO_MAXIMO_SETUP
+            await asyncio.sleep(0.01)
+    setup["ate_dados_da_api_s"] = round(time.perf_counter() - inicio, 3)
+    setup["requisicoes_ao_worker"] = sum(worker.requisicoes.values())
+    relatorio(f"setup de {ENTRADAS} entradas", setup)
+
+    try:
+        assert not erros
+        assert all(entrada.state is ConfigEntryState.LOADED for entrada in entradas)
+    finally:
+        for entrada in entradas:
+            await hass.config_entries.async_unload(entrada.entry_id)
+        await hass.async_block_till_done()
+        aguardar_thread_banco()
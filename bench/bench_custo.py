@@ -0,0 +1,128 @@
+"""Benchmark do cálculo vetorizado do custo sobre cinco anos de consumo horário.
+
+São 43.800 horas com várias trocas de vigência (com e sem TE/TUSD separados) e
+uma bandeira diferente a cada mês. São medidos ``precos_por_hora`` e
+``_agregar`` por dia e por mês, e, como referência, o mesmo preço calculado
+hora a hora com as buscas do ``IndiceTarifas``.
+"""
+import os
+import random
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from custom_components.tarifas_energia_brasil.custo import (
+    _agregar,
+    _meia_noite_local,
+    _primeiro_dia_mes_seguinte,
+    precos_por_hora,
+)
+from custom_components.tarifas_energia_brasil.indice import IndiceTarifas, data_local
+from homeassistant.util import dt as dt_util
+
+from .medicao import percentis_ms, relatorio
+
+REPETICOES = int(os.environ.get("BENCH_REPETICOES_CUSTO", "20"))
+
+_HORAS = 5 * 365 * 24
+_INICIO = date(2017, 1, 1)
+_CONCESSIONARIA = "BENCH"
+_VALORES_BANDEIRA = (0.0, 0.01874, 0.03971, 0.09492, 0.14200)
+
+
+def _indice(inicio: date, fim: date) -> IndiceTarifas:
+    """Vigências de ~7 meses (TE/TUSD só nas pares) e uma bandeira por mês."""
+    aleatorio = random.Random(42)
+    indice = IndiceTarifas()
+    vigencia = inicio
+    numero = 0
+    while vigencia <= fim:
+        proxima = vigencia + timedelta(days=210 + aleatorio.randrange(30))
+        te, tusd = round(0.25 + 0.01 * numero, 5), round(0.40 + 0.01 * numero, 5)
+        indice.adicionar_tarifa(
+            _CONCESSIONARIA,
+            vigencia,
+            proxima - timedelta(days=1),
+            round(te + tusd + 0.05, 5),
+            te if numero % 2 == 0 else None,
+            tusd if numero % 2 == 0 else None,
+        )
+        vigencia = proxima
+        numero += 1
+    mes = inicio.replace(day=1)
+    while mes <= fim:
+        indice.adicionar_bandeira(mes, "Bandeira", aleatorio.choice(_VALORES_BANDEIRA))
+        mes = _primeiro_dia_mes_seguinte(mes)
+    return indice
+
+
+def _precos_referencia(indice: IndiceTarifas, horas) -> list[float]:
+    """Preço de cada hora com uma consulta ao índice por hora."""
+    precos = []
+    for hora in horas.tolist():
+        dia = data_local(dt_util.utc_from_timestamp(hora))
+        vigencia = indice.tarifa_em(_CONCESSIONARIA, dia)
+        bandeira = indice.bandeira_em(dia)
+        if vigencia is None or bandeira is None:
+            precos.append(float("nan"))
+            continue
+        if vigencia.tarifa_base_te is not None and vigencia.tarifa_base_tusd is not None:
+            base = vigencia.tarifa_base_te + vigencia.tarifa_base_tusd
+        else:
+            base = vigencia.tarifa_vigente
+        precos.append(base + bandeira.valor_adicional)
+    return precos
+
+
+def _medir(func, repeticoes: int = REPETICOES) -> tuple[list[float], object]:
+    duracoes = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = func()
+        duracoes.append(time.perf_counter() - inicio)
+    return duracoes, resultado
+
+
+async def bench_custo_cinco_anos(hass) -> None:
+    # Fuso com horário de verão até 2019: meses e dias não têm todos o mesmo número de horas.
+    await hass.config.async_update(time_zone="America/Sao_Paulo")
+    horas = _meia_noite_local(_INICIO) + 3600.0 * np.arange(_HORAS)
+    consumo = np.random.default_rng(42).gamma(2.0, 0.25, _HORAS)
+    inicio_dia = data_local(dt_util.utc_from_timestamp(horas[0]))
+    fim_dia = data_local(dt_util.utc_from_timestamp(horas[-1]))
+    indice = _indice(inicio_dia, fim_dia)
+    vigencias = indice.vigencias(_CONCESSIONARIA)
+    adicionais = {b.competencia: b.valor_adicional for b in indice.bandeiras()}
+
+    duracoes_precos, precos = _medir(lambda: precos_por_hora(vigencias, adicionais, horas))
+    custo = consumo * precos
+    duracoes_dias, dias = _medir(
+        lambda: _agregar(horas, consumo, custo, inicio_dia, fim_dia, mensal=False)
+    )
+    duracoes_meses, meses = _medir(
+        lambda: _agregar(horas, consumo, custo, inicio_dia, fim_dia, mensal=True)
+    )
+    # A referência é lenta; poucas repetições bastam para a comparação.
+    duracoes_referencia, referencia = _medir(lambda: _precos_referencia(indice, horas), 3)
+
+    relatorio(
+        f"custo de {_HORAS} horas",
+        {
+            "vigencias": len(vigencias),
+            "bandeiras": len(adicionais),
+            "dias": len(dias),
+            "meses": len(meses),
+            "repeticoes": REPETICOES,
+        },
+    )
+    relatorio("precos_por_hora", percentis_ms(duracoes_precos))
+    relatorio("_agregar por dia", percentis_ms(duracoes_dias))
+    relatorio("_agregar por mês", percentis_ms(duracoes_meses))
+    relatorio("preço hora a hora com o índice (referência)", percentis_ms(duracoes_referencia))
+
+    assert not np.isnan(precos).any()
+    np.testing.assert_allclose(precos, referencia)
+    assert len(meses) == 60
+    # Cada mês é arredondado a centavos.
+    assert abs(sum(mes["custo"] for mes in meses) - float(custo.sum())) <= 0.005 * len(meses)
@@ -0,0 +1,190 @@
+"""Benchmark de leitura e gravação com um histórico grande em historico_tarifas.
+
+O banco é povoado com ``BENCH_LINHAS`` registros (1 milhão por padrão)
+divididos entre ``BENCH_ENTRADAS`` concessionárias, e então são medidos:
+
+- a leitura do último registro de cada concessionária;
+- a gravação de um snapshot novo, de um repetido já em memória e de um
+  repetido após reinício (caches vazios);
+- a mesma consulta sem índice, como referência, e o plano de consulta.
+"""
+import os
+import time
+from datetime import date, timedelta
+
+from custom_components.tarifas_energia_brasil.coordinator import (
+    TarifasEnergiaCoordinator,
+    _campos_gravacao,
+)
+from custom_components.tarifas_energia_brasil.database import DatabaseManager
+
+from .conftest import ENTRADAS
+from .medicao import MonitorLoop, medir_concorrente, percentis_ms, relatorio
+
+LINHAS = int(os.environ.get("BENCH_LINHAS", "1000000"))
+
+_INICIO_HISTORICO = date(1990, 1, 1)
+_LOTE_INSERCAO = 50000
+_REPETICOES_SEM_INDICE = 5
+
+_ULTIMO_POR_TIMESTAMP = (
+    "SELECT id FROM historico_tarifas {indice}"
+    " WHERE concessionaria_id = ? AND subgrupo = 'B1' ORDER BY timestamp DESC LIMIT 1"
+)
+_ULTIMO_POR_COMPETENCIA = (
+    "SELECT id FROM historico_tarifas {indice}"
+    " WHERE concessionaria_id = ? AND subgrupo = 'B1' ORDER BY dat_competencia DESC LIMIT 1"
+)
+
+
+def _povoar(manager: DatabaseManager, nomes: list[str], linhas: int) -> dict[str, int]:
+    """Insere ``linhas`` registros antigos, distribuídos entre ``nomes`` (thread de banco)."""
+    por_concessionaria = max(1, linhas // len(nomes))
+    with manager._transacao() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO concessionarias (nome) VALUES (?)", [(nome,) for nome in nomes]
+        )
+        ids = dict(conn.execute("SELECT nome, id FROM concessionarias"))
+
+    def _registros(inicio: int, fim: int):
+        for i in range(inicio, fim):
+            dia = _INICIO_HISTORICO + timedelta(days=i)
+            for nome in nomes:
+                yield (
+                    ids[nome],
+                    "Verde",
+                    0.7,
+                    dia.isoformat(),
+                    "online",
+                    f"{dia.isoformat()} 12:00:00.000000",
+                    0.3,
+                    0.4,
+                    dia.isoformat(),
+                    (dia + timedelta(days=364)).isoformat(),
+                )
+
+    passo = max(1, _LOTE_INSERCAO // len(nomes))
+    for inicio in range(0, por_concessionaria, passo):
+        with manager._transacao() as conn:
+            conn.executemany(
+                "INSERT INTO historico_tarifas (concessionaria_id, bandeira_vigente,"
+                " tarifa_vigente, dat_competencia, api_status, timestamp, tarifa_base_te,"
+                " tarifa_base_tusd, dat_inicio_vigencia, dat_fim_vigencia)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                _registros(inicio, min(inicio + passo, por_concessionaria)),
+            )
+    manager._conexao().execute("ANALYZE")
+    return ids
+
+
+def _planos(manager: DatabaseManager, concessionaria_id: int) -> list[str]:
+    conn = manager._conexao()
+    return [
+        " ".join(
+            row[-1]
+            for row in conn.execute(
+                f"EXPLAIN QUERY PLAN {consulta.format(indice='')}", (concessionaria_id,)
+            )
+        )
+        for consulta in (_ULTIMO_POR_TIMESTAMP, _ULTIMO_POR_COMPETENCIA)
+    ]
+
+
+def _consulta_sem_indice(manager: DatabaseManager, concessionaria_id: int) -> list[float]:
+    conn = manager._conexao()
+    duracoes = []
+    for _ in range(_REPETICOES_SEM_INDICE):
+        inicio = time.perf_counter()
+        conn.execute(
+            _ULTIMO_POR_TIMESTAMP.format(indice="NOT INDEXED"), (concessionaria_id,)
+        ).fetchone()
+        duracoes.append(time.perf_counter() - inicio)
+    return duracoes
+
+
+def _esquecer_ultimos(manager: DatabaseManager) -> None:
+    """Simula um reinício: descarta os caches em memória da thread de banco."""
+    manager._concessionarias.clear()
+    manager._ultimos.clear()
+
+
+async def bench_historico_grande(hass, worker, db) -> None:
+    nomes = worker.nomes()[:ENTRADAS]
+    inicio = time.perf_counter()
+    ids = await db.async_executar_na_thread(lambda: _povoar(db, nomes, LINHAS))
+    total_linhas = await db.async_executar_na_thread(
+        lambda: db._conexao().execute("SELECT COUNT(*) FROM historico_tarifas").fetchone()[0]
+    )
+    relatorio(
+        "povoamento de historico_tarifas",
+        {"linhas": total_linhas, "total_s": round(time.perf_counter() - inicio, 3)},
+    )
+
+    planos = await db.async_executar_na_thread(lambda: _planos(db, ids[nomes[0]]))
+    relatorio(
+        "plano das consultas do último registro",
+        dict(zip(("timestamp", "competencia"), planos)),
+    )
+    assert all("ix_historico_concessionaria" in plano for plano in planos)
+
+    sem_indice = await db.async_executar_na_thread(
+        lambda: _consulta_sem_indice(db, ids[nomes[0]])
+    )
+    relatorio("último registro sem índice (referência)", percentis_ms(sem_indice))
+
+    async with MonitorLoop() as monitor:
+        duracoes, total, erros = await medir_concorrente(
+            [
+                lambda nome=nome: db.async_get_latest_tarifa_snapshots(nome, ["B1"])
+                for nome in nomes
+            ]
+        )
+    relatorio(
+        "async_get_latest_tarifa_snapshots",
+        {
+            "operacoes": len(duracoes),
+            "total_s": round(total, 3),
+            # As chamadas são serializadas na thread de banco; p50/p99 incluem a espera.
+            "ms_por_operacao": round(total * 1000 / len(duracoes), 3),
+            **percentis_ms(duracoes),
+            **monitor.como_dict(),
+        },
+    )
+    assert not erros
+
+    campos = {
+        nome: {
+            "B1": _campos_gravacao(
+                TarifasEnergiaCoordinator._parse_api_response(worker.tarifa(nome))
+            )
+        }
+        for nome in nomes
+    }
+    for rodada in ("insercao", "repetido_em_memoria", "repetido_apos_reinicio"):
+        if rodada == "repetido_apos_reinicio":
+            await db.async_executar_na_thread(lambda: _esquecer_ultimos(db))
+        antes = db.metricas.como_dict()["contadores"].get("snapshots_inseridos", 0)
+        async with MonitorLoop() as monitor:
+            duracoes, total, erros = await medir_concorrente(
+                [
+                    lambda nome=nome: db.async_save_tarifa_snapshots(nome, campos[nome])
+                    for nome in nomes
+                ]
+            )
+        inseridos = db.metricas.como_dict()["contadores"].get("snapshots_inseridos", 0) - antes
+        relatorio(
+            f"async_save_tarifa_snapshots com {total_linhas} linhas ({rodada})",
+            {
+                "operacoes": len(duracoes),
+                "inseridos": inseridos,
+                "total_s": round(total, 3),
+                "ms_por_operacao": round(total * 1000 / len(duracoes), 3),
+                **percentis_ms(duracoes),
+                **monitor.como_dict(),
+            },
+        )
+        assert not erros
+        assert inseridos == (len(nomes) if rodada == "insercao" else 0)
+
+    ultimos = await db.async_get_latest_tarifa_snapshots(nomes[0], ["B1"])
+    assert ultimos["B1"]["dat_competencia"] == campos[nomes[0]]["B1"]["dat_competencia"].isoformat()
@@ -0,0 +1,105 @@
+"""Benchmark do tempo de importação e da memória (pico de RSS) da integração.
+
+Cada medição roda em um processo novo: primeiro é importado
+``homeassistant.core`` (a base que toda instalação já paga) e depois todos os
+módulos da integração. São reportados o tempo e o RSS acrescentados pela
+integração e os módulos mais pesados segundo ``-X importtime``.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from .medicao import relatorio
+
+REPETICOES = int(os.environ.get("BENCH_REPETICOES_IMPORTACAO", "5"))
+
+_RAIZ = Path(__file__).resolve().parent.parent
+_PACOTE = "custom_components.tarifas_energia_brasil"
+_MARCA = "-- integracao --"
+# Dependências que não devem ser carregadas só por importar a integração.
+_PESADAS = ("sqlalchemy", "numpy")
+_MAIS_PESADOS = 5
+
+_SCRIPT = f"""
+import importlib, json, pkgutil, resource, sys, time
+
+def rss_kb():
+    # ru_maxrss herda o pico do processo pai no fork; VmHWM recomeça no exec.
+    try:
+        with open("/proc/self/status") as status:
+            for linha in status:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+inicio = time.perf_counter()
+import homeassistant.core
+base_s, base_kb = time.perf_counter() - inicio, rss_kb()
+print({_MARCA!r}, file=sys.stderr, flush=True)
+
+inicio = time.perf_counter()
+pacote = importlib.import_module({_PACOTE!r})
+for modulo in pkgutil.iter_modules(pacote.__path__):
+    importlib.import_module(f"{_PACOTE}.{{modulo.name}}")
+integracao_s, integracao_kb = time.perf_counter() - inicio, rss_kb()
+
+print(json.dumps({{
+    "base_s": base_s,
+    "integracao_s": integracao_s,
+    "base_kb": base_kb,
+    "integracao_kb": integracao_kb - base_kb,
+    "pesadas": [nome for nome in {_PESADAS!r} if nome in sys.modules],
+}}))
+"""
+
+
+def _medir(*opcoes: str) -> tuple[dict, str]:
+    resultado = subprocess.run(
+        [sys.executable, *opcoes, "-c", _SCRIPT],
+        cwd=_RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(resultado.stdout), resultado.stderr
+
+
+def _mais_pesados(importtime: str, prefixo: str = "") -> dict[str, int]:
+    """Módulos com maior tempo próprio (us) importados depois da base."""
+    tempos: dict[str, int] = {}
+    _, _, depois = importtime.partition(_MARCA)
+    for linha in depois.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        proprio, _, nome = (campo.strip() for campo in linha.removeprefix("import time:").split("|"))
+        if proprio.isdigit() and nome.startswith(prefixo):
+            tempos[nome] = int(proprio)
+    return dict(sorted(tempos.items(), key=lambda item: item[1], reverse=True)[:_MAIS_PESADOS])
+
+
+def bench_importacao() -> None:
+    medicoes = [_medir()[0] for _ in range(REPETICOES)]
+    # -X importtime distorce os tempos totais; roda à parte só para o detalhamento.
+    _, importtime = _medir("-X", "importtime")
+
+    def _mediana(chave: str) -> float:
+        return statistics.median(medicao[chave] for medicao in medicoes)
+
+    relatorio(
+        f"importação da integração (mediana de {REPETICOES} processos)",
+        {
+            "homeassistant_core_ms": round(_mediana("base_s") * 1000, 1),
+            "integracao_ms": round(_mediana("integracao_s") * 1000, 1),
+            "rss_homeassistant_core_mb": round(_mediana("base_kb") / 1024, 1),
+            "rss_integracao_mb": round(_mediana("integracao_kb") / 1024, 1),
+            "dependencias_pesadas": ", ".join(medicoes[-1]["pesadas"]) or "nenhuma",
+        },
+    )
+    relatorio("módulos mais lentos, com dependências (us, -X importtime)", _mais_pesados(importtime))
+    relatorio("módulos mais lentos da integração (us)", _mais_pesados(importtime, _PACOTE))
+    assert not any(medicao["pesadas"] for medicao in medicoes)
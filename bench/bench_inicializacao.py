@@ -0,0 +1,74 @@
+"""Benchmark da inicialização com snapshot salvo e o worker lento ou fora do ar.
+
+O setup não espera a API: cada entrada publica o último registro do banco
+(``api_status`` = ``cached``) e a busca segue em segundo plano. O tempo de
+setup deve ficar bem abaixo da latência do worker.
+"""
+import os
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tarifas_energia_brasil.const import CONF_CONCESSIONARIA, DOMAIN
+from custom_components.tarifas_energia_brasil.coordinator import (
+    TarifasEnergiaCoordinator,
+    _campos_gravacao,
+)
+from homeassistant.config_entries import ConfigEntryState
+
+from .conftest import ENTRADAS
+from .medicao import MonitorLoop, medir_concorrente, percentis_ms, relatorio
+
+LATENCIA_LENTA = float(os.environ.get("BENCH_LATENCIA_LENTA", "5"))
+
+
+@pytest.mark.parametrize("worker_estado", ["lento", "fora_do_ar"])
+async def bench_setup_com_snapshot(hass, worker, api, db, worker_estado) -> None:
+    nomes = worker.nomes()[:ENTRADAS]
+    for nome in nomes:
+        snapshot = TarifasEnergiaCoordinator._parse_api_response(worker.tarifa(nome))
+        await db.async_save_tarifa_snapshots(nome, {"B1": _campos_gravacao(snapshot)})
+    if worker_estado == "lento":
+        worker.config.latencia = LATENCIA_LENTA
+    else:
+        await worker.parar()
+
+    entradas = [
+        MockConfigEntry(domain=DOMAIN, title=nome, data={CONF_CONCESSIONARIA: nome})
+        for nome in nomes
+    ]
+    for entrada in entradas:
+        entrada.add_to_hass(hass)
+
+    try:
+        async with MonitorLoop() as monitor:
+            duracoes, total, erros = await medir_concorrente(
+                [
+                    lambda entrada=entrada: hass.config_entries.async_setup(entrada.entry_id)
+                    for entrada in entradas
+                ]
+            )
+        status = {
+            hass.data[DOMAIN][entrada.entry_id].data["B1"].api_status for entrada in entradas
+        }
+        relatorio(
+            f"setup de {ENTRADAS} entradas com snapshot, worker {worker_estado}",
+            {
+                "operacoes": len(duracoes),
+                "erros": len(erros),
+                "total_s": round(total, 3),
+                "latencia_worker_s": LATENCIA_LENTA if worker_estado == "lento" else "-",
+                **percentis_ms(duracoes),
+                **monitor.como_dict(),
+                "api_status": ", ".join(sorted(status)),
+            },
+        )
+        assert not erros
+        assert all(entrada.state is ConfigEntryState.LOADED for entrada in entradas)
+        assert status == {"cached"}
+        if worker_estado == "lento":
+            assert total < LATENCIA_LENTA
+    finally:
+        for entrada in entradas:
+            await hass.config_entries.async_unload(entrada.entry_id)
+        await hass.async_block_till_done()
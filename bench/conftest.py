@@ -0,0 +1,101 @@
+"""Fixtures dos benchmarks: worker simulado, cliente da API e banco em diretório temporário.
+
+Os parâmetros vêm de variáveis de ambiente, por exemplo::
+
+    BENCH_ENTRADAS=500 BENCH_LATENCIA=0.05 pytest bench -s
+
+``BENCH_LOTE=0`` desliga o endpoint de lote do worker, forçando as buscas individuais.
+"""
+import os
+import threading
+
+import pytest
+
+from custom_components.tarifas_energia_brasil.cloudflare_api import CloudflareAPI
+from custom_components.tarifas_energia_brasil.const import DATA_API
+from custom_components.tarifas_energia_brasil.database import (
+    DB_THREAD_NAME,
+    async_acquire_database,
+    async_release_database,
+)
+from custom_components.tarifas_energia_brasil.fila import FilaRequisicoes
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from tests.worker import ConfiguracaoWorker, WorkerSimulado
+
+ENTRADAS = int(os.environ.get("BENCH_ENTRADAS", "200"))
+
+
+def _env_float(nome: str, padrao: float) -> float:
+    return float(os.environ.get(nome, padrao))
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    yield
+
+
+@pytest.fixture(autouse=True)
+def loop_sem_debug(hass):
+    """O modo debug do asyncio, ligado pelos fixtures de teste, guarda a pilha de cada
+    callback e tarefa; desligado, as medições refletem uma instalação real."""
+    hass.loop.set_debug(False)
+    yield
+
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    """O cache HTTP é salvo com atraso; o timer pendente não afeta as medições."""
+    return True
+
+
+@pytest.fixture
+async def worker(socket_enabled):
+    simulado = WorkerSimulado(
+        ConfiguracaoWorker(
+            latencia=_env_float("BENCH_LATENCIA", 0.02),
+            jitter=_env_float("BENCH_JITTER", 0.005),
+            taxa_erro=_env_float("BENCH_TAXA_ERRO", 0.0),
+            tamanho_extra=int(_env_float("BENCH_TAMANHO_EXTRA", 0)),
+            concessionarias=max(ENTRADAS, 1),
+            lote=os.environ.get("BENCH_LOTE", "1") != "0",
+        )
+    )
+    await simulado.iniciar()
+    yield simulado
+    await simulado.parar()
+
+
+@pytest.fixture
+async def api(hass, tmp_path, worker) -> CloudflareAPI:
+    """Cliente compartilhado apontando para o worker simulado.
+
+    A fila usa limites folgados por padrão para medir a integração, não o
+    limitador; BENCH_FILA_TAXA, BENCH_FILA_RAJADA e BENCH_FILA_SIMULTANEAS
+    permitem avaliar outros ajustes.
+    """
+    hass.config.config_dir = str(tmp_path)
+    cliente = CloudflareAPI(hass, async_get_clientsession(hass), base_url=worker.url)
+    cliente.fila = FilaRequisicoes(
+        cliente.metricas,
+        taxa=_env_float("BENCH_FILA_TAXA", 10000),
+        rajada=int(_env_float("BENCH_FILA_RAJADA", 10000)),
+        max_simultaneas=int(_env_float("BENCH_FILA_SIMULTANEAS", 32)),
+    )
+    hass.data[DATA_API] = cliente
+    return cliente
+
+
+@pytest.fixture
+async def db(hass, api):
+    manager = await async_acquire_database(hass)
+    yield manager
+    await async_release_database(hass)
+    aguardar_thread_banco()
+
+
+def aguardar_thread_banco() -> None:
+    """Espera a thread de banco encerrar, para não ser contada como vazada."""
+    for thread in threading.enumerate():
+        if thread.name.startswith(DB_THREAD_NAME):
+            thread.join(5)
@@ -0,0 +1,91 @@
+"""Estatísticas e medição de bloqueio do event loop para os benchmarks."""
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+
+def percentis_ms(amostras_s: Iterable[float]) -> dict[str, float]:
+    """p50, p99, média e máximo (ms) de durações medidas em segundos."""
+    ordenadas = sorted(amostras_s)
+    if not ordenadas:
+        return {"p50_ms": 0.0, "p99_ms": 0.0, "media_ms": 0.0, "max_ms": 0.0}
+
+    def _percentil(p: float) -> float:
+        return ordenadas[min(len(ordenadas) - 1, round(p * (len(ordenadas) - 1)))] * 1000
+
+    return {
+        "p50_ms": round(_percentil(0.50), 3),
+        "p99_ms": round(_percentil(0.99), 3),
+        "media_ms": round(statistics.fmean(ordenadas) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3),
+    }
+
+
+class MonitorLoop:
+    """Mede por quanto tempo o event loop ficou sem atender callbacks.
+
+    Uma tarefa acorda a cada ``intervalo`` segundos; todo atraso acima do
+    ``limite`` em relação ao horário previsto conta como bloqueio.
+    """
+
+    def __init__(self, intervalo: float = 0.005, limite: float = 0.010):
+        self._intervalo = intervalo
+        self._limite = limite
+        self._tarefa: asyncio.Task | None = None
+        self.atrasos: list[float] = []
+
+    async def __aenter__(self) -> "MonitorLoop":
+        self._tarefa = asyncio.get_running_loop().create_task(self._medir())
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+
+    async def _medir(self) -> None:
+        while True:
+            previsto = time.perf_counter() + self._intervalo
+            await asyncio.sleep(self._intervalo)
+            self.atrasos.append(max(0.0, time.perf_counter() - previsto))
+
+    def como_dict(self) -> dict[str, float]:
+        bloqueios = [atraso for atraso in self.atrasos if atraso > self._limite]
+        return {
+            "bloqueio_total_ms": round(sum(bloqueios) * 1000, 3),
+            "bloqueio_max_ms": round(max(self.atrasos, default=0.0) * 1000, 3),
+            "bloqueios": len(bloqueios),
+        }
+
+
+async def medir_concorrente(
+    chamadas: list[Callable[[], Awaitable]],
+) -> tuple[list[float], float, list[BaseException]]:
+    """Executa as chamadas em paralelo; retorna as durações, o tempo total e os erros."""
+    duracoes: list[float] = []
+    erros: list[BaseException] = []
+
+    async def _medida(chamada: Callable[[], Awaitable]) -> None:
+        inicio = time.perf_counter()
+        try:
+            await chamada()
+        except Exception as err:
+            erros.append(err)
+        duracoes.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_medida(chamada) for chamada in chamadas))
+    return duracoes, time.perf_counter() - inicio, erros
+
+
+def relatorio(titulo: str, valores: dict) -> str:
+    """Formata e imprime um bloco de resultados."""
+    largura = max((len(chave) for chave in valores), default=0)
+    linhas = [f"== {titulo}"] + [f"  {chave:<{largura}}  {valor}" for chave, valor in valores.items()]
+    texto = "\n".join(linhas)
+    print(texto)
+    return texto
@@ -1,14 +1,47 @@
 """A integração Tarifas de Energia Brasil."""
 import logging
+import time
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, CONF_CONCESSIONARIA, SERVICE_ATUALIZAR
-from .database import DatabaseManager
-from .cloudflare_api import CloudflareAPI
-from .coordinator import TarifasEnergiaCoordinator
+from .const import (
+    DOMAIN,
+    CONF_CONCESSIONARIA,
+    CONF_PUSH,
+    DATA_PERFIL,
+    SERVICE_ATUALIZAR,
+    SERVICE_CALCULAR_CUSTO,
+    SERVICE_COMPACTAR_HISTORICO,
+    SERVICE_CONSULTAR,
+    SERVICE_IMPORTAR_HISTORICO,
+    SERVICE_PERFILAR,
+)
+from .database import (
+    DatabaseManager,
+    async_acquire_database,
+    async_get_database,
+    async_release_database,
+    politica_retencao,
+)
+from .cloudflare_api import async_get_api
+from .combinacoes import subgrupos_da_entrada
+from .coordinator import TarifasEnergiaCoordinator, async_get_hub
+from .custo import async_calcular_custo, instante_local
+from .estatisticas import INTERVALO_PUBLICACAO
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,24 +49,68 @@ PLATFORMS = ["sensor", "button"]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Configura a integração a partir de uma entrada de configuração."""
+    """Configura a integração a partir de uma entrada de configuração.
+
+    Os sensores são criados imediatamente com o último snapshot do banco local;
+    a busca na API é feita em segundo plano depois que o Home Assistant inicia.
+    """
+    inicio_setup = time.monotonic()
     hass.data.setdefault(DOMAIN, {})
 
     concessionaria_nome = entry.data[CONF_CONCESSIONARIA]
 
-    db_path = hass.config.path(f"{DOMAIN}.sqlite")
-    db_manager = DatabaseManager(hass, db_path)
-    await db_manager.async_setup_database()
+    db_manager = await async_acquire_database(hass)
+
+    api_client = async_get_api(hass)
+    hub = async_get_hub(hass, api_client)
+    coordinator = TarifasEnergiaCoordinator(
+        hass,
+        api_client,
+        db_manager,
+        concessionaria_nome,
+        hub,
+        push=entry.options.get(CONF_PUSH, False),
+        subgrupos=subgrupos_da_entrada(entry.options),
+    )
+    unregister = hub.async_register(coordinator)
+
+    # async_unload_entry não é chamado se o setup falhar: a referência ao banco
+    # é liberada aqui.
+    try:
+        tem_cache = await coordinator.async_carregar_cache()
+        hass.data[DOMAIN][entry.entry_id] = coordinator
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except BaseException:
+        hass.data[DOMAIN].pop(entry.entry_id, None)
+        unregister()
+        await async_release_database(hass)
+        raise
+    entry.async_on_unload(unregister)
 
-    session = async_get_clientsession(hass)
-    api_client = CloudflareAPI(hass, session)
-    coordinator = TarifasEnergiaCoordinator(hass, api_client, db_manager, concessionaria_nome)
+    @callback
+    def _atualizar_em_segundo_plano(_hass: HomeAssistant) -> None:
+        entry.async_create_background_task(
+            hass, coordinator.async_refresh(), f"{DOMAIN}_refresh_{entry.entry_id}"
+        )
+        coordinator.estatisticas.async_agendar()
 
-    await coordinator.async_config_entry_first_refresh()
+    @callback
+    def _publicar_estatisticas(_now) -> None:
+        coordinator.estatisticas.async_agendar()
 
-    hass.data[DOMAIN][entry.entry_id] = coordinator
+    entry.async_on_unload(async_at_started(hass, _atualizar_em_segundo_plano))
+    entry.async_on_unload(
+        async_track_time_interval(hass, _publicar_estatisticas, INTERVALO_PUBLICACAO)
+    )
+    entry.async_on_unload(coordinator.estatisticas.async_cancelar)
+    entry.async_on_unload(entry.add_update_listener(_async_opcoes_atualizadas))
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _LOGGER.debug(
+        "Setup de '%s' concluído em %.1f ms (%s).",
+        concessionaria_nome,
+        (time.monotonic() - inicio_setup) * 1000,
+        "snapshot local" if tem_cache else "sem snapshot local",
+    )
 
     async def _handle_atualizar_tarifas(call: ServiceCall) -> None:
         entry_id = call.data.get("entry_id", entry.entry_id)
@@ -45,12 +122,166 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.services.async_register(DOMAIN, SERVICE_ATUALIZAR, _handle_atualizar_tarifas)
 
+    async def _handle_perfilar_atualizacao(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data.get("entry_id", entry.entry_id)
+        coord: TarifasEnergiaCoordinator | None = hass.data[DOMAIN].get(entry_id)
+        if coord is None:
+            raise ServiceValidationError(f"entry_id '{entry_id}' não encontrado.")
+        if hass.data.get(DATA_PERFIL):
+            raise ServiceValidationError("Já existe um perfilamento em andamento.")
+        # Importado sob demanda: cProfile/pstats só são carregados quando usados.
+        from .perfil import async_perfilar_atualizacoes
+
+        hass.data[DATA_PERFIL] = True
+        try:
+            return await async_perfilar_atualizacoes(
+                hass, coord, call.data["atualizacoes"], call.data["nocache"]
+            )
+        finally:
+            hass.data.pop(DATA_PERFIL, None)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PERFILAR,
+        _handle_perfilar_atualizacao,
+        schema=vol.Schema(
+            {
+                vol.Optional("entry_id"): cv.string,
+                vol.Optional("atualizacoes", default=1): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=20)
+                ),
+                vol.Optional("nocache", default=False): cv.boolean,
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _handle_consultar_tarifas(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data.get("entry_id", entry.entry_id)
+        coord: TarifasEnergiaCoordinator | None = hass.data[DOMAIN].get(entry_id)
+        if coord is None:
+            raise ServiceValidationError(f"entry_id '{entry_id}' não encontrado.")
+        return {
+            "concessionaria": coord.concessionaria,
+            "resultados": [coord.consultar_tarifa(momento) for momento in call.data["momentos"]],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CONSULTAR,
+        _handle_consultar_tarifas,
+        schema=vol.Schema(
+            {
+                vol.Optional("entry_id"): cv.string,
+                vol.Required("momentos"): vol.All(cv.ensure_list, [cv.datetime]),
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _handle_calcular_custo(call: ServiceCall) -> ServiceResponse:
+        entry_id = call.data.get("entry_id", entry.entry_id)
+        coord: TarifasEnergiaCoordinator | None = hass.data[DOMAIN].get(entry_id)
+        if coord is None:
+            raise ServiceValidationError(f"entry_id '{entry_id}' não encontrado.")
+        inicio = instante_local(call.data["inicio"])
+        fim = instante_local(call.data["fim"]) if "fim" in call.data else dt_util.now()
+        if fim <= inicio:
+            raise ServiceValidationError("'fim' deve ser posterior a 'inicio'.")
+        return await async_calcular_custo(
+            hass, coord.db.indice, coord.concessionaria, call.data["statistic_id"], inicio, fim
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CALCULAR_CUSTO,
+        _handle_calcular_custo,
+        schema=vol.Schema(
+            {
+                vol.Optional("entry_id"): cv.string,
+                vol.Required("statistic_id"): cv.string,
+                vol.Required("inicio"): cv.datetime,
+                vol.Optional("fim"): cv.datetime,
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _handle_importar_historico(call: ServiceCall) -> ServiceResponse:
+        caminhos = {
+            campo: call.data.get(campo) for campo in ("caminho_tarifas", "caminho_bandeiras")
+        }
+        if not any(caminhos.values()):
+            raise ServiceValidationError("Informe caminho_tarifas e/ou caminho_bandeiras.")
+        for caminho in filter(None, caminhos.values()):
+            if not hass.config.is_allowed_path(caminho):
+                raise ServiceValidationError(f"Acesso ao caminho '{caminho}' não permitido.")
+        resultado = await _banco_de_dados(hass).async_importar_historico(
+            caminhos["caminho_tarifas"], caminhos["caminho_bandeiras"]
+        )
+        # Horas já publicadas podem ter mudado de preço com o histórico importado.
+        for coord in hass.data[DOMAIN].values():
+            coord.estatisticas.async_agendar(completo=True)
+        return resultado
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORTAR_HISTORICO,
+        _handle_importar_historico,
+        schema=vol.Schema(
+            {
+                vol.Optional("caminho_tarifas"): cv.string,
+                vol.Optional("caminho_bandeiras"): cv.string,
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _handle_compactar_historico(call: ServiceCall) -> ServiceResponse:
+        db = _banco_de_dados(hass)
+        dias_retencao, somente_alteracoes = politica_retencao(hass)
+        return await db.async_compactar_historico(
+            call.data.get("dias_retencao", dias_retencao),
+            call.data.get("somente_alteracoes", somente_alteracoes),
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPACTAR_HISTORICO,
+        _handle_compactar_historico,
+        schema=vol.Schema(
+            {
+                vol.Optional("dias_retencao"): cv.positive_int,
+                vol.Optional("somente_alteracoes"): cv.boolean,
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     return True
 
 
+def _banco_de_dados(hass: HomeAssistant) -> DatabaseManager:
+    """Banco compartilhado no momento da chamada do serviço.
+
+    Os serviços continuam registrados depois que a última entrada é
+    descarregada, quando o banco já foi fechado.
+    """
+    db = async_get_database(hass)
+    if db is None:
+        raise ServiceValidationError("Nenhuma entrada da integração está carregada.")
+    return db
+
+
+async def _async_opcoes_atualizadas(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Recarrega a entrada para aplicar as novas opções."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Descarrega uma entrada de configuração."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        await async_release_database(hass)
     return unload_ok
@@ -0,0 +1,154 @@
+"""Agendamento das atualizações com base nas datas de vigência conhecidas."""
+import heapq
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Awaitable, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+# Intervalo de verificação perto de uma fronteira (fim de vigência ou bandeira).
+INTERVALO_JANELA = timedelta(hours=6)
+# Intervalo de verificação quando os dados da fonte parecem desatualizados.
+INTERVALO_ATRASADO = timedelta(days=1)
+# Maior intervalo sem nenhuma busca, mesmo longe de qualquer fronteira.
+INTERVALO_MAXIMO = timedelta(days=7)
+
+# Dias antes do fim da vigência em que a janela de verificação começa.
+_ANTECEDENCIA_VIGENCIA = timedelta(days=1)
+# Dias após o fim da vigência em que a nova tarifa ainda é aguardada com frequência.
+_TOLERANCIA_VIGENCIA = timedelta(days=15)
+# A ANEEL divulga a bandeira do mês seguinte na última semana do mês.
+_DIA_ABERTURA_JANELA_BANDEIRA = 20
+
+
+def _inicio_do_dia(dia: date, agora: datetime) -> datetime:
+    return datetime.combine(dia, time.min, tzinfo=agora.tzinfo)
+
+
+def _primeiro_dia_mes_seguinte(dia: date) -> date:
+    return (dia.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def planejar_proxima_atualizacao(
+    agora: datetime,
+    dat_fim_vigencia: date | None,
+    dat_competencia_bandeira: date | None,
+) -> datetime:
+    """Calcula o momento da próxima busca a partir das fronteiras conhecidas.
+
+    Perto do fim da vigência da tarifa ou durante a janela de divulgação da
+    bandeira do mês seguinte a busca é feita a cada ``INTERVALO_JANELA``; fora
+    delas a próxima busca fica para a abertura da próxima janela, limitada a
+    ``INTERVALO_MAXIMO``.
+    """
+    hoje = agora.date()
+    candidatos = [agora + INTERVALO_MAXIMO]
+
+    if dat_fim_vigencia is None:
+        candidatos.append(agora + INTERVALO_ATRASADO)
+    else:
+        abertura = dat_fim_vigencia - _ANTECEDENCIA_VIGENCIA
+        if hoje > dat_fim_vigencia + _TOLERANCIA_VIGENCIA:
+            candidatos.append(agora + INTERVALO_ATRASADO)
+        elif hoje >= abertura:
+            candidatos.append(agora + INTERVALO_JANELA)
+        else:
+            candidatos.append(_inicio_do_dia(abertura, agora))
+
+    mes_atual = hoje.replace(day=1)
+    proximo_mes = _primeiro_dia_mes_seguinte(hoje)
+    if dat_competencia_bandeira is None or dat_competencia_bandeira < mes_atual:
+        candidatos.append(agora + INTERVALO_JANELA)
+    elif dat_competencia_bandeira < proximo_mes:
+        abertura = mes_atual.replace(day=_DIA_ABERTURA_JANELA_BANDEIRA)
+        if hoje >= abertura:
+            candidatos.append(agora + INTERVALO_JANELA)
+        else:
+            candidatos.append(_inicio_do_dia(abertura, agora))
+    else:
+        abertura = proximo_mes.replace(day=_DIA_ABERTURA_JANELA_BANDEIRA)
+        candidatos.append(_inicio_do_dia(abertura, agora))
+
+    return min(candidatos)
+
+
+class AgendadorAtualizacoes:
+    """Fila de atualizações com um único timer compartilhado por todas as chaves.
+
+    Cada chave tem no máximo um horário agendado. Apenas o horário mais próximo
+    fica armado no event loop; ao disparar, todas as chaves vencidas são
+    entregues juntas para ``async_executar``.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        async_executar: Callable[[list[str]], Awaitable[None]],
+    ):
+        self._hass = hass
+        self._async_executar = async_executar
+        self._agenda: dict[str, datetime] = {}
+        self._heap: list[tuple[datetime, str]] = []
+        self._armado: datetime | None = None
+        self._cancelar_timer: CALLBACK_TYPE | None = None
+
+    def proxima(self, chave: str) -> datetime | None:
+        """Retorna o horário agendado para a chave, se houver."""
+        return self._agenda.get(chave)
+
+    @callback
+    def async_agendar(self, chave: str, quando: datetime) -> None:
+        """Agenda (ou reagenda) a chave para o horário informado."""
+        self._agenda[chave] = quando
+        heapq.heappush(self._heap, (quando, chave))
+        _LOGGER.debug("Próxima atualização de '%s' agendada para %s.", chave, quando)
+        self._async_rearmar()
+
+    @callback
+    def async_remover(self, chave: str) -> None:
+        """Remove a chave da agenda."""
+        if self._agenda.pop(chave, None) is not None:
+            self._async_rearmar()
+
+    @callback
+    def async_parar(self) -> None:
+        """Cancela o timer e esvazia a agenda."""
+        self._agenda.clear()
+        self._heap.clear()
+        self._async_rearmar()
+
+    @callback
+    def _async_rearmar(self) -> None:
+        # Entradas reagendadas ou removidas são descartadas de forma preguiçosa.
+        while self._heap and self._agenda.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+        proximo = self._heap[0][0] if self._heap else None
+        if proximo == self._armado:
+            return
+        if self._cancelar_timer is not None:
+            self._cancelar_timer()
+            self._cancelar_timer = None
+        self._armado = proximo
+        if proximo is not None:
+            self._cancelar_timer = async_track_point_in_time(
+                self._hass, self._async_disparar, proximo
+            )
+
+    async def _async_disparar(self, _now: datetime) -> None:
+        self._cancelar_timer = None
+        self._armado = None
+        agora = dt_util.utcnow()
+        vencidas: list[str] = []
+        while self._heap and self._heap[0][0] <= agora:
+            quando, chave = heapq.heappop(self._heap)
+            if self._agenda.get(chave) == quando:
+                del self._agenda[chave]
+                vencidas.append(chave)
+        self._async_rearmar()
+        if vencidas:
+            await self._async_executar(vencidas)
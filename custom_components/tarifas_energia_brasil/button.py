@@ -4,6 +4,7 @@ import logging
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -42,7 +43,7 @@ class AtualizarTarifasButton(CoordinatorEntity[TarifasEnergiaCoordinator], Butto
             "name": f"Tarifas {concessionaria_nome}",
             "manufacturer": "ANEEL",
             "model": "Tarifas de Energia Elétrica",
-            "entry_type": "service",
+            "entry_type": DeviceEntryType.SERVICE,
         }
 
     async def async_press(self) -> None:
@@ -0,0 +1,142 @@
+"""Catálogo persistente e pesquisável das concessionárias disponíveis na API."""
+import asyncio
+import difflib
+import logging
+import re
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .cloudflare_api import async_get_api
+from .const import DATA_CATALOGO, DOMAIN
+from .database import async_acquire_database, async_release_database
+
+_LOGGER = logging.getLogger(__name__)
+
+# Após este prazo o catálogo salvo continua sendo usado, mas é revalidado em
+# segundo plano.
+TTL_CATALOGO = timedelta(days=7)
+
+_LIMITE_SUGESTOES = 10
+_NAO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos, ignora maiúsculas e troca separadores por espaço."""
+    sem_acentos = "".join(
+        c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c)
+    )
+    return _NAO_ALFANUMERICO.sub(" ", sem_acentos.casefold()).strip()
+
+
+class CatalogoConcessionarias:
+    """Lista imutável de concessionárias com índice normalizado para busca.
+
+    O índice é ordenado pelo nome normalizado, de modo que a busca por prefixo
+    é uma busca binária; as demais estratégias (início de palavra, trecho e
+    semelhança) só percorrem a lista quando a anterior não encontra nada.
+    """
+
+    def __init__(self, nomes: Iterable[str], atualizado_em: datetime | None):
+        self.nomes = sorted(set(nomes), key=str.casefold)
+        self.atualizado_em = atualizado_em
+        indice = sorted((normalizar(nome), nome) for nome in self.nomes)
+        self._chaves = [chave for chave, _ in indice]
+        self._nomes_indice = [nome for _, nome in indice]
+
+    @property
+    def expirado(self) -> bool:
+        return self.atualizado_em is None or dt_util.utcnow() - self.atualizado_em > TTL_CATALOGO
+
+    def buscar(self, termo: str) -> list[str]:
+        """Retorna as concessionárias que correspondem ao termo, as mais próximas primeiro."""
+        chave = normalizar(termo)
+        if not chave:
+            return list(self.nomes)
+
+        pos = bisect_left(self._chaves, chave)
+        resultados: list[str] = []
+        while pos < len(self._chaves) and self._chaves[pos].startswith(chave):
+            resultados.append(self._nomes_indice[pos])
+            pos += 1
+
+        vistos = set(resultados)
+        for condicao in (
+            lambda c: f" {chave}" in f" {c}",
+            lambda c: chave in c,
+        ):
+            for chave_nome, nome in zip(self._chaves, self._nomes_indice):
+                if nome not in vistos and condicao(chave_nome):
+                    resultados.append(nome)
+                    vistos.add(nome)
+        if resultados:
+            return resultados
+
+        semelhantes = difflib.get_close_matches(chave, self._chaves, n=_LIMITE_SUGESTOES, cutoff=0.6)
+        return [self._nomes_indice[self._chaves.index(c)] for c in semelhantes]
+
+
+class _GerenciadorCatalogo:
+    """Mantém o catálogo em memória, persistido no banco local e revalidado na API."""
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self.catalogo: CatalogoConcessionarias | None = None
+        self._revalidacao: asyncio.Task | None = None
+
+    async def async_obter(self) -> CatalogoConcessionarias:
+        """Retorna o catálogo sem esperar pela API, exceto se nenhum catálogo foi salvo ainda."""
+        if self.catalogo is None:
+            db = await async_acquire_database(self._hass)
+            try:
+                nomes, atualizado_em = await db.async_get_catalogo()
+            finally:
+                await async_release_database(self._hass)
+            if nomes:
+                self.catalogo = CatalogoConcessionarias(nomes, atualizado_em)
+
+        if self.catalogo is None:
+            return await self._async_revalidar()
+        if self.catalogo.expirado and self._revalidacao is None:
+            self._revalidacao = self._hass.async_create_background_task(
+                self._async_revalidar(), f"{DOMAIN}_revalidar_catalogo"
+            )
+            self._revalidacao.add_done_callback(self._revalidacao_concluida)
+        return self.catalogo
+
+    def _revalidacao_concluida(self, tarefa: asyncio.Task) -> None:
+        self._revalidacao = None
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            _LOGGER.warning(
+                "Falha ao revalidar o catálogo de concessionárias: %s", tarefa.exception()
+            )
+
+    async def _async_revalidar(self) -> CatalogoConcessionarias:
+        nomes = await async_get_api(self._hass).async_fetch_concessionarias()
+        catalogo = CatalogoConcessionarias(nomes, dt_util.utcnow())
+        if catalogo.nomes:
+            db = await async_acquire_database(self._hass)
+            try:
+                await db.async_salvar_catalogo(catalogo.nomes, catalogo.atualizado_em)
+            finally:
+                await async_release_database(self._hass)
+            self.catalogo = catalogo
+            _LOGGER.debug("Catálogo com %s concessionárias atualizado.", len(catalogo.nomes))
+        return catalogo
+
+
+async def async_get_catalogo(hass: HomeAssistant) -> CatalogoConcessionarias:
+    """Retorna o catálogo de concessionárias da instância.
+
+    Usa o catálogo salvo no banco local, mesmo com a API fora do ar, e o
+    revalida em segundo plano quando passa de ``TTL_CATALOGO``. Só aguarda a
+    API quando ainda não há catálogo salvo; nesse caso erros de rede propagam.
+    """
+    gerenciador: _GerenciadorCatalogo | None = hass.data.get(DATA_CATALOGO)
+    if gerenciador is None:
+        gerenciador = hass.data[DATA_CATALOGO] = _GerenciadorCatalogo(hass)
+    return await gerenciador.async_obter()
@@ -1,31 +1,198 @@
 """Cliente HTTP para a API Cloudflare Worker de tarifas de energia."""
+import asyncio
 import logging
+import random
+import time
+from typing import Any, Callable
 
-from homeassistant.core import HomeAssistant
-from aiohttp import ClientSession, ClientError
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.util.json import json_loads
+from aiohttp import ClientSession, ClientError, ClientResponseError, ClientTimeout
+from yarl import URL
 
-from .const import CLOUDFLARE_BASE_URL
+from .const import CLOUDFLARE_BASE_URL, DATA_API, DOMAIN, SUBGRUPO_PADRAO
+from .fila import PRIORIDADE_AGENDADA, PRIORIDADE_CONFIGURACAO, FilaRequisicoes
+from .metricas import Metricas
 
 _LOGGER = logging.getLogger(__name__)
 
+_CACHE_STORAGE_KEY = f"{DOMAIN}.http_cache"
+_CACHE_STORAGE_VERSION = 1
+_CACHE_SAVE_DELAY = 10
+# Respostas guardadas, no máximo; as usadas há mais tempo são descartadas.
+_CACHE_MAX_ENTRADAS = 256
+# O lote muda com o conjunto de concessionárias pedido: guardá-lo criaria uma
+# entrada por combinação, quase nunca reaproveitada.
+_CAMINHO_LOTE = "/tarifas/lote"
+
+_TIMEOUT = 10
+_TENTATIVAS = 3
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX = 8.0
+
+_CIRCUITO_LIMITE_FALHAS = 3
+_CIRCUITO_TEMPO_ABERTO = 300
+
+# O worker envia comentários de keep-alive; sem nenhum byte neste prazo a
+# conexão de eventos é considerada perdida.
+_EVENTOS_TIMEOUT_LEITURA = 90
+
+
+class CircuitoAbertoError(ClientError):
+    """Indica que o circuito do host está aberto e a requisição não foi feita."""
+
+
+class _CircuitBreaker:
+    """Circuit breaker simples por host.
+
+    Após ``_CIRCUITO_LIMITE_FALHAS`` falhas consecutivas o circuito abre e as
+    requisições falham imediatamente por ``_CIRCUITO_TEMPO_ABERTO`` segundos.
+    Depois disso uma única requisição de teste é liberada: se ela falhar, o
+    circuito volta a abrir.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.falhas_consecutivas = 0
+        self._aberto_ate = 0.0
+        self._teste_em_andamento = False
+
+    @property
+    def aberto(self) -> bool:
+        return self.falhas_consecutivas >= _CIRCUITO_LIMITE_FALHAS
+
+    def verificar(self) -> bool:
+        """Levanta CircuitoAbertoError se a requisição não deve ser feita.
+
+        Retorna True quando a requisição liberada é a de teste.
+        """
+        if not self.aberto:
+            return False
+        if time.monotonic() < self._aberto_ate or self._teste_em_andamento:
+            raise CircuitoAbertoError(f"Circuito aberto para {self.host}; usando cache local.")
+        self._teste_em_andamento = True
+        return True
+
+    def encerrar_teste(self) -> None:
+        """Libera uma nova requisição de teste, mesmo que a atual tenha sido cancelada."""
+        self._teste_em_andamento = False
+
+    def registrar_sucesso(self) -> None:
+        if self.aberto:
+            _LOGGER.info("Circuito para %s fechado: serviço respondeu novamente.", self.host)
+        self.falhas_consecutivas = 0
+        self._teste_em_andamento = False
+
+    def registrar_falha(self) -> None:
+        self.falhas_consecutivas += 1
+        self._teste_em_andamento = False
+        if self.aberto:
+            self._aberto_ate = time.monotonic() + _CIRCUITO_TEMPO_ABERTO
+            _LOGGER.warning(
+                "Circuito para %s aberto por %s s após %s falhas consecutivas.",
+                self.host,
+                _CIRCUITO_TEMPO_ABERTO,
+                self.falhas_consecutivas,
+            )
+
+
+class PushIndisponivelError(ClientError):
+    """Indica que o worker não oferece o endpoint de eventos (SSE)."""
+
+
+def _erro_transitorio(err: BaseException) -> bool:
+    """Indica se vale a pena repetir a requisição após o erro."""
+    if isinstance(err, CircuitoAbertoError):
+        return False
+    if isinstance(err, ClientResponseError):
+        return err.status >= 500 or err.status == 429
+    return isinstance(err, (ClientError, asyncio.TimeoutError))
+
+
+class _CacheRespostas:
+    """Cache persistente de respostas HTTP com seus validadores (ETag/Last-Modified).
+
+    Guarda até ``_CACHE_MAX_ENTRADAS`` respostas, descartando as usadas há mais tempo.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._store: Store = Store(hass, _CACHE_STORAGE_VERSION, _CACHE_STORAGE_KEY)
+        self._entradas: dict[str, dict] | None = None
+        self._lock = asyncio.Lock()
+
+    async def async_get(self, chave: str) -> dict | None:
+        if self._entradas is None:
+            async with self._lock:
+                if self._entradas is None:
+                    salvas = await self._store.async_load() or {}
+                    # Caches antigos podem ter respostas de lote guardadas.
+                    self._entradas = {
+                        chave: entrada
+                        for chave, entrada in list(salvas.items())[-_CACHE_MAX_ENTRADAS:]
+                        if _CAMINHO_LOTE not in chave
+                    }
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None:
+            self._entradas[chave] = entrada
+        return entrada
+
+    @callback
+    def async_set(self, chave: str, entrada: dict) -> None:
+        if self._entradas is None:
+            self._entradas = {}
+        self._entradas.pop(chave, None)
+        self._entradas[chave] = entrada
+        while len(self._entradas) > _CACHE_MAX_ENTRADAS:
+            del self._entradas[next(iter(self._entradas))]
+        self._store.async_delay_save(lambda: self._entradas, _CACHE_SAVE_DELAY)
+
 
 class CloudflareAPI:
-    """Classe responsável pelas chamadas HTTP ao serviço Cloudflare Worker."""
+    """Classe responsável pelas chamadas HTTP ao serviço Cloudflare Worker.
+
+    As respostas são guardadas em disco junto com seus validadores HTTP; as
+    requisições seguintes enviam If-None-Match/If-Modified-Since e, em uma
+    resposta 304, reaproveitam o payload já decodificado.
+
+    Chamadas concorrentes para a mesma URL e parâmetros compartilham uma única
+    requisição em andamento. Erros transitórios são repetidos com backoff
+    exponencial e jitter, e um circuit breaker por host faz as chamadas
+    falharem imediatamente enquanto o serviço estiver fora do ar.
 
-    def __init__(self, hass: HomeAssistant, session: ClientSession):
+    Toda tentativa HTTP passa pela ``fila``, compartilhada por todas as
+    entradas, que limita a taxa e a concorrência e atende primeiro os pedidos
+    do usuário. A assinatura de eventos fica fora dela, pois é uma conexão
+    longa e única.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: ClientSession,
+        base_url: str = CLOUDFLARE_BASE_URL,
+    ):
         self._hass = hass
         self._session = session
+        self._base_url = base_url.rstrip("/")
+        self._lote_suportado = True
+        self._cache = _CacheRespostas(hass)
+        self._em_voo: dict[str, asyncio.Task] = {}
+        self._prioridades: dict[str, int] = {}
+        self._circuitos: dict[str, _CircuitBreaker] = {}
+        self.metricas = Metricas()
+        self.fila = FilaRequisicoes(self.metricas)
 
-    async def async_fetch_concessionarias(self) -> list[str]:
+    async def async_fetch_concessionarias(
+        self, prioridade: int = PRIORIDADE_CONFIGURACAO
+    ) -> list[str]:
         """Busca a lista de concessionárias disponíveis."""
-        url = f"{CLOUDFLARE_BASE_URL}/tarifas/concessionarias"
+        url = f"{self._base_url}/tarifas/concessionarias"
         try:
-            async with self._session.get(url, timeout=30) as resp:
-                resp.raise_for_status()
-                data = await resp.json()
-                if not isinstance(data, list):
-                    raise ValueError(f"Resposta inesperada: {data}")
-                return data
+            return await self._async_get_json(
+                url, {}, validar=_validar_concessionarias, prioridade=prioridade
+            )
         except ClientError as err:
             _LOGGER.error("Erro ao buscar concessionárias: %s", err)
             raise
@@ -33,33 +200,318 @@ class CloudflareAPI:
             _LOGGER.error("Erro inesperado ao buscar concessionárias: %s", err)
             raise
 
-    async def async_fetch_tarifas(self, concessionaria: str, nocache: bool = False) -> dict:
+    async def async_fetch_tarifas(
+        self,
+        concessionaria: str,
+        nocache: bool = False,
+        subgrupo: str = SUBGRUPO_PADRAO,
+        prioridade: int = PRIORIDADE_AGENDADA,
+    ) -> dict:
         """Busca tarifa e bandeira vigentes para a concessionária informada.
 
         Args:
             concessionaria: Nome da concessionária (ex: 'CELESC').
             nocache: Se True, envia nocache=true na query string para
                      forçar o Cloudflare Worker a ignorar o cache e
-                     buscar dados frescos da fonte.
+                     buscar dados frescos da fonte. O cache local de
+                     respostas também é ignorado.
+            subgrupo: Subgrupo tarifário (ex: 'B3'); o padrão não é enviado.
+            prioridade: Classe de prioridade na fila de requisições.
 
         Returns:
             Dict com estrutura: { concessionaria, bandeira_tarifaria, tarifa }
         """
-        url = f"{CLOUDFLARE_BASE_URL}/tarifas/atual"
+        url = f"{self._base_url}/tarifas/atual"
         params: dict[str, str] = {"concessionaria": concessionaria}
-        if nocache:
-            params["nocache"] = "true"
+        if subgrupo != SUBGRUPO_PADRAO:
+            params["subgrupo"] = subgrupo
 
         try:
-            async with self._session.get(url, params=params, timeout=30) as resp:
-                resp.raise_for_status()
-                data = await resp.json()
-                if not isinstance(data, dict) or "tarifa" not in data:
-                    raise ValueError(f"Resposta inesperada da API: {data}")
-                return data
+            return await self._async_get_json(
+                url, params, nocache=nocache, validar=_validar_tarifas, prioridade=prioridade
+            )
         except ClientError as err:
             _LOGGER.error("Erro ao buscar tarifas de '%s': %s", concessionaria, err)
             raise
         except Exception as err:
             _LOGGER.error("Erro inesperado ao buscar tarifas: %s", err)
             raise
+
+    async def async_fetch_tarifas_lote(
+        self,
+        concessionarias: list[str],
+        nocache: bool = False,
+        subgrupo: str = SUBGRUPO_PADRAO,
+    ) -> dict[str, dict]:
+        """Busca as tarifas de um subgrupo de várias concessionárias em uma única requisição.
+
+        Caso o worker não ofereça o endpoint de lote (404/405), passa a buscar
+        cada concessionária individualmente, em paralelo.
+
+        Returns:
+            Dict { nome_concessionaria: resposta de async_fetch_tarifas }.
+            Concessionárias sem resposta válida ficam ausentes.
+        """
+        if not concessionarias:
+            return {}
+        if self._lote_suportado:
+            try:
+                return await self._async_fetch_lote(concessionarias, nocache, subgrupo)
+            except ClientResponseError as err:
+                if err.status not in (404, 405):
+                    raise
+                _LOGGER.info("Endpoint de lote indisponível; usando requisições individuais.")
+                self._lote_suportado = False
+
+        resultados = await asyncio.gather(
+            *(
+                self.async_fetch_tarifas(nome, nocache=nocache, subgrupo=subgrupo)
+                for nome in concessionarias
+            ),
+            return_exceptions=True,
+        )
+        return {
+            nome: resultado
+            for nome, resultado in zip(concessionarias, resultados)
+            if not isinstance(resultado, BaseException)
+        }
+
+    async def _async_fetch_lote(
+        self, concessionarias: list[str], nocache: bool, subgrupo: str
+    ) -> dict[str, dict]:
+        url = f"{self._base_url}{_CAMINHO_LOTE}"
+        params = {"concessionarias": ",".join(sorted(concessionarias))}
+        if subgrupo != SUBGRUPO_PADRAO:
+            params["subgrupo"] = subgrupo
+        itens = await self._async_get_json(url, params, nocache=nocache, validar=_validar_lote)
+        if isinstance(itens, dict):
+            itens = itens["tarifas"]
+        return {
+            item["concessionaria"]: item
+            for item in itens
+            if isinstance(item, dict) and "tarifa" in item and item.get("concessionaria")
+        }
+
+    async def async_escutar_eventos(
+        self,
+        concessionarias: list[str],
+        ultimo_id: str | None,
+        ao_conectar: Callable[[], None],
+        ao_receber: Callable[[str, str, str | None], None],
+    ) -> None:
+        """Mantém uma assinatura SSE das mudanças de tarifa até a conexão cair.
+
+        Usa a mesma sessão aiohttp das demais chamadas. ``ao_receber`` recebe
+        o tipo, o campo ``data`` e o id de cada evento; ``ultimo_id`` é
+        enviado como Last-Event-ID para o worker reenviar o que foi perdido.
+        Levanta PushIndisponivelError se o worker não oferecer eventos.
+        """
+        url = f"{self._base_url}/tarifas/eventos"
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+        if ultimo_id:
+            headers["Last-Event-ID"] = ultimo_id
+        timeout = ClientTimeout(total=None, connect=_TIMEOUT, sock_read=_EVENTOS_TIMEOUT_LEITURA)
+        async with self._session.get(
+            url,
+            params={"concessionarias": ",".join(sorted(concessionarias))},
+            headers=headers,
+            timeout=timeout,
+        ) as resp:
+            if resp.status in (404, 405, 501) or (
+                resp.ok and resp.content_type != "text/event-stream"
+            ):
+                raise PushIndisponivelError(f"Eventos indisponíveis em {url} (HTTP {resp.status}).")
+            resp.raise_for_status()
+            ao_conectar()
+
+            tipo, dados, evento_id = "message", [], None
+            async for bruto in resp.content:
+                self.metricas.incrementar("bytes_recebidos", len(bruto))
+                linha = bruto.decode("utf-8").rstrip("\r\n")
+                if not linha:
+                    if dados:
+                        self.metricas.incrementar("eventos")
+                        ao_receber(tipo, "\n".join(dados), evento_id)
+                    tipo, dados, evento_id = "message", [], None
+                    continue
+                if linha.startswith(":"):
+                    continue
+                campo, _, valor = linha.partition(":")
+                valor = valor.removeprefix(" ")
+                if campo == "event":
+                    tipo = valor
+                elif campo == "data":
+                    dados.append(valor)
+                elif campo == "id":
+                    evento_id = valor
+
+    async def _async_get_json(
+        self,
+        url: str,
+        params: dict[str, str],
+        nocache: bool = False,
+        validar: Callable[[Any], None] | None = None,
+        prioridade: int = PRIORIDADE_AGENDADA,
+    ) -> Any:
+        """Executa o GET, compartilhando a requisição com chamadas idênticas em andamento.
+
+        Uma chamada repetida com prioridade maior eleva a da requisição
+        existente, inclusive na fila.
+        """
+        chave = f"{url}?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        chave_voo = f"{chave}#nocache" if nocache else chave
+
+        tarefa = self._em_voo.get(chave_voo)
+        if tarefa is None:
+            self._prioridades[chave_voo] = prioridade
+            tarefa = self._hass.async_create_task(
+                self._async_get_json_com_retentativas(
+                    url, params, chave, chave_voo, nocache, validar
+                )
+            )
+            self._em_voo[chave_voo] = tarefa
+            tarefa.add_done_callback(lambda _: self._encerrar_voo(chave_voo))
+        else:
+            self.metricas.incrementar("deduplicadas")
+            if prioridade < self._prioridades[chave_voo]:
+                self._prioridades[chave_voo] = prioridade
+                self.fila.elevar(chave_voo, prioridade)
+        return await asyncio.shield(tarefa)
+
+    def _encerrar_voo(self, chave_voo: str) -> None:
+        self._em_voo.pop(chave_voo, None)
+        self._prioridades.pop(chave_voo, None)
+
+    async def _async_get_json_com_retentativas(
+        self,
+        url: str,
+        params: dict[str, str],
+        chave: str,
+        chave_voo: str,
+        nocache: bool,
+        validar: Callable[[Any], None] | None,
+    ) -> Any:
+        """Repete erros transitórios com backoff exponencial e respeita o circuit breaker."""
+        host = URL(url).host or url
+        circuito = self._circuitos.get(host)
+        if circuito is None:
+            circuito = self._circuitos[host] = _CircuitBreaker(host)
+        try:
+            teste = circuito.verificar()
+        except CircuitoAbertoError:
+            self.metricas.incrementar("circuito_aberto")
+            raise
+
+        try:
+            for tentativa in range(1, _TENTATIVAS + 1):
+                try:
+                    data = await self._async_get_json_condicional(
+                        url, params, chave, chave_voo, nocache, validar
+                    )
+                except Exception as err:
+                    self.metricas.registrar_erro(err)
+                    if not _erro_transitorio(err):
+                        # Falhas de validação ou 4xx não indicam indisponibilidade do host.
+                        circuito.registrar_sucesso()
+                        raise
+                    if tentativa == _TENTATIVAS:
+                        circuito.registrar_falha()
+                        raise
+                    self.metricas.incrementar("retentativas")
+                    espera = random.uniform(
+                        0, min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (tentativa - 1))
+                    )
+                    _LOGGER.debug(
+                        "Tentativa %s/%s para %s falhou (%s); repetindo em %.1f s.",
+                        tentativa,
+                        _TENTATIVAS,
+                        url,
+                        err,
+                        espera,
+                    )
+                    await asyncio.sleep(espera)
+                else:
+                    circuito.registrar_sucesso()
+                    return data
+        finally:
+            # Um cancelamento não passa por registrar_*; sem isto o circuito
+            # ficaria aberto para sempre.
+            if teste:
+                circuito.encerrar_teste()
+
+    async def _async_get_json_condicional(
+        self,
+        url: str,
+        params: dict[str, str],
+        chave: str,
+        chave_voo: str,
+        nocache: bool,
+        validar: Callable[[Any], None] | None,
+    ) -> Any:
+        """Executa um GET condicional, reaproveitando o payload em cache em um 304.
+
+        A requisição só sai quando a fila concede uma vaga a ``chave_voo``.
+        Respostas de lote não passam pelo cache.
+        """
+        guardar = not URL(url).path.endswith(_CAMINHO_LOTE)
+        entrada = None if nocache or not guardar else await self._cache.async_get(chave)
+
+        headers: dict[str, str] = {}
+        if entrada is not None:
+            if entrada.get("etag"):
+                headers["If-None-Match"] = entrada["etag"]
+            if entrada.get("last_modified"):
+                headers["If-Modified-Since"] = entrada["last_modified"]
+
+        query = {**params, "nocache": "true"} if nocache else params
+        prioridade = self._prioridades.get(chave_voo, PRIORIDADE_AGENDADA)
+        async with self.fila.vaga(chave_voo, prioridade):
+            self.metricas.incrementar("requisicoes")
+            with self.metricas.medir("http"):
+                async with self._session.get(
+                    url, params=query, headers=headers, timeout=_TIMEOUT
+                ) as resp:
+                    if resp.status == 304 and entrada is not None:
+                        self.metricas.incrementar("cache_hits")
+                        return entrada["payload"]
+                    resp.raise_for_status()
+                    corpo = await resp.read()
+                    etag = resp.headers.get("ETag")
+                    last_modified = resp.headers.get("Last-Modified")
+
+        self.metricas.incrementar("cache_misses")
+        self.metricas.incrementar("bytes_recebidos", len(corpo))
+        with self.metricas.medir("json"):
+            data = json_loads(corpo)
+        if validar is not None:
+            validar(data)
+        if guardar and (etag or last_modified):
+            self._cache.async_set(
+                chave, {"etag": etag, "last_modified": last_modified, "payload": data}
+            )
+        return data
+
+
+def _validar_concessionarias(data: Any) -> None:
+    if not isinstance(data, list):
+        raise ValueError(f"Resposta inesperada: {data}")
+
+
+def _validar_tarifas(data: Any) -> None:
+    if not isinstance(data, dict) or "tarifa" not in data:
+        raise ValueError(f"Resposta inesperada da API: {data}")
+
+
+def _validar_lote(data: Any) -> None:
+    itens = data.get("tarifas") if isinstance(data, dict) else data
+    if not isinstance(itens, list):
+        raise ValueError(f"Resposta inesperada da API (lote): {data}")
+
+
+@callback
+def async_get_api(hass: HomeAssistant) -> CloudflareAPI:
+    """Retorna o cliente compartilhado da instância, que mantém o cache de respostas."""
+    api: CloudflareAPI | None = hass.data.get(DATA_API)
+    if api is None:
+        api = hass.data[DATA_API] = CloudflareAPI(hass, async_get_clientsession(hass))
+    return api
@@ -0,0 +1,61 @@
+"""Combinações de subgrupo e modalidade tarifária acompanhadas por uma entrada."""
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .const import (
+    CONF_COMBINACOES,
+    CONF_MODALIDADE,
+    MODALIDADE_BRANCA,
+    MODALIDADE_CONVENCIONAL,
+    SUBGRUPO_PADRAO,
+    SUBGRUPOS,
+)
+
+# A Tarifa Branca não é oferecida à subclasse baixa renda.
+_SUBGRUPOS_BRANCA = ("B1", "B2", "B3")
+
+
+@dataclass(frozen=True)
+class Combinacao:
+    """Subgrupo e modalidade; a modalidade só define quais sensores são criados."""
+
+    subgrupo: str
+    modalidade: str = MODALIDADE_CONVENCIONAL
+
+    @property
+    def chave(self) -> str:
+        return f"{self.subgrupo}:{self.modalidade}"
+
+    @property
+    def nome(self) -> str:
+        modalidade = "Branca" if self.modalidade == MODALIDADE_BRANCA else "Convencional"
+        return f"{SUBGRUPOS[self.subgrupo]} ({modalidade})"
+
+    @classmethod
+    def de_chave(cls, chave: str) -> "Combinacao":
+        subgrupo, _, modalidade = chave.partition(":")
+        return cls(subgrupo, modalidade or MODALIDADE_CONVENCIONAL)
+
+
+COMBINACOES_DISPONIVEIS = [
+    Combinacao(subgrupo, modalidade)
+    for subgrupo in SUBGRUPOS
+    for modalidade in (MODALIDADE_CONVENCIONAL, MODALIDADE_BRANCA)
+    if modalidade == MODALIDADE_CONVENCIONAL or subgrupo in _SUBGRUPOS_BRANCA
+]
+
+
+def combinacoes_da_entrada(opcoes: Mapping[str, Any]) -> list[Combinacao]:
+    """Combinações escolhidas nas opções; entradas antigas acompanham o B1 na modalidade salva."""
+    chaves = opcoes.get(CONF_COMBINACOES)
+    if not chaves:
+        return [
+            Combinacao(SUBGRUPO_PADRAO, opcoes.get(CONF_MODALIDADE, MODALIDADE_CONVENCIONAL))
+        ]
+    return [Combinacao.de_chave(chave) for chave in chaves]
+
+
+def subgrupos_da_entrada(opcoes: Mapping[str, Any]) -> list[str]:
+    """Subgrupos distintos das combinações, na ordem escolhida (cada um é buscado uma vez)."""
+    return list(dict.fromkeys(c.subgrupo for c in combinacoes_da_entrada(opcoes)))
@@ -4,49 +4,154 @@ import voluptuous as vol
 from typing import Any
 
 from homeassistant import config_entries
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers import selector
+import homeassistant.helpers.config_validation as cv
 
-from .const import DOMAIN, CONF_CONCESSIONARIA
-from .cloudflare_api import CloudflareAPI
+from .const import (
+    DOMAIN,
+    CONF_COMBINACOES,
+    CONF_CONCESSIONARIA,
+    CONF_DIA_LEITURA,
+    CONF_DIAS_RETENCAO,
+    CONF_GRANULARIDADE_CONTA,
+    CONF_INICIO_PONTA,
+    CONF_MEDIDOR,
+    CONF_PUSH,
+    CONF_SOMENTE_ALTERACOES,
+    DEFAULT_DIA_LEITURA,
+    DEFAULT_DIAS_RETENCAO,
+    DEFAULT_GRANULARIDADE_CONTA,
+    DEFAULT_INICIO_PONTA,
+)
+from .catalogo import CatalogoConcessionarias, async_get_catalogo
+from .combinacoes import COMBINACOES_DISPONIVEIS, combinacoes_da_entrada
 
 _LOGGER = logging.getLogger(__name__)
 
+CONF_BUSCA = "busca"
+
 
 class TarifasEnergiaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Lida com o fluxo de configuração para a integração."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> "TarifasEnergiaOptionsFlow":
+        """Retorna o fluxo de opções (subgrupos, modalidades e conta do mês)."""
+        return TarifasEnergiaOptionsFlow()
+
+    def __init__(self) -> None:
+        self._catalogo: CatalogoConcessionarias | None = None
+        self._resultados: list[str] = []
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Lida com o passo inicial do fluxo, iniciado pelo usuário."""
+        """Lida com o passo inicial do fluxo: busca pela concessionária."""
         errors: dict[str, str] = {}
 
+        if self._catalogo is None:
+            try:
+                self._catalogo = await async_get_catalogo(self.hass)
+            except Exception:
+                errors["base"] = "cannot_connect"
+                return self.async_show_form(step_id="user", errors=errors)
+
+        if not self._catalogo.nomes:
+            self._catalogo = None
+            errors["base"] = "no_concessionarias"
+            return self.async_show_form(step_id="user", errors=errors)
+
+        if user_input is not None:
+            self._resultados = self._catalogo.buscar(user_input.get(CONF_BUSCA, ""))
+            if self._resultados:
+                return await self.async_step_selecionar()
+            errors["base"] = "sem_resultados"
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema({vol.Optional(CONF_BUSCA, default=""): str}),
+            errors=errors,
+        )
+
+    async def async_step_selecionar(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Lista as concessionárias encontradas pela busca."""
         if user_input is not None:
             concessionaria_selecionada = user_input[CONF_CONCESSIONARIA]
             await self.async_set_unique_id(concessionaria_selecionada)
             self._abort_if_unique_id_configured()
-            return self.async_create_entry(title=concessionaria_selecionada, data=user_input)
+            return self.async_create_entry(
+                title=concessionaria_selecionada,
+                data={CONF_CONCESSIONARIA: concessionaria_selecionada},
+            )
 
-        session = async_get_clientsession(self.hass)
-        api = CloudflareAPI(self.hass, session)
+        data_schema = vol.Schema(
+            {vol.Required(CONF_CONCESSIONARIA): vol.In(self._resultados)}
+        )
+        return self.async_show_form(step_id="selecionar", data_schema=data_schema)
 
-        try:
-            lista_concessionarias = await api.async_fetch_concessionarias()
-        except Exception:
-            errors["base"] = "cannot_connect"
-            return self.async_show_form(step_id="user", errors=errors)
 
-        if not lista_concessionarias:
-            errors["base"] = "no_concessionarias"
-            return self.async_show_form(step_id="user", errors=errors)
+class TarifasEnergiaOptionsFlow(config_entries.OptionsFlow):
+    """Opções da entrada: subgrupos e modalidades, ponta, conta do mês, push e retenção."""
 
-        data_schema = vol.Schema(
-            {vol.Required(CONF_CONCESSIONARIA): vol.In(sorted(lista_concessionarias))}
-        )
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Lida com o único passo do fluxo de opções."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
 
-        return self.async_show_form(
-            step_id="user", data_schema=data_schema, errors=errors
+        opcoes = self.config_entry.options
+        data_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_COMBINACOES,
+                    default=[c.chave for c in combinacoes_da_entrada(opcoes)],
+                ): vol.All(
+                    cv.multi_select({c.chave: c.nome for c in COMBINACOES_DISPONIVEIS}),
+                    vol.Length(min=1),
+                ),
+                # A ponta (3 h) e os intermediários (1 h antes e depois) cabem no dia.
+                vol.Required(
+                    CONF_INICIO_PONTA,
+                    default=opcoes.get(CONF_INICIO_PONTA, DEFAULT_INICIO_PONTA),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+                vol.Optional(
+                    CONF_MEDIDOR,
+                    description={"suggested_value": opcoes.get(CONF_MEDIDOR)},
+                ): selector.EntitySelector(
+                    selector.EntitySelectorConfig(
+                        domain="sensor", device_class=SensorDeviceClass.ENERGY
+                    )
+                ),
+                # Limitado a 28 para que o dia de leitura exista em todos os meses.
+                vol.Required(
+                    CONF_DIA_LEITURA,
+                    default=opcoes.get(CONF_DIA_LEITURA, DEFAULT_DIA_LEITURA),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=28)),
+                vol.Required(
+                    CONF_GRANULARIDADE_CONTA,
+                    default=opcoes.get(CONF_GRANULARIDADE_CONTA, DEFAULT_GRANULARIDADE_CONTA),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.01, max=100)),
+                vol.Required(CONF_PUSH, default=opcoes.get(CONF_PUSH, False)): bool,
+                # 0 mantém todo o histórico sem reduzir os registros antigos.
+                vol.Required(
+                    CONF_DIAS_RETENCAO,
+                    default=opcoes.get(CONF_DIAS_RETENCAO, DEFAULT_DIAS_RETENCAO),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3650)),
+                vol.Required(
+                    CONF_SOMENTE_ALTERACOES,
+                    default=opcoes.get(CONF_SOMENTE_ALTERACOES, True),
+                ): bool,
+            }
         )
+        return self.async_show_form(step_id="init", data_schema=data_schema)
@@ -3,7 +3,50 @@
 DOMAIN = "tarifas_energia_brasil"
 
 CONF_CONCESSIONARIA = "concessionaria"
+CONF_MODALIDADE = "modalidade"
+CONF_COMBINACOES = "combinacoes"
+CONF_INICIO_PONTA = "inicio_ponta"
+CONF_MEDIDOR = "medidor"
+CONF_DIA_LEITURA = "dia_leitura"
+CONF_GRANULARIDADE_CONTA = "granularidade_conta"
+CONF_PUSH = "push"
+CONF_DIAS_RETENCAO = "dias_retencao"
+CONF_SOMENTE_ALTERACOES = "somente_alteracoes"
+
+MODALIDADE_CONVENCIONAL = "convencional"
+MODALIDADE_BRANCA = "branca"
+
+# Subgrupos tarifários que podem ser acompanhados; a chave é enviada à API e
+# gravada no histórico. Sem escolha explícita, a entrada acompanha o B1.
+SUBGRUPO_PADRAO = "B1"
+SUBGRUPOS = {
+    "B1": "B1 Residencial",
+    "B1_BAIXA_RENDA": "B1 Residencial Baixa Renda",
+    "B2": "B2 Rural",
+    "B3": "B3 Demais Classes",
+}
+
+# Hora de início do posto de ponta mais comum entre as distribuidoras.
+DEFAULT_INICIO_PONTA = 18
+
+DEFAULT_DIA_LEITURA = 1
+# Variação mínima (R$) da conta do mês para gravar um novo estado.
+DEFAULT_GRANULARIDADE_CONTA = 0.01
 
 CLOUDFLARE_BASE_URL = "https://ha-tarifas-energia-brasil-service.vodikus.workers.dev/api/v1"
 
+DATA_DATABASE = f"{DOMAIN}_database"
+DATA_HUB = f"{DOMAIN}_hub"
+DATA_API = f"{DOMAIN}_api"
+DATA_PERFIL = f"{DOMAIN}_perfil"
+DATA_CATALOGO = f"{DOMAIN}_catalogo"
+
 SERVICE_ATUALIZAR = "atualizar_tarifas"
+SERVICE_CONSULTAR = "consultar_tarifas"
+SERVICE_CALCULAR_CUSTO = "calcular_custo"
+SERVICE_IMPORTAR_HISTORICO = "importar_historico"
+SERVICE_COMPACTAR_HISTORICO = "compactar_historico"
+SERVICE_PERFILAR = "perfilar_atualizacao"
+
+# Registros mais antigos que isto são reduzidos a um por vigência na compactação.
+DEFAULT_DIAS_RETENCAO = 365
@@ -0,0 +1,102 @@
+"""Acumulador incremental da conta do ciclo de faturamento."""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from homeassistant.const import UnitOfEnergy
+from homeassistant.helpers.restore_state import ExtraStoredData
+from homeassistant.util import dt as dt_util
+
+# Fator de conversão das unidades aceitas para o medidor de energia.
+FATORES_KWH = {
+    UnitOfEnergy.WATT_HOUR: 0.001,
+    UnitOfEnergy.KILO_WATT_HOUR: 1.0,
+    UnitOfEnergy.MEGA_WATT_HOUR: 1000.0,
+}
+
+
+def inicio_ciclo(dia: date, dia_leitura: int) -> date:
+    """Primeiro dia do ciclo de faturamento que contém ``dia``."""
+    if dia.day >= dia_leitura:
+        return dia.replace(day=dia_leitura)
+    anterior = dia.replace(day=1) - timedelta(days=1)
+    return anterior.replace(day=dia_leitura)
+
+
+def fim_ciclo(inicio: date) -> date:
+    """Primeiro dia do ciclo seguinte (o dia de leitura se repete todo mês)."""
+    return (inicio.replace(day=1) + timedelta(days=32)).replace(day=inicio.day)
+
+
+def meia_noite_local(dia: date) -> datetime:
+    return datetime.combine(dia, time.min, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+
+@dataclass
+class AcumuladorConta(ExtraStoredData):
+    """Consumo e custo acumulados no ciclo, atualizados a cada leitura do medidor.
+
+    Cada incremento do medidor é valorado pelo preço vigente no momento da
+    leitura, de modo que trocas de tarifa ou bandeira no meio do ciclo só
+    afetam o consumo posterior a elas. Nada é recalculado a partir do histórico.
+    """
+
+    inicio_ciclo: date
+    consumo_kwh: float = 0.0
+    custo: float = 0.0
+    consumo_sem_tarifa_kwh: float = 0.0
+    ultima_leitura: float | None = None
+
+    def registrar(self, leitura_kwh: float, preco: float | None) -> float:
+        """Soma o consumo desde a leitura anterior e retorna o incremento (kWh)."""
+        anterior, self.ultima_leitura = self.ultima_leitura, leitura_kwh
+        if anterior is None:
+            return 0.0
+        delta = leitura_kwh - anterior
+        if delta < 0:
+            # Medidor zerado: a leitura atual é o consumo desde o reinício.
+            delta = leitura_kwh
+        self.consumo_kwh += delta
+        if preco is None:
+            self.consumo_sem_tarifa_kwh += delta
+        else:
+            self.custo += delta * preco
+        return delta
+
+    def novo_ciclo(self, inicio: date) -> None:
+        """Zera os totais mantendo a última leitura como referência."""
+        self.inicio_ciclo = inicio
+        self.consumo_kwh = 0.0
+        self.custo = 0.0
+        self.consumo_sem_tarifa_kwh = 0.0
+
+    def projecao(self, agora: datetime, preco: float | None) -> float | None:
+        """Custo previsto ao fim do ciclo mantendo o consumo médio e o preço atual."""
+        inicio = meia_noite_local(self.inicio_ciclo)
+        decorrido = (agora - inicio).total_seconds()
+        restante = (meia_noite_local(fim_ciclo(self.inicio_ciclo)) - agora).total_seconds()
+        if decorrido <= 0 or preco is None:
+            return None
+        return self.custo + self.consumo_kwh / decorrido * max(restante, 0.0) * preco
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "inicio_ciclo": self.inicio_ciclo.isoformat(),
+            "consumo_kwh": self.consumo_kwh,
+            "custo": self.custo,
+            "consumo_sem_tarifa_kwh": self.consumo_sem_tarifa_kwh,
+            "ultima_leitura": self.ultima_leitura,
+        }
+
+    @classmethod
+    def from_dict(cls, dados: dict[str, Any]) -> "AcumuladorConta | None":
+        try:
+            return cls(
+                inicio_ciclo=date.fromisoformat(dados["inicio_ciclo"]),
+                consumo_kwh=float(dados["consumo_kwh"]),
+                custo=float(dados["custo"]),
+                consumo_sem_tarifa_kwh=float(dados.get("consumo_sem_tarifa_kwh", 0.0)),
+                ultima_leitura=dados.get("ultima_leitura"),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
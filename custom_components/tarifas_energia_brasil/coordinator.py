@@ -1,19 +1,73 @@
 """DataUpdateCoordinator para a integração Tarifas de Energia Brasil."""
+import asyncio
 import logging
-from datetime import timedelta, date
+import time
+from datetime import datetime, date
 
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
 
+from .agendador import (
+    INTERVALO_ATRASADO,
+    INTERVALO_MAXIMO,
+    AgendadorAtualizacoes,
+    planejar_proxima_atualizacao,
+)
 from .cloudflare_api import CloudflareAPI
 from .database import DatabaseManager
-from .const import DOMAIN
+from .estatisticas import PublicadorEstatisticas
+from .const import DATA_HUB, DOMAIN, SUBGRUPO_PADRAO
+from .fila import PRIORIDADE_INTERATIVA
+from .metricas import Metricas
+from .push import AssinaturaEventos
+from .snapshot import TarifaSnapshot, para_data
+from .tarifa_branca import POSTOS
 
 _LOGGER = logging.getLogger(__name__)
 
+# Janela em que pedidos de várias entradas são agrupados em uma única requisição.
+_JANELA_LOTE = 0.5
 
-class TarifasEnergiaCoordinator(DataUpdateCoordinator):
-    """Coordenador que busca dados do Cloudflare Worker e mantém cache local."""
+
+def _campos_gravacao(data: TarifaSnapshot) -> dict:
+    """Campos do snapshot no formato gravado em historico_tarifas."""
+    return {
+        "bandeira_vigente": data.bandeira_vigente,
+        "tarifa_vigente": data.tarifa_vigente,
+        "dat_competencia": data.dat_inicio_vigencia,
+        "api_status": "online",
+        "tarifa_base_te": data.tarifa_base_te,
+        "tarifa_base_tusd": data.tarifa_base_tusd,
+        "dat_inicio_vigencia": data.dat_inicio_vigencia.isoformat(),
+        "dat_fim_vigencia": data.dat_fim_vigencia.isoformat() if data.dat_fim_vigencia else None,
+        "dat_competencia_bandeira": data.dat_competencia_bandeira,
+        "valor_adicional_bandeira": data.valor_adicional_bandeira,
+        **{f"tarifa_branca_{posto}": preco for posto, preco in (data.tarifa_branca or {}).items()},
+    }
+
+
+def _subgrupo_da_resposta(raw: dict) -> str | None:
+    """Subgrupo informado pelo worker na resposta, no topo ou dentro de ``tarifa``."""
+    tarifa = raw.get("tarifa")
+    return raw.get("subgrupo") or (tarifa.get("subgrupo") if isinstance(tarifa, dict) else None)
+
+
+def _precos_tarifa_branca(precos: dict | None) -> dict[str, float] | None:
+    """Retorna os preços (TE + TUSD) por posto da Tarifa Branca, se todos forem conhecidos."""
+    if not isinstance(precos, dict) or any(precos.get(posto) is None for posto in POSTOS):
+        return None
+    return {posto: float(precos[posto]) for posto in POSTOS}
+
+
+class TarifasEnergiaCoordinator(DataUpdateCoordinator[dict[str, TarifaSnapshot]]):
+    """Coordenador que busca dados do Cloudflare Worker e mantém cache local.
+
+    Os dados publicados associam cada subgrupo acompanhado pela entrada ao seu
+    snapshot; todos são buscados na mesma atualização e gravados em uma única
+    transação.
+    """
 
     def __init__(
         self,
@@ -21,111 +75,426 @@ class TarifasEnergiaCoordinator(DataUpdateCoordinator):
         api: CloudflareAPI,
         db: DatabaseManager,
         concessionaria: str,
+        hub: "TarifasEnergiaHubCoordinator",
+        push: bool = False,
+        subgrupos: list[str] | None = None,
     ):
         self.api = api
         self.db = db
         self.concessionaria = concessionaria
+        self.subgrupos = subgrupos or [SUBGRUPO_PADRAO]
+        self.hub = hub
+        self.push = push
         self._nocache_flag = False
+        self._nocache_em_lote = False
+        self.metricas = Metricas()
+        self.estatisticas = PublicadorEstatisticas(hass, db.indice, concessionaria)
+        # As atualizações periódicas são agendadas no hub, que as executa em lote.
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(days=1),
+            update_interval=None,
         )
 
-    async def _async_update_data(self) -> dict:
-        """Busca dados da API ou retorna do cache local em caso de falha."""
+    async def _async_update_data(self) -> dict[str, TarifaSnapshot]:
+        """Busca os subgrupos da entrada juntos; os que falharem vêm do cache local."""
         nocache = self._nocache_flag
+        inicio = time.perf_counter()
         try:
-            raw = await self.api.async_fetch_tarifas(self.concessionaria, nocache=nocache)
-            data = self._parse_api_response(raw)
-
-            dat_competencia = date.fromisoformat(data["dat_inicio_vigencia"])
-            await self.db.async_save_tarifa_snapshot(
-                concessionaria_nome=self.concessionaria,
-                bandeira_vigente=data["bandeira_vigente"],
-                tarifa_vigente=data["tarifa_vigente"],
-                dat_competencia=dat_competencia,
-                api_status="online",
-                tarifa_base_te=data.get("tarifa_base_te"),
-                tarifa_base_tusd=data.get("tarifa_base_tusd"),
-                dat_inicio_vigencia=data.get("dat_inicio_vigencia"),
-                dat_fim_vigencia=data.get("dat_fim_vigencia"),
-                dat_competencia_bandeira=data.get("dat_competencia_bandeira"),
-                valor_adicional_bandeira=data.get("valor_adicional_bandeira"),
-            )
+            with self.metricas.medir("busca"):
+                respostas = await asyncio.gather(
+                    *(self._async_buscar(subgrupo, nocache) for subgrupo in self.subgrupos),
+                    return_exceptions=True,
+                )
+            with self.metricas.medir("parse"):
+                novos, erros = self._parse_respostas(respostas)
+            if not novos:
+                raise next(iter(erros.values()))
 
-            _LOGGER.info(
-                "Atualização bem-sucedida para '%s'. Bandeira: '%s', Tarifa: %.5f%s.",
+            with self.metricas.medir("gravacao"):
+                await self.db.async_save_tarifa_snapshots(
+                    self.concessionaria,
+                    {subgrupo: _campos_gravacao(data) for subgrupo, data in novos.items()},
+                )
+            # Bandeira ou vigência nova muda o preço de horas que podem já ter
+            # sido publicadas (ou puladas): republica a partir do mês afetado.
+            for data in novos.values():
+                if self.db.indice.adicionar_bandeira(
+                    data.dat_competencia_bandeira,
+                    data.bandeira_vigente,
+                    data.valor_adicional_bandeira,
+                ):
+                    self.hub.async_republicar_estatisticas(data.dat_competencia_bandeira)
+            # O índice de consultas e custos cobre apenas o subgrupo padrão.
+            data = novos.get(SUBGRUPO_PADRAO)
+            if data is not None and self.db.indice.adicionar_tarifa(
                 self.concessionaria,
-                data["bandeira_vigente"],
-                data["tarifa_vigente"],
-                " (nocache)" if nocache else "",
-            )
-            self.update_interval = self._compute_update_interval(data.get("dat_fim_vigencia"))
-            return {**data, "api_status": "online"}
+                data.dat_inicio_vigencia,
+                data.dat_fim_vigencia,
+                data.tarifa_vigente,
+                data.tarifa_base_te,
+                data.tarifa_base_tusd,
+            ):
+                self.estatisticas.async_agendar(desde=data.dat_inicio_vigencia)
+            for subgrupo, data in novos.items():
+                _LOGGER.info(
+                    "Atualização bem-sucedida para '%s' (%s). Bandeira: '%s', Tarifa: %.5f%s.",
+                    self.concessionaria,
+                    subgrupo,
+                    data.bandeira_vigente,
+                    data.tarifa_vigente,
+                    " (nocache)" if nocache else "",
+                )
 
         except Exception as err:
+            self.metricas.registrar_erro(err)
             _LOGGER.error("Erro ao buscar dados da API: %s. Tentando cache local.", err)
-            cached = await self.db.async_get_latest_tarifa_snapshot(self.concessionaria)
-            if cached:
+            dados = await self._async_dados_do_cache(self.subgrupos, "offline")
+            if dados:
                 _LOGGER.warning("Retornando dados do cache local para '%s'.", self.concessionaria)
-                self.update_interval = self._compute_update_interval(cached.get("dat_fim_vigencia"))
-                dat_comp_bandeira = cached.get("dat_competencia_bandeira")
-                return {
-                    "bandeira_vigente": cached["bandeira_vigente"],
-                    "tarifa_vigente": cached["tarifa_vigente"],
-                    "tarifa_base_te": cached.get("tarifa_base_te"),
-                    "tarifa_base_tusd": cached.get("tarifa_base_tusd"),
-                    "dat_competencia_bandeira": (
-                        date.fromisoformat(dat_comp_bandeira) if dat_comp_bandeira else None
-                    ),
-                    "dat_competencia_tarifa": cached.get("dat_competencia"),
-                    "dat_inicio_vigencia": cached.get("dat_inicio_vigencia"),
-                    "dat_fim_vigencia": cached.get("dat_fim_vigencia"),
-                    "valor_adicional_bandeira": cached.get("valor_adicional_bandeira"),
-                    "api_status": "offline",
-                    "timestamp": cached["timestamp"],
-                }
+                self.metricas.incrementar("fallbacks_cache")
+                self._agendar_proxima_atualizacao(dados)
+                return dados
+            self._agendar_proxima_atualizacao(None)
             raise UpdateFailed(f"Sem dados disponíveis para '{self.concessionaria}': {err}") from err
 
-    def _compute_update_interval(self, dat_fim_vigencia_str: str | None) -> timedelta:
-        """Retorna intervalo de polling baseado em dat_fim_vigencia."""
-        if dat_fim_vigencia_str is None:
-            return timedelta(days=1)
-        try:
-            dat_fim = date.fromisoformat(dat_fim_vigencia_str[:10])
-            if dat_fim <= date.today():
-                return timedelta(days=1)
-            return timedelta(weeks=1)
-        except (ValueError, TypeError):
-            return timedelta(days=1)
-
-    async def async_force_refresh_nocache(self) -> None:
-        """Força uma atualização ignorando o cache do Cloudflare Worker."""
+        dados = dict(novos)
+        if erros:
+            for subgrupo, err in erros.items():
+                self.metricas.registrar_erro(err)
+                _LOGGER.error(
+                    "Erro ao buscar o subgrupo %s de '%s': %s. Tentando cache local.",
+                    subgrupo,
+                    self.concessionaria,
+                    err,
+                )
+            self.metricas.incrementar("fallbacks_cache")
+            dados.update(await self._async_dados_do_cache(list(erros), "offline"))
+        dados = {subgrupo: dados[subgrupo] for subgrupo in self.subgrupos if subgrupo in dados}
+        self._agendar_proxima_atualizacao(dados)
+        self.metricas.incrementar("atualizacoes")
+        self.metricas.registrar_tempo("atualizacao", time.perf_counter() - inicio)
+        return dados
+
+    async def _async_buscar(self, subgrupo: str, nocache: bool) -> dict:
+        if nocache and not self._nocache_em_lote:
+            return await self.api.async_fetch_tarifas(
+                self.concessionaria,
+                nocache=True,
+                subgrupo=subgrupo,
+                prioridade=PRIORIDADE_INTERATIVA,
+            )
+        return await self.hub.async_fetch_tarifa(self.concessionaria, subgrupo, nocache)
+
+    def _parse_respostas(
+        self, respostas: list[dict | BaseException]
+    ) -> tuple[dict[str, TarifaSnapshot], dict[str, BaseException]]:
+        """Separa os snapshots válidos dos erros, por subgrupo."""
+        novos: dict[str, TarifaSnapshot] = {}
+        erros: dict[str, BaseException] = {}
+        for subgrupo, resposta in zip(self.subgrupos, respostas):
+            if isinstance(resposta, BaseException):
+                erros[subgrupo] = resposta
+                continue
+            # Um worker que ignore o parâmetro devolveria o B1 no lugar do subgrupo
+            # pedido; sem a confirmação na resposta só o padrão é aceito.
+            recebido = _subgrupo_da_resposta(resposta)
+            if recebido != subgrupo and (recebido is not None or subgrupo != SUBGRUPO_PADRAO):
+                erros[subgrupo] = UpdateFailed(
+                    f"Resposta do worker para o subgrupo {subgrupo} veio como "
+                    f"{recebido or 'sem subgrupo'}; descartada."
+                )
+                continue
+            data = self._parse_api_response(resposta)
+            if data.dat_inicio_vigencia is None:
+                erros[subgrupo] = ValueError("Resposta da API sem dat_inicio_vigencia.")
+            else:
+                novos[subgrupo] = data
+        return novos, erros
+
+    async def async_carregar_cache(self) -> bool:
+        """Publica os últimos snapshots do banco local como dados iniciais (api_status 'cached').
+
+        Retorna False se ainda não houver snapshot de nenhum subgrupo da entrada.
+        """
+        dados = await self._async_dados_do_cache(self.subgrupos, "cached")
+        if not dados:
+            return False
+        self.async_set_updated_data(dados)
+        return True
+
+    async def _async_dados_do_cache(
+        self, subgrupos: list[str], api_status: str
+    ) -> dict[str, TarifaSnapshot]:
+        registros = await self.db.async_get_latest_tarifa_snapshots(self.concessionaria, subgrupos)
+        return {
+            subgrupo: self._dados_do_cache(cached, api_status)
+            for subgrupo, cached in registros.items()
+        }
+
+    @staticmethod
+    def _dados_do_cache(cached: dict, api_status: str) -> TarifaSnapshot:
+        """Converte um registro do banco local no snapshot publicado pelo coordinator."""
+        return TarifaSnapshot(
+            bandeira_vigente=cached["bandeira_vigente"],
+            tarifa_vigente=cached["tarifa_vigente"],
+            api_status=api_status,
+            timestamp=cached["timestamp"],
+            tarifa_base_te=cached.get("tarifa_base_te"),
+            tarifa_base_tusd=cached.get("tarifa_base_tusd"),
+            dat_competencia_bandeira=para_data(cached.get("dat_competencia_bandeira")),
+            dat_competencia_tarifa=para_data(cached.get("dat_competencia")),
+            dat_inicio_vigencia=para_data(cached.get("dat_inicio_vigencia")),
+            dat_fim_vigencia=para_data(cached.get("dat_fim_vigencia")),
+            valor_adicional_bandeira=cached.get("valor_adicional_bandeira"),
+            tarifa_branca=_precos_tarifa_branca(
+                {posto: cached.get(f"tarifa_branca_{posto}") for posto in POSTOS}
+            ),
+        )
+
+    def _agendar_proxima_atualizacao(self, dados: dict[str, TarifaSnapshot] | None) -> None:
+        """Agenda a próxima busca conforme o fim da vigência e a competência da bandeira.
+
+        Com vários subgrupos vale o horário mais próximo entre eles. Com a
+        assinatura de eventos ativa, as mudanças chegam por push e a busca
+        periódica fica apenas como garantia, a cada ``INTERVALO_MAXIMO``.
+        """
+        agora = dt_util.now()
+        if dados and self.push and self.hub.eventos.conectada:
+            proxima = agora + INTERVALO_MAXIMO
+        else:
+            proxima = min(
+                planejar_proxima_atualizacao(
+                    agora,
+                    data.dat_fim_vigencia if data else None,
+                    data.dat_competencia_bandeira if data else None,
+                )
+                for data in (list(dados.values()) if dados else [None])
+            )
+        self.hub.agendador.async_agendar(self.concessionaria, proxima)
+
+    def consultar_tarifa(self, momento: datetime | date) -> dict | None:
+        """Retorna tarifa e bandeira que valiam no instante informado, sem consultar o banco."""
+        return self.db.indice.consultar(self.concessionaria, momento)
+
+    async def async_force_refresh_nocache(self, em_lote: bool = False) -> None:
+        """Força uma atualização ignorando o cache do Cloudflare Worker.
+
+        Por padrão a requisição é individual e passa à frente das atualizações
+        agendadas na fila, pois vem de um botão ou serviço acionado pelo
+        usuário. Com ``em_lote`` ela entra no próximo lote do hub, junto com
+        as demais entradas afetadas pelo mesmo evento.
+        """
         self._nocache_flag = True
+        self._nocache_em_lote = em_lote
         try:
             await self.async_refresh()
         finally:
             self._nocache_flag = False
+            self._nocache_em_lote = False
 
     @staticmethod
-    def _parse_api_response(raw: dict) -> dict:
-        """Mapeia a resposta da API Cloudflare para o dict interno do coordinator."""
+    def _parse_api_response(raw: dict) -> TarifaSnapshot:
+        """Converte a resposta da API Cloudflare no snapshot publicado pelo coordinator."""
         bandeira = raw.get("bandeira_tarifaria", {})
         tarifa = raw.get("tarifa", {})
-        dat_comp_bandeira = bandeira.get("data_competencia")
-        return {
-            "bandeira_vigente": tarifa.get("bandeira_vigente") or bandeira.get("nome_bandeira"),
-            "tarifa_vigente": tarifa.get("tarifa_vigente"),
-            "tarifa_base_te": tarifa.get("tarifa_base_te"),
-            "tarifa_base_tusd": tarifa.get("tarifa_base_tusd"),
-            "dat_competencia_bandeira": (
-                date.fromisoformat(dat_comp_bandeira) if dat_comp_bandeira else None
-            ),
-            "dat_competencia_tarifa": tarifa.get("dat_inicio_vigencia"),
-            "dat_inicio_vigencia": tarifa.get("dat_inicio_vigencia"),
-            "dat_fim_vigencia": tarifa.get("dat_fim_vigencia"),
-            "valor_adicional_bandeira": bandeira.get("valor_adicional"),
-            "timestamp": tarifa.get("timestamp"),
-        }
+        dat_inicio_vigencia = para_data(tarifa.get("dat_inicio_vigencia"))
+        return TarifaSnapshot(
+            bandeira_vigente=tarifa.get("bandeira_vigente") or bandeira.get("nome_bandeira"),
+            tarifa_vigente=tarifa.get("tarifa_vigente"),
+            api_status="online",
+            timestamp=tarifa.get("timestamp"),
+            tarifa_base_te=tarifa.get("tarifa_base_te"),
+            tarifa_base_tusd=tarifa.get("tarifa_base_tusd"),
+            dat_competencia_bandeira=para_data(bandeira.get("data_competencia")),
+            dat_competencia_tarifa=dat_inicio_vigencia,
+            dat_inicio_vigencia=dat_inicio_vigencia,
+            dat_fim_vigencia=para_data(tarifa.get("dat_fim_vigencia")),
+            valor_adicional_bandeira=bandeira.get("valor_adicional"),
+            tarifa_branca=_precos_tarifa_branca(raw.get("tarifa_branca")),
+        )
+
+
+class TarifasEnergiaHubCoordinator:
+    """Coordenador central que busca as tarifas de todas as entradas em lote.
+
+    Os pedidos feitos pelos coordenadores de cada entrada dentro de uma janela
+    curta são agrupados em uma única chamada a ``async_fetch_tarifas_lote`` e
+    o resultado é distribuído a cada um deles. As próximas atualizações de
+    todas as entradas ficam em uma única fila (``AgendadorAtualizacoes``).
+    Entradas com push ativo compartilham uma única assinatura de eventos
+    (``AssinaturaEventos``), que dispara atualizações apenas das afetadas.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: CloudflareAPI):
+        self.hass = hass
+        self.api = api
+        self._coordinators: dict[str, TarifasEnergiaCoordinator] = {}
+        self._pendentes: dict[tuple[str, str, bool], asyncio.Future] = {}
+        self._cancelar_lote: CALLBACK_TYPE | None = None
+        self.agendador = AgendadorAtualizacoes(hass, self._async_atualizar_vencidos)
+        self.eventos = AssinaturaEventos(
+            hass,
+            api,
+            self._concessionarias_push,
+            self._async_tarifas_alteradas,
+            self._async_conexao_eventos_alterada,
+        )
+
+    @callback
+    def async_register(self, coordinator: TarifasEnergiaCoordinator) -> CALLBACK_TYPE:
+        """Registra o coordenador de uma entrada e retorna a função de remoção."""
+        self._coordinators[coordinator.concessionaria] = coordinator
+        if coordinator.push:
+            self.eventos.async_reiniciar()
+
+        @callback
+        def _unregister() -> None:
+            self._coordinators.pop(coordinator.concessionaria, None)
+            self.agendador.async_remover(coordinator.concessionaria)
+            if coordinator.push:
+                self.eventos.async_reiniciar()
+            if not self._coordinators:
+                self.agendador.async_parar()
+                if self._cancelar_lote is not None:
+                    self._cancelar_lote()
+                    self._cancelar_lote = None
+                # Sem o lote agendado, quem aguarda em async_fetch_tarifa ficaria preso.
+                pendentes, self._pendentes = self._pendentes, {}
+                for fut in pendentes.values():
+                    if not fut.done():
+                        fut.set_exception(
+                            UpdateFailed("Lote descartado: todas as entradas foram removidas.")
+                        )
+                        # As buscas que aguardavam podem ter sido canceladas com as
+                        # entradas; sem isso o asyncio registra o erro como não lido.
+                        fut.exception()
+                if self.hass.data.get(DATA_HUB) is self:
+                    self.hass.data.pop(DATA_HUB)
+
+        return _unregister
+
+    async def async_fetch_tarifa(
+        self, concessionaria: str, subgrupo: str = SUBGRUPO_PADRAO, nocache: bool = False
+    ) -> dict:
+        """Inclui a concessionária e o subgrupo no próximo lote e aguarda sua resposta.
+
+        Pedidos com ``nocache`` formam um lote à parte, enviado com nocache=true.
+        """
+        chave = (concessionaria, subgrupo, nocache)
+        fut = self._pendentes.get(chave)
+        if fut is None:
+            fut = self._pendentes[chave] = self.hass.loop.create_future()
+        if self._cancelar_lote is None:
+            self._cancelar_lote = async_call_later(self.hass, _JANELA_LOTE, self._async_executar_lote)
+        return await asyncio.shield(fut)
+
+    async def _async_executar_lote(self, _now: datetime) -> None:
+        self._cancelar_lote = None
+        pendentes, self._pendentes = self._pendentes, {}
+        if not pendentes:
+            return
+
+        # Uma requisição em lote por subgrupo e nocache, todas em paralelo.
+        lotes: dict[tuple[str, bool], dict[str, asyncio.Future]] = {}
+        for (nome, subgrupo, nocache), fut in pendentes.items():
+            lotes.setdefault((subgrupo, nocache), {})[nome] = fut
+        await asyncio.gather(
+            *(
+                self._async_executar_lote_subgrupo(subgrupo, nocache, futuros)
+                for (subgrupo, nocache), futuros in lotes.items()
+            )
+        )
+
+    async def _async_executar_lote_subgrupo(
+        self, subgrupo: str, nocache: bool, pendentes: dict[str, asyncio.Future]
+    ) -> None:
+        try:
+            resultados = await self.api.async_fetch_tarifas_lote(
+                list(pendentes), nocache=nocache, subgrupo=subgrupo
+            )
+        except Exception as err:
+            for fut in pendentes.values():
+                if not fut.done():
+                    fut.set_exception(err)
+            return
+
+        for nome, fut in pendentes.items():
+            if fut.done():
+                continue
+            raw = resultados.get(nome)
+            if raw is None:
+                fut.set_exception(
+                    ValueError(f"Concessionária '{nome}' ({subgrupo}) ausente na resposta em lote.")
+                )
+            else:
+                fut.set_result(raw)
+
+    @callback
+    def async_republicar_estatisticas(self, desde: date) -> None:
+        """Republica as estatísticas de todas as entradas a partir do mês de ``desde``.
+
+        A bandeira é a mesma para todas as concessionárias.
+        """
+        for coord in self._coordinators.values():
+            coord.estatisticas.async_agendar(desde=desde)
+
+    def _concessionarias_push(self) -> list[str]:
+        return [nome for nome, coord in self._coordinators.items() if coord.push]
+
+    @callback
+    def _async_tarifas_alteradas(self, concessionarias: list[str] | None) -> None:
+        """Atualiza, ignorando o cache do worker, as entradas afetadas por um evento.
+
+        As buscas entram juntas na janela do lote: um evento de bandeira, que
+        afeta todas as entradas, gera uma requisição por subgrupo, não por entrada.
+        """
+        coordinators = [
+            coord
+            for nome, coord in self._coordinators.items()
+            if coord.push and (concessionarias is None or nome in concessionarias)
+        ]
+        for coord in coordinators:
+            self.hass.async_create_task(
+                coord.async_force_refresh_nocache(em_lote=True),
+                f"{DOMAIN}_evento_{coord.concessionaria}",
+            )
+
+    @callback
+    def _async_conexao_eventos_alterada(self, conectada: bool, reconexao: bool) -> None:
+        """Reagenda as entradas com push: espaçadas se conectada, polling normal se não."""
+        nomes = self._concessionarias_push()
+        for nome in nomes:
+            coord = self._coordinators[nome]
+            if coord.data is not None:
+                coord._agendar_proxima_atualizacao(coord.data)
+        if reconexao and nomes:
+            # Eventos podem ter sido perdidos enquanto a conexão esteve fora.
+            self.hass.async_create_task(
+                self._async_atualizar_vencidos(nomes), f"{DOMAIN}_eventos_reconexao"
+            )
+
+    async def _async_atualizar_vencidos(self, concessionarias: list[str]) -> None:
+        """Atualiza as entradas cujo horário agendado chegou."""
+        coordinators = [
+            self._coordinators[nome] for nome in concessionarias if nome in self._coordinators
+        ]
+        await asyncio.gather(*(coord.async_refresh() for coord in coordinators))
+        # Garante que nenhuma entrada saia da fila caso a atualização falhe sem reagendar.
+        for coord in coordinators:
+            if (
+                coord.concessionaria in self._coordinators
+                and self.agendador.proxima(coord.concessionaria) is None
+            ):
+                self.agendador.async_agendar(
+                    coord.concessionaria, dt_util.now() + INTERVALO_ATRASADO
+                )
+
+
+def async_get_hub(hass: HomeAssistant, api: CloudflareAPI) -> TarifasEnergiaHubCoordinator:
+    """Retorna o hub compartilhado da instância, criando-o se necessário."""
+    hub: TarifasEnergiaHubCoordinator | None = hass.data.get(DATA_HUB)
+    if hub is None:
+        hub = hass.data[DATA_HUB] = TarifasEnergiaHubCoordinator(hass, api)
+    return hub
@@ -0,0 +1,188 @@
+"""Cálculo vetorizado do custo histórico de energia a partir das estatísticas do recorder."""
+import logging
+from datetime import date, datetime, time, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .indice import IndiceTarifas, VigenciaTarifa
+
+_LOGGER = logging.getLogger(__name__)
+
+# Tamanho de cada consulta ao recorder, para limitar a memória em históricos longos.
+_BLOCO_CONSULTA = timedelta(days=366)
+
+
+def _meia_noite_local(dia: date) -> float:
+    return datetime.combine(dia, time.min, tzinfo=dt_util.DEFAULT_TIME_ZONE).timestamp()
+
+
+def _primeiro_dia_mes_seguinte(dia: date) -> date:
+    return (dia.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def instante_local(valor: datetime) -> datetime:
+    """Atribui o fuso local a instantes sem fuso (como os recebidos pelos serviços)."""
+    if valor.tzinfo is None:
+        return valor.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return valor
+
+
+async def _async_consumo_horario(
+    hass: HomeAssistant, statistic_id: str, inicio: datetime, fim: datetime
+):
+    """Retorna (inícios das horas, kWh consumidos) como arrays NumPy."""
+    import numpy as np
+
+    from homeassistant.components.recorder import get_instance
+    from homeassistant.components.recorder.statistics import statistics_during_period
+
+    recorder = get_instance(hass)
+    inicios: list[float] = []
+    somas: list[float] = []
+    # Começa uma hora antes para obter a soma acumulada anterior à primeira hora.
+    bloco_inicio = inicio - timedelta(hours=1)
+    while bloco_inicio < fim:
+        bloco_fim = min(bloco_inicio + _BLOCO_CONSULTA, fim)
+        stats = await recorder.async_add_executor_job(
+            statistics_during_period,
+            hass,
+            bloco_inicio,
+            bloco_fim,
+            {statistic_id},
+            "hour",
+            None,
+            {"sum"},
+        )
+        for row in stats.get(statistic_id, ()):
+            if row.get("sum") is not None:
+                inicios.append(row["start"])
+                somas.append(row["sum"])
+        bloco_inicio = bloco_fim
+
+    horas = np.asarray(inicios, dtype=np.float64)
+    soma = np.asarray(somas, dtype=np.float64)
+    if horas.size < 2:
+        return np.empty(0), np.empty(0)
+    # Quedas na soma acumulada (ajustes/reinícios do medidor) não contam como consumo.
+    consumo = np.clip(np.diff(soma), 0.0, None)
+    return horas[1:], consumo
+
+
+def precos_por_hora(
+    vigencias: list[VigenciaTarifa], adicionais_bandeira: dict[date, float], horas
+):
+    """Calcula o preço (R$/kWh) de cada hora com buscas binárias vetorizadas.
+
+    Horas fora das vigências ou em meses sem bandeira conhecida ficam NaN.
+    """
+    import numpy as np
+
+    precos = np.full(horas.shape, np.nan)
+    if not vigencias or horas.size == 0:
+        return precos
+
+    inicios = np.array([_meia_noite_local(v.inicio) for v in vigencias])
+    fins = np.array(
+        [_meia_noite_local(v.fim + timedelta(days=1)) if v.fim else np.inf for v in vigencias]
+    )
+    base = np.array(
+        [
+            (v.tarifa_base_te + v.tarifa_base_tusd)
+            if v.tarifa_base_te is not None and v.tarifa_base_tusd is not None
+            else np.nan
+            for v in vigencias
+        ]
+    )
+    vigente = np.array([v.tarifa_vigente for v in vigencias], dtype=np.float64)
+
+    pos = np.searchsorted(inicios, horas, side="right") - 1
+    valida = pos >= 0
+    pos = np.where(valida, pos, 0)
+    valida &= horas < fins[pos]
+
+    # Sem TE/TUSD separados usa-se a tarifa vigente. Nos dois casos o valor
+    # não inclui a bandeira, cujo adicional é somado abaixo, como nos sensores.
+    tem_base = ~np.isnan(base[pos])
+    precos = np.where(valida, np.where(tem_base, base[pos], vigente[pos]), np.nan)
+
+    primeiro = dt_util.as_local(dt_util.utc_from_timestamp(horas[0])).date().replace(day=1)
+    ultimo = dt_util.as_local(dt_util.utc_from_timestamp(horas[-1])).date()
+    meses: list[date] = []
+    mes = primeiro
+    while mes <= ultimo:
+        meses.append(mes)
+        mes = _primeiro_dia_mes_seguinte(mes)
+    bordas = np.array([_meia_noite_local(m) for m in meses] + [_meia_noite_local(mes)])
+    adicionais = np.array([adicionais_bandeira.get(m, np.nan) for m in meses])
+    mes_idx = np.clip(np.searchsorted(bordas, horas, side="right") - 1, 0, len(meses) - 1)
+    return precos + adicionais[mes_idx]
+
+
+def _agregar(horas, consumo, custo, inicio_dia: date, fim_dia: date, mensal: bool) -> list[dict]:
+    """Soma consumo e custo por dia (ou mês) local usando np.bincount."""
+    import numpy as np
+
+    periodos: list[date] = []
+    dia = inicio_dia.replace(day=1) if mensal else inicio_dia
+    while dia <= fim_dia:
+        periodos.append(dia)
+        dia = _primeiro_dia_mes_seguinte(dia) if mensal else dia + timedelta(days=1)
+    bordas = np.array([_meia_noite_local(p) for p in periodos])
+
+    idx = np.clip(np.searchsorted(bordas, horas, side="right") - 1, 0, len(periodos) - 1)
+    consumo_total = np.bincount(idx, weights=consumo, minlength=len(periodos))
+    custo_total = np.bincount(idx, weights=custo, minlength=len(periodos))
+    chave = "mes" if mensal else "data"
+    return [
+        {
+            chave: periodo.strftime("%Y-%m") if mensal else periodo.isoformat(),
+            "consumo_kwh": round(float(kwh), 3),
+            "custo": round(float(valor), 2),
+        }
+        for periodo, kwh, valor in zip(periodos, consumo_total, custo_total)
+        if kwh > 0
+    ]
+
+
+async def async_calcular_custo(
+    hass: HomeAssistant,
+    indice: IndiceTarifas,
+    concessionaria: str,
+    statistic_id: str,
+    inicio: datetime,
+    fim: datetime,
+) -> dict:
+    """Recalcula o custo do consumo horário de ``statistic_id`` com o histórico de tarifas.
+
+    Consumo e preços de todas as horas são combinados em arrays NumPy, e os
+    totais por dia e por mês são obtidos com ``np.bincount``.
+    """
+    import numpy as np
+
+    horas, consumo = await _async_consumo_horario(hass, statistic_id, inicio, fim)
+    # Cópias feitas no event loop: o índice não é acessado pela thread do cálculo.
+    vigencias = indice.vigencias(concessionaria)
+    adicionais_bandeira = {b.competencia: b.valor_adicional for b in indice.bandeiras()}
+
+    def _calcular() -> dict:
+        precos = precos_por_hora(vigencias, adicionais_bandeira, horas)
+        sem_tarifa = np.isnan(precos)
+        custo = np.where(sem_tarifa, 0.0, consumo * np.nan_to_num(precos))
+        inicio_dia = dt_util.as_local(inicio).date()
+        fim_dia = dt_util.as_local(fim).date()
+        return {
+            "statistic_id": statistic_id,
+            "concessionaria": concessionaria,
+            "inicio": inicio.isoformat(),
+            "fim": fim.isoformat(),
+            "consumo_kwh": round(float(consumo.sum()), 3),
+            "custo_total": round(float(custo.sum()), 2),
+            "horas_sem_tarifa": int(np.count_nonzero(sem_tarifa & (consumo > 0))),
+            "dias": _agregar(horas, consumo, custo, inicio_dia, fim_dia, mensal=False),
+            "meses": _agregar(horas, consumo, custo, inicio_dia, fim_dia, mensal=True),
+        }
+
+    if horas.size == 0:
+        _LOGGER.warning("Nenhuma estatística horária encontrada para '%s'.", statistic_id)
+    return await hass.async_add_executor_job(_calcular)
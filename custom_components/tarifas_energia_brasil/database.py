@@ -1,153 +1,730 @@
-"""Módulo para gerenciar a interação com o banco de dados SQLite via SQLAlchemy."""
+"""Módulo para gerenciar a interação com o banco de dados SQLite."""
 import logging
-from datetime import date, datetime
-from sqlalchemy import create_engine, select, text
-from sqlalchemy.orm import Session, sessionmaker
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, Callable
 
-from .models import Base, Concessionaria, HistoricoTarifa
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    CONF_DIAS_RETENCAO,
+    CONF_SOMENTE_ALTERACOES,
+    DATA_DATABASE,
+    DEFAULT_DIAS_RETENCAO,
+    DOMAIN,
+    SUBGRUPO_PADRAO,
+)
+from .importacao import LinhaTarifa, ler_bandeiras_aneel, ler_tarifas_aneel
+from .indice import IndiceTarifas
+from .metricas import Metricas
+from .migracoes import aplicar_migracoes
 
 _LOGGER = logging.getLogger(__name__)
 
-_NEW_COLUMNS = [
-    ("tarifa_base_te", "REAL"),
-    ("tarifa_base_tusd", "REAL"),
-    ("dat_inicio_vigencia", "TEXT"),
-    ("dat_fim_vigencia", "TEXT"),
-    ("dat_competencia_bandeira", "TEXT"),
-    ("valor_adicional_bandeira", "REAL"),
-]
+DB_THREAD_NAME = "tarifas_energia_brasil_db"
+
+# Formato dos timestamps gravados em historico_tarifas.
+_SQLITE_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Perfil aplicado a cada conexão, pensado para cartões SD: com WAL e
+# synchronous=NORMAL um commit é uma escrita sequencial no -wal, sincronizada
+# apenas nos checkpoints. auto_vacuum só vale para arquivos novos; bancos
+# existentes são convertidos uma vez em _setup_database.
+_PRAGMAS_CONEXAO = (
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 33554432",
+    "PRAGMA cache_size = -8192",
+    "PRAGMA temp_store = MEMORY",
+)
+_AUTO_VACUUM_INCREMENTAL = 2
+
+# Intervalo da manutenção automática (compactação e incremental_vacuum).
+_INTERVALO_MANUTENCAO = timedelta(days=7)
+
+# Colunas que definem o "valor" de um registro: linhas consecutivas iguais
+# nestas colunas são redundantes.
+_COLUNAS_VALOR = (
+    "bandeira_vigente",
+    "tarifa_vigente",
+    "tarifa_base_te",
+    "tarifa_base_tusd",
+    "dat_inicio_vigencia",
+    "dat_fim_vigencia",
+    "dat_competencia_bandeira",
+    "valor_adicional_bandeira",
+    "tarifa_branca_ponta",
+    "tarifa_branca_intermediario",
+    "tarifa_branca_fora_ponta",
+)
+
+# Remove registros seguidos por outro com os mesmos valores; o último de cada
+# sequência (e portanto o registro mais recente) é sempre mantido.
+_REMOVER_REPETIDOS = f"""
+    DELETE FROM historico_tarifas WHERE id IN (
+        SELECT id FROM (
+            SELECT id, {" AND ".join(f"{col} IS LEAD({col}) OVER w" for col in _COLUNAS_VALOR)}
+                AS repetido
+            FROM historico_tarifas
+            WINDOW w AS (PARTITION BY concessionaria_id, subgrupo ORDER BY timestamp, id)
+        )
+        WHERE repetido
+    )
+    """
+
+# Registros anteriores a :limite ficam reduzidos ao mais recente de cada vigência.
+_REDUZIR_ANTIGOS = """
+    DELETE FROM historico_tarifas
+    WHERE timestamp < :limite
+      AND id NOT IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY concessionaria_id, subgrupo,
+                    COALESCE(dat_inicio_vigencia, dat_competencia)
+                ORDER BY timestamp DESC, id DESC
+            ) AS ordem
+            FROM historico_tarifas
+        )
+        WHERE ordem = 1
+      )
+    """
+
+# Insere o snapshot somente se não houver competência igual ou mais recente,
+# em uma única instrução (coberta por ix_historico_concessionaria_competencia).
+_INSERT_SE_MAIS_RECENTE = """
+    INSERT INTO historico_tarifas (
+        concessionaria_id, subgrupo, bandeira_vigente, tarifa_vigente, dat_competencia,
+        api_status, timestamp, tarifa_base_te, tarifa_base_tusd,
+        dat_inicio_vigencia, dat_fim_vigencia, dat_competencia_bandeira,
+        valor_adicional_bandeira, tarifa_branca_ponta, tarifa_branca_intermediario,
+        tarifa_branca_fora_ponta
+    )
+    SELECT
+        :concessionaria_id, :subgrupo, :bandeira_vigente, :tarifa_vigente, :dat_competencia,
+        :api_status, :timestamp, :tarifa_base_te, :tarifa_base_tusd,
+        :dat_inicio_vigencia, :dat_fim_vigencia, :dat_competencia_bandeira,
+        :valor_adicional_bandeira, :tarifa_branca_ponta, :tarifa_branca_intermediario,
+        :tarifa_branca_fora_ponta
+    WHERE NOT EXISTS (
+        SELECT 1 FROM historico_tarifas
+        WHERE concessionaria_id = :concessionaria_id
+          AND subgrupo = :subgrupo
+          AND dat_competencia >= :dat_competencia
+    )
+    """
+
+_UPSERT_BANDEIRA = """
+    INSERT INTO bandeiras_tarifarias (
+        data_geracao_conjunto, data_competencia, nome_bandeira, valor_adicional
+    )
+    VALUES (:data_geracao_conjunto, :data_competencia, :nome_bandeira, :valor_adicional)
+    ON CONFLICT(data_competencia) DO UPDATE SET
+        data_geracao_conjunto = excluded.data_geracao_conjunto,
+        nome_bandeira = excluded.nome_bandeira,
+        valor_adicional = excluded.valor_adicional
+    """
+
+# Inserção idempotente usada na importação em lote do histórico da ANEEL.
+_INSERT_HISTORICO_SE_AUSENTE = """
+    INSERT INTO historico_tarifas (
+        concessionaria_id, subgrupo, bandeira_vigente, tarifa_vigente, dat_competencia,
+        api_status, timestamp, tarifa_base_te, tarifa_base_tusd,
+        dat_inicio_vigencia, dat_fim_vigencia, dat_competencia_bandeira,
+        valor_adicional_bandeira
+    )
+    SELECT
+        :concessionaria_id, :subgrupo, :bandeira_vigente, :tarifa_vigente, :dat_competencia,
+        'importado', :timestamp, :tarifa_base_te, :tarifa_base_tusd,
+        :dat_inicio_vigencia, :dat_fim_vigencia, :dat_competencia_bandeira,
+        :valor_adicional_bandeira
+    WHERE NOT EXISTS (
+        SELECT 1 FROM historico_tarifas
+        WHERE concessionaria_id = :concessionaria_id
+          AND subgrupo = :subgrupo
+          AND dat_competencia = :dat_competencia
+    )
+    """
+
+_IMPORTACAO_LOTE = 5000
+
+_CHAVES_SNAPSHOT = (
+    "bandeira_vigente",
+    "tarifa_vigente",
+    "dat_competencia",
+    "api_status",
+    "timestamp",
+    "tarifa_base_te",
+    "tarifa_base_tusd",
+    "dat_inicio_vigencia",
+    "dat_fim_vigencia",
+    "dat_competencia_bandeira",
+    "valor_adicional_bandeira",
+    "tarifa_branca_ponta",
+    "tarifa_branca_intermediario",
+    "tarifa_branca_fora_ponta",
+)
+_COLUNAS_SNAPSHOT = ", ".join(_CHAVES_SNAPSHOT)
 
 
 class DatabaseManager:
-    """Gerencia a conexão e operações com o banco de dados."""
+    """Gerencia a conexão e operações com o banco de dados.
+
+    Todo acesso ao SQLite é executado em uma única thread dedicada, de modo que
+    leituras e escritas ficam serializadas e nenhuma chamada bloqueante ocorre
+    no event loop do Home Assistant.
+    """
 
     def __init__(self, hass, db_path):
-        self.db_url = f"sqlite:///{db_path}"
-        self.engine = create_engine(self.db_url, echo=False)
-        self.session_factory = sessionmaker(
-            self.engine, expire_on_commit=False, class_=Session
-        )
+        self.db_path = db_path
         self.hass = hass
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=DB_THREAD_NAME)
+        # Conexão única, aberta e usada somente pela thread de banco.
+        self._conn: sqlite3.Connection | None = None
+        # Caches acessados apenas pela thread de banco: id por nome e último
+        # registro por (nome, subgrupo).
+        self._concessionarias: dict[str, int] = {}
+        self._ultimos: dict[tuple[str, str], dict] = {}
+        self._bandeiras: dict[str, tuple[str, float]] = {}
+        # Índice de consulta por data; só é acessado no event loop.
+        self.indice = IndiceTarifas()
+        self.metricas = Metricas()
+
+    async def _async_run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Executa uma função síncrona de banco de dados na thread dedicada."""
+        return await self.hass.loop.run_in_executor(
+            self._executor, partial(self._executar_medido, func, *args, **kwargs)
+        )
+
+    async def async_executar_na_thread(self, func: Callable[[], Any]) -> Any:
+        """Executa ``func`` na thread de banco, fora das métricas (usado pelo perfilador)."""
+        return await self.hass.loop.run_in_executor(self._executor, func)
+
+    def _executar_medido(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Executa ``func`` registrando seu tempo na thread de banco e eventuais erros."""
+        inicio = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as err:
+            self.metricas.registrar_erro(err)
+            raise
+        finally:
+            self.metricas.registrar_tempo(func.__name__.lstrip("_"), time.perf_counter() - inicio)
 
     async def async_setup_database(self):
-        """Cria as tabelas e aplica migrações incrementais."""
-        Base.metadata.create_all(self.engine)
-        self._migrate_database()
+        """Aplica as migrações pendentes do schema e carrega o índice de consulta."""
+        await self._async_run(self._setup_database)
+        vigencias, bandeiras = await self._async_run(self._carregar_indice)
+        for vigencia in vigencias:
+            self.indice.adicionar_tarifa(*vigencia)
+        for bandeira in bandeiras:
+            self.indice.adicionar_bandeira(*bandeira)
         _LOGGER.info("Banco de dados verificado/criado com sucesso.")
 
-    def _migrate_database(self):
-        """Aplica migrações incrementais no schema existente."""
-        with self.engine.connect() as conn:
-            result = conn.execute(text("PRAGMA table_info(historico_tarifas)"))
-            colunas = {row[1] for row in result}
-
-            # Migração legada: dat_competencia
-            if "dat_competencia" not in colunas:
-                conn.execute(text("ALTER TABLE historico_tarifas ADD COLUMN dat_competencia DATE"))
-                conn.commit()
-                _LOGGER.info("Migração: coluna 'dat_competencia' adicionada.")
-
-            # Novas colunas da v1.2 (API Cloudflare)
-            for col_name, col_type in _NEW_COLUMNS:
-                if col_name not in colunas:
-                    conn.execute(text(f"ALTER TABLE historico_tarifas ADD COLUMN {col_name} {col_type}"))
-                    conn.commit()
-                    _LOGGER.info("Migração: coluna '%s' adicionada.", col_name)
-
-    async def async_save_tarifa_snapshot(
-        self,
-        concessionaria_nome: str,
-        bandeira_vigente: str,
-        tarifa_vigente: float,
-        dat_competencia: date,
-        api_status: str = "online",
-        tarifa_base_te: float | None = None,
-        tarifa_base_tusd: float | None = None,
-        dat_inicio_vigencia: str | None = None,
-        dat_fim_vigencia: str | None = None,
-        dat_competencia_bandeira: str | None = None,
-        valor_adicional_bandeira: float | None = None,
-    ) -> dict:
-        """Insere no histórico apenas se dat_competencia for mais recente que o último registro."""
-        with self.session_factory() as session:
-            stmt = select(Concessionaria).where(Concessionaria.nome == concessionaria_nome)
-            concessionaria = session.execute(stmt).scalar_one_or_none()
-
-            if not concessionaria:
-                concessionaria = Concessionaria(nome=concessionaria_nome)
-                session.add(concessionaria)
-                session.flush()
-
-            latest_stmt = (
-                select(HistoricoTarifa.dat_competencia)
-                .where(HistoricoTarifa.concessionaria_id == concessionaria.id)
-                .order_by(HistoricoTarifa.dat_competencia.desc())
-                .limit(1)
+    async def async_close(self) -> None:
+        """Fecha a conexão e encerra a thread de banco de dados."""
+        await self._async_run(self._fechar)
+        self._executor.shutdown(wait=False)
+
+    def _fechar(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _check_db_thread() -> None:
+        """Impede que operações de banco sejam executadas fora da thread dedicada."""
+        if not threading.current_thread().name.startswith(DB_THREAD_NAME):
+            raise RuntimeError(
+                "Operação de banco de dados executada fora da thread dedicada "
+                f"({threading.current_thread().name})."
             )
-            ultima_competencia = session.execute(latest_stmt).scalar_one_or_none()
 
-            if ultima_competencia is not None and dat_competencia <= ultima_competencia:
+    def _conexao(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread de banco, abrindo-a no primeiro uso."""
+        self._check_db_thread()
+        if self._conn is None:
+            # Sem transações implícitas: elas são abertas por _transacao.
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            for pragma in _PRAGMAS_CONEXAO:
+                conn.execute(pragma)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transacao(self) -> Iterator[sqlite3.Connection]:
+        """Executa o bloco em uma transação, desfeita em caso de erro."""
+        conn = self._conexao()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _setup_database(self):
+        conn = self._conexao()
+        versao = aplicar_migracoes(conn)
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _AUTO_VACUUM_INCREMENTAL:
+            # Bancos criados antes do perfil atual: um VACUUM completo, uma única vez.
+            _LOGGER.info("Convertendo o banco de dados para auto_vacuum incremental.")
+            conn.execute("VACUUM")
+        _LOGGER.debug("Schema do banco de dados na versão %s.", versao)
+
+    def _carregar_indice(self) -> tuple[list[tuple], list[tuple]]:
+        """Lê as vigências (do subgrupo padrão) e bandeiras usadas para montar o IndiceTarifas."""
+        conn = self._conexao()
+        vigencias = conn.execute(
+            "SELECT c.nome, h.dat_inicio_vigencia, h.dat_fim_vigencia, h.tarifa_vigente,"
+            " h.tarifa_base_te, h.tarifa_base_tusd"
+            " FROM historico_tarifas h JOIN concessionarias c ON c.id = h.concessionaria_id"
+            " WHERE h.dat_inicio_vigencia IS NOT NULL AND h.subgrupo = ?"
+            " ORDER BY h.concessionaria_id, h.dat_inicio_vigencia, h.timestamp",
+            (SUBGRUPO_PADRAO,),
+        ).fetchall()
+        bandeiras = conn.execute(
+            "SELECT data_competencia, nome_bandeira, valor_adicional"
+            " FROM bandeiras_tarifarias ORDER BY data_competencia"
+        ).fetchall()
+        self._bandeiras = {str(row[0])[:10]: (row[1], row[2]) for row in bandeiras}
+        return vigencias, bandeiras
+
+    async def async_save_tarifa_snapshots(
+        self, concessionaria_nome: str, snapshots: dict[str, dict[str, Any]]
+    ) -> dict[str, dict]:
+        """Grava os snapshots dos subgrupos de uma concessionária em uma única transação.
+
+        ``snapshots`` associa cada subgrupo aos campos do registro. Um registro
+        só é inserido se sua dat_competencia for mais recente que a última do
+        subgrupo; retorna o registro vigente de cada subgrupo.
+        """
+        return await self._async_run(self._save_tarifa_snapshots, concessionaria_nome, snapshots)
+
+    def _save_tarifa_snapshots(
+        self, concessionaria_nome: str, snapshots: dict[str, dict[str, Any]]
+    ) -> dict[str, dict]:
+        self._check_db_thread()
+        resultado: dict[str, dict] = {}
+        pendentes: list[tuple[str, dict]] = []
+        bandeiras: dict[str, tuple[str, float]] = {}
+        timestamp = datetime.now()
+
+        for subgrupo, campos in snapshots.items():
+            dat_competencia_bandeira = _iso(campos.get("dat_competencia_bandeira"))
+            if dat_competencia_bandeira and campos["bandeira_vigente"]:
+                bandeira = (
+                    campos["bandeira_vigente"],
+                    campos.get("valor_adicional_bandeira") or 0.0,
+                )
+                if self._bandeiras.get(dat_competencia_bandeira) != bandeira:
+                    bandeiras[dat_competencia_bandeira] = bandeira
+
+            dat_competencia = campos["dat_competencia"]
+            ultimo = self._ultimos.get((concessionaria_nome, subgrupo))
+            if (
+                ultimo is not None
+                and ultimo["dat_competencia"] is not None
+                and dat_competencia.isoformat() <= ultimo["dat_competencia"]
+            ):
                 _LOGGER.info(
-                    "Histórico não atualizado: competência %s já registrada para %s.",
+                    "Histórico não atualizado: competência %s já registrada para %s (%s).",
                     dat_competencia,
                     concessionaria_nome,
+                    subgrupo,
                 )
-                existing_stmt = (
-                    select(HistoricoTarifa)
-                    .where(HistoricoTarifa.concessionaria_id == concessionaria.id)
-                    .order_by(HistoricoTarifa.dat_competencia.desc())
-                    .limit(1)
+                self.metricas.incrementar("snapshots_em_memoria")
+                resultado[subgrupo] = ultimo
+                continue
+
+            params = {chave: campos.get(chave) for chave in _CHAVES_SNAPSHOT}
+            params.update(
+                subgrupo=subgrupo,
+                dat_competencia=dat_competencia.isoformat(),
+                api_status=campos.get("api_status", "online"),
+                timestamp=timestamp.strftime(_SQLITE_DATETIME_FORMAT),
+                dat_competencia_bandeira=dat_competencia_bandeira,
+            )
+            pendentes.append((subgrupo, params))
+
+        if not pendentes and not bandeiras:
+            return resultado
+
+        inseridos: dict[str, int] = {}
+        with self._transacao() as conn:
+            concessionaria_id = (
+                self._get_concessionaria_id(conn, concessionaria_nome) if pendentes else None
+            )
+            for subgrupo, params in pendentes:
+                params["concessionaria_id"] = concessionaria_id
+                inseridos[subgrupo] = conn.execute(_INSERT_SE_MAIS_RECENTE, params).rowcount
+            for data_competencia, bandeira in bandeiras.items():
+                self._salvar_bandeira(conn, data_competencia, bandeira)
+
+        for subgrupo, params in pendentes:
+            if inseridos[subgrupo]:
+                self.metricas.incrementar("snapshots_inseridos")
+                _LOGGER.info(
+                    "Novo registro inserido no histórico para %s (%s, competência: %s).",
+                    concessionaria_nome,
+                    subgrupo,
+                    params["dat_competencia"],
                 )
-                snapshot = session.execute(existing_stmt).scalar_one()
+                ultimo = {chave: params[chave] for chave in _CHAVES_SNAPSHOT}
+                ultimo["timestamp"] = timestamp.isoformat()
             else:
-                snapshot = HistoricoTarifa(
-                    concessionaria_id=concessionaria.id,
-                    bandeira_vigente=bandeira_vigente,
-                    tarifa_vigente=tarifa_vigente,
-                    dat_competencia=dat_competencia,
-                    api_status=api_status,
-                    timestamp=datetime.now(),
-                    tarifa_base_te=tarifa_base_te,
-                    tarifa_base_tusd=tarifa_base_tusd,
-                    dat_inicio_vigencia=dat_inicio_vigencia,
-                    dat_fim_vigencia=dat_fim_vigencia,
-                    dat_competencia_bandeira=dat_competencia_bandeira,
-                    valor_adicional_bandeira=valor_adicional_bandeira,
-                )
-                session.add(snapshot)
-                session.commit()
                 _LOGGER.info(
-                    "Novo registro inserido no histórico para %s (competência: %s).",
+                    "Histórico não atualizado: competência %s já registrada para %s (%s).",
+                    params["dat_competencia"],
                     concessionaria_nome,
-                    dat_competencia,
+                    subgrupo,
                 )
+                ultimo = self._get_ultima_competencia(params["concessionaria_id"], subgrupo)
+            self._ultimos[(concessionaria_nome, subgrupo)] = ultimo
+            resultado[subgrupo] = ultimo
+        return resultado
 
-            return self._snapshot_to_dict(snapshot)
-
-    async def async_get_latest_tarifa_snapshot(self, concessionaria_nome: str) -> dict | None:
-        """Retorna a leitura de tarifa mais recente para uma concessionária."""
-        with self.session_factory() as session:
-            stmt = (
-                select(HistoricoTarifa)
-                .join(Concessionaria, HistoricoTarifa.concessionaria_id == Concessionaria.id)
-                .where(Concessionaria.nome == concessionaria_nome)
-                .order_by(HistoricoTarifa.timestamp.desc())
-                .limit(1)
-            )
-            snapshot = session.execute(stmt).scalar_one_or_none()
-            return self._snapshot_to_dict(snapshot) if snapshot else None
+    def _salvar_bandeira(self, conn, data_competencia: str, bandeira: tuple[str, float]) -> None:
+        """Registra (ou corrige) a bandeira do mês em bandeiras_tarifarias."""
+        conn.execute(
+            _UPSERT_BANDEIRA,
+            {
+                "data_geracao_conjunto": date.today().isoformat(),
+                "data_competencia": data_competencia,
+                "nome_bandeira": bandeira[0],
+                "valor_adicional": bandeira[1],
+            },
+        )
+        self._bandeiras[data_competencia] = bandeira
 
-    def _snapshot_to_dict(self, snapshot: HistoricoTarifa) -> dict:
+    async def async_compactar_historico(
+        self, dias_retencao: int = DEFAULT_DIAS_RETENCAO, somente_alteracoes: bool = True
+    ) -> dict:
+        """Aplica a política de retenção ao histórico e devolve o espaço livre ao sistema.
+
+        Com ``somente_alteracoes`` são mantidos apenas os registros em que algum
+        valor mudou; registros com mais de ``dias_retencao`` dias (0 desativa)
+        ficam reduzidos a um por vigência. O registro mais recente de cada
+        concessionária e subgrupo nunca é removido.
+        """
+        return await self._async_run(self._compactar_historico, dias_retencao, somente_alteracoes)
+
+    def _compactar_historico(self, dias_retencao: int, somente_alteracoes: bool) -> dict:
+        self._check_db_thread()
+        repetidos = antigos = 0
+        with self._transacao() as conn:
+            if somente_alteracoes:
+                repetidos = conn.execute(_REMOVER_REPETIDOS).rowcount
+            if dias_retencao > 0:
+                limite = datetime.now() - timedelta(days=dias_retencao)
+                antigos = conn.execute(
+                    _REDUZIR_ANTIGOS, {"limite": limite.strftime(_SQLITE_DATETIME_FORMAT)}
+                ).rowcount
+        conn = self._conexao()
+        paginas_livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        _LOGGER.info(
+            "Histórico compactado: %s registros repetidos e %s antigos removidos, %s páginas liberadas.",
+            repetidos,
+            antigos,
+            paginas_livres,
+        )
         return {
-            "bandeira_vigente": snapshot.bandeira_vigente,
-            "tarifa_vigente": snapshot.tarifa_vigente,
-            "dat_competencia": snapshot.dat_competencia.isoformat() if snapshot.dat_competencia else None,
-            "api_status": snapshot.api_status,
-            "timestamp": snapshot.timestamp.isoformat(),
-            "tarifa_base_te": snapshot.tarifa_base_te,
-            "tarifa_base_tusd": snapshot.tarifa_base_tusd,
-            "dat_inicio_vigencia": snapshot.dat_inicio_vigencia,
-            "dat_fim_vigencia": snapshot.dat_fim_vigencia,
-            "dat_competencia_bandeira": snapshot.dat_competencia_bandeira,
-            "valor_adicional_bandeira": snapshot.valor_adicional_bandeira,
+            "registros_repetidos": repetidos,
+            "registros_antigos": antigos,
+            "paginas_liberadas": paginas_livres,
         }
+
+    async def async_importar_historico(
+        self, caminho_tarifas: str | None, caminho_bandeiras: str | None
+    ) -> dict:
+        """Importa os CSVs de dados abertos da ANEEL para o histórico local.
+
+        Os arquivos são lidos linha a linha e gravados com ``executemany`` em
+        transações de ``_IMPORTACAO_LOTE`` linhas; linhas já existentes são
+        ignoradas, então reimportar o mesmo arquivo não duplica registros.
+        """
+        resultado = await self._async_run(
+            self._importar_historico, caminho_tarifas, caminho_bandeiras
+        )
+        vigencias, bandeiras = await self._async_run(self._carregar_indice)
+        for vigencia in vigencias:
+            self.indice.adicionar_tarifa(*vigencia)
+        for bandeira in bandeiras:
+            self.indice.adicionar_bandeira(*bandeira)
+        return resultado
+
+    def _importar_historico(
+        self, caminho_tarifas: str | None, caminho_bandeiras: str | None
+    ) -> dict:
+        self._check_db_thread()
+        bandeiras_importadas = 0
+        if caminho_bandeiras:
+            lote: list[dict] = []
+            for linha in ler_bandeiras_aneel(caminho_bandeiras):
+                lote.append(
+                    {
+                        "data_geracao_conjunto": linha.data_geracao_conjunto.isoformat(),
+                        "data_competencia": linha.data_competencia.isoformat(),
+                        "nome_bandeira": linha.nome_bandeira,
+                        "valor_adicional": linha.valor_adicional,
+                    }
+                )
+                if len(lote) >= _IMPORTACAO_LOTE:
+                    bandeiras_importadas += self._gravar_lote(_UPSERT_BANDEIRA, lote)
+            bandeiras_importadas += self._gravar_lote(_UPSERT_BANDEIRA, lote)
+            self._bandeiras = {
+                str(row[0])[:10]: (row[1], row[2])
+                for row in self._conexao().execute(
+                    "SELECT data_competencia, nome_bandeira, valor_adicional FROM bandeiras_tarifarias"
+                )
+            }
+
+        tarifas_lidas = tarifas_inseridas = 0
+        if caminho_tarifas:
+            lote = []
+            for linha in ler_tarifas_aneel(caminho_tarifas):
+                tarifas_lidas += 1
+                lote.append(self._linha_tarifa_para_params(linha))
+                if len(lote) >= _IMPORTACAO_LOTE:
+                    tarifas_inseridas += self._gravar_lote(_INSERT_HISTORICO_SE_AUSENTE, lote)
+            tarifas_inseridas += self._gravar_lote(_INSERT_HISTORICO_SE_AUSENTE, lote)
+            # O último registro por concessionária pode ter mudado.
+            self._ultimos.clear()
+
+        _LOGGER.info(
+            "Importação concluída: %s bandeiras, %s de %s tarifas inseridas.",
+            bandeiras_importadas,
+            tarifas_inseridas,
+            tarifas_lidas,
+        )
+        return {
+            "bandeiras": bandeiras_importadas,
+            "tarifas_lidas": tarifas_lidas,
+            "tarifas_inseridas": tarifas_inseridas,
+        }
+
+    def _linha_tarifa_para_params(self, linha: LinhaTarifa) -> dict:
+        competencia = linha.dat_inicio_vigencia.replace(day=1).isoformat()
+        nome_bandeira, adicional = self._bandeiras.get(competencia, ("", None))
+        return {
+            "concessionaria_nome": linha.concessionaria,
+            "subgrupo": SUBGRUPO_PADRAO,
+            "bandeira_vigente": nome_bandeira,
+            "tarifa_vigente": linha.tarifa_base_te + linha.tarifa_base_tusd,
+            "dat_competencia": linha.dat_inicio_vigencia.isoformat(),
+            "timestamp": datetime.combine(linha.dat_inicio_vigencia, datetime.min.time()).strftime(
+                _SQLITE_DATETIME_FORMAT
+            ),
+            "tarifa_base_te": linha.tarifa_base_te,
+            "tarifa_base_tusd": linha.tarifa_base_tusd,
+            "dat_inicio_vigencia": linha.dat_inicio_vigencia.isoformat(),
+            "dat_fim_vigencia": linha.dat_fim_vigencia.isoformat() if linha.dat_fim_vigencia else None,
+            "dat_competencia_bandeira": competencia if nome_bandeira else None,
+            "valor_adicional_bandeira": adicional,
+        }
+
+    def _gravar_lote(self, stmt, lote: list[dict]) -> int:
+        """Grava e esvazia o lote em uma única transação; retorna as linhas afetadas."""
+        if not lote:
+            return 0
+        with self._transacao() as conn:
+            for params in lote:
+                if "concessionaria_nome" in params:
+                    params["concessionaria_id"] = self._get_concessionaria_id(
+                        conn, params.pop("concessionaria_nome")
+                    )
+            afetadas = conn.executemany(stmt, lote).rowcount
+        lote.clear()
+        return max(afetadas, 0)
+
+    def _get_concessionaria_id(self, conn, concessionaria_nome: str) -> int:
+        """Retorna o id da concessionária, inserindo-a se necessário (com cache em memória)."""
+        concessionaria_id = self._concessionarias.get(concessionaria_nome)
+        if concessionaria_id is None:
+            conn.execute(
+                "INSERT INTO concessionarias (nome) VALUES (:nome) ON CONFLICT(nome) DO NOTHING",
+                {"nome": concessionaria_nome},
+            )
+            concessionaria_id = conn.execute(
+                "SELECT id FROM concessionarias WHERE nome = :nome",
+                {"nome": concessionaria_nome},
+            ).fetchone()[0]
+            self._concessionarias[concessionaria_nome] = concessionaria_id
+        return concessionaria_id
+
+    def _get_ultima_competencia(self, concessionaria_id: int, subgrupo: str) -> dict:
+        """Retorna o registro de competência mais recente de uma concessionária e subgrupo."""
+        row = self._conexao().execute(
+            f"SELECT {_COLUNAS_SNAPSHOT} FROM historico_tarifas"
+            " WHERE concessionaria_id = ? AND subgrupo = ?"
+            " ORDER BY dat_competencia DESC LIMIT 1",
+            (concessionaria_id, subgrupo),
+        ).fetchone()
+        return _snapshot_to_dict(row)
+
+    async def async_get_catalogo(self) -> tuple[list[str], datetime | None]:
+        """Retorna o catálogo de concessionárias salvo e o momento da última atualização."""
+        return await self._async_run(self._get_catalogo)
+
+    def _get_catalogo(self) -> tuple[list[str], datetime | None]:
+        rows = self._conexao().execute(
+            "SELECT nome, atualizado_em FROM catalogo_concessionarias"
+        ).fetchall()
+        if not rows:
+            return [], None
+        return [row[0] for row in rows], datetime.fromisoformat(min(row[1] for row in rows))
+
+    async def async_salvar_catalogo(self, nomes: list[str], atualizado_em: datetime) -> None:
+        """Substitui o catálogo de concessionárias salvo."""
+        await self._async_run(self._salvar_catalogo, nomes, atualizado_em)
+
+    def _salvar_catalogo(self, nomes: list[str], atualizado_em: datetime) -> None:
+        with self._transacao() as conn:
+            conn.execute("DELETE FROM catalogo_concessionarias")
+            conn.executemany(
+                "INSERT OR IGNORE INTO catalogo_concessionarias (nome, atualizado_em) VALUES (?, ?)",
+                [(nome, atualizado_em.isoformat()) for nome in nomes],
+            )
+
+    async def async_get_latest_tarifa_snapshots(
+        self, concessionaria_nome: str, subgrupos: list[str]
+    ) -> dict[str, dict]:
+        """Retorna a leitura de tarifa mais recente de cada subgrupo que tiver histórico."""
+        return await self._async_run(
+            self._get_latest_tarifa_snapshots, concessionaria_nome, subgrupos
+        )
+
+    def _get_latest_tarifa_snapshots(
+        self, concessionaria_nome: str, subgrupos: list[str]
+    ) -> dict[str, dict]:
+        conn = self._conexao()
+        snapshots: dict[str, dict] = {}
+        for subgrupo in subgrupos:
+            row = conn.execute(
+                f"SELECT {_COLUNAS_SNAPSHOT} FROM historico_tarifas"
+                " WHERE concessionaria_id = (SELECT id FROM concessionarias WHERE nome = ?)"
+                " AND subgrupo = ? ORDER BY timestamp DESC LIMIT 1",
+                (concessionaria_nome, subgrupo),
+            ).fetchone()
+            if row:
+                snapshots[subgrupo] = _snapshot_to_dict(row)
+        return snapshots
+
+
+class _SharedDatabase:
+    """DatabaseManager compartilhado entre as entradas, com contagem de referências."""
+
+    def __init__(self, manager: DatabaseManager):
+        self.manager = manager
+        self.refs = 0
+        self._setup_task = None
+        self._cancelar_manutencao: CALLBACK_TYPE | None = None
+
+    async def async_ready(self) -> None:
+        """Garante que o schema foi criado e migrado uma única vez."""
+        if self._setup_task is None:
+            self._setup_task = self.manager.hass.async_create_task(
+                self.manager.async_setup_database()
+            )
+        try:
+            await self._setup_task
+        except Exception:
+            self._setup_task = None
+            raise
+        if self._cancelar_manutencao is None:
+            self._cancelar_manutencao = async_track_time_interval(
+                self.manager.hass, self._async_manutencao, _INTERVALO_MANUTENCAO
+            )
+
+    async def _async_manutencao(self, _now: datetime) -> None:
+        try:
+            await self.manager.async_compactar_historico(*politica_retencao(self.manager.hass))
+        except Exception:
+            _LOGGER.exception("Falha na manutenção periódica do banco de dados.")
+
+    def cancelar_manutencao(self) -> None:
+        """Cancela a manutenção periódica agendada."""
+        if self._cancelar_manutencao is not None:
+            self._cancelar_manutencao()
+            self._cancelar_manutencao = None
+
+
+async def async_acquire_database(hass: HomeAssistant) -> DatabaseManager:
+    """Retorna o DatabaseManager compartilhado da instância, criando-o se necessário.
+
+    Cada chamada deve ser pareada com ``async_release_database``; a conexão é
+    fechada quando a última referência é liberada.
+    """
+    shared: _SharedDatabase | None = hass.data.get(DATA_DATABASE)
+    if shared is None:
+        db_path = hass.config.path(f"{DOMAIN}.sqlite")
+        shared = hass.data[DATA_DATABASE] = _SharedDatabase(DatabaseManager(hass, db_path))
+
+    shared.refs += 1
+    try:
+        await shared.async_ready()
+    except Exception:
+        await async_release_database(hass)
+        raise
+    return shared.manager
+
+
+def politica_retencao(hass: HomeAssistant) -> tuple[int, bool]:
+    """Retenção configurada nas entradas, como (dias_retencao, somente_alteracoes).
+
+    O banco é compartilhado, então vale a política mais conservadora: o maior
+    prazo (0, que mantém tudo, prevalece) e a remoção de repetidos só se todas
+    as entradas a permitirem.
+    """
+    entradas = hass.config_entries.async_entries(DOMAIN)
+    if not entradas:
+        return DEFAULT_DIAS_RETENCAO, True
+    dias = [entrada.options.get(CONF_DIAS_RETENCAO, DEFAULT_DIAS_RETENCAO) for entrada in entradas]
+    somente_alteracoes = all(
+        entrada.options.get(CONF_SOMENTE_ALTERACOES, True) for entrada in entradas
+    )
+    return (0 if 0 in dias else max(dias)), somente_alteracoes
+
+
+@callback
+def async_get_database(hass: HomeAssistant) -> DatabaseManager | None:
+    """Retorna o DatabaseManager compartilhado, se alguma entrada o mantiver aberto."""
+    shared: _SharedDatabase | None = hass.data.get(DATA_DATABASE)
+    return shared.manager if shared is not None else None
+
+
+async def async_release_database(hass: HomeAssistant) -> None:
+    """Libera uma referência ao DatabaseManager compartilhado."""
+    shared: _SharedDatabase | None = hass.data.get(DATA_DATABASE)
+    if shared is None:
+        return
+    shared.refs -= 1
+    if shared.refs <= 0:
+        hass.data.pop(DATA_DATABASE)
+        shared.cancelar_manutencao()
+        await shared.manager.async_close()
+
+
+def _snapshot_to_dict(row: tuple) -> dict:
+    """Converte uma linha com as colunas de _COLUNAS_SNAPSHOT no dict de snapshot."""
+    snapshot = dict(zip(_CHAVES_SNAPSHOT, row))
+    if snapshot["dat_competencia"] is not None:
+        snapshot["dat_competencia"] = str(snapshot["dat_competencia"])[:10]
+    snapshot["timestamp"] = datetime.fromisoformat(snapshot["timestamp"]).isoformat()
+    return snapshot
+
+
+def _iso(valor: date | str | None) -> str | None:
+    """Normaliza datas recebidas como date ou string para o formato ISO."""
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
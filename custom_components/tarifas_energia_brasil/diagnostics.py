@@ -0,0 +1,35 @@
+"""Diagnóstico da integração Tarifas de Energia Brasil."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import TarifasEnergiaCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Retorna dados, agenda e métricas de desempenho da entrada."""
+    coordinator: TarifasEnergiaCoordinator = hass.data[DOMAIN][entry.entry_id]
+    proxima = coordinator.hub.agendador.proxima(coordinator.concessionaria)
+    return {
+        "entry": {"title": entry.title, "data": dict(entry.data)},
+        "dados": {
+            subgrupo: snapshot.como_dict()
+            for subgrupo, snapshot in (coordinator.data or {}).items()
+        },
+        "ultima_atualizacao_ok": coordinator.last_update_success,
+        "proxima_atualizacao": proxima.isoformat() if proxima else None,
+        "push": {
+            "ativo": coordinator.push,
+            "conectado": coordinator.hub.eventos.conectada,
+        },
+        "fila": coordinator.api.fila.como_dict(),
+        "metricas": {
+            "coordinator": coordinator.metricas.como_dict(),
+            "api": coordinator.api.metricas.como_dict(),
+            "banco_de_dados": coordinator.db.metricas.como_dict(),
+        },
+    }
@@ -0,0 +1,152 @@
+"""Publicação do preço horário como estatística externa do recorder."""
+import asyncio
+import logging
+import math
+from datetime import date, timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN
+from .conta import meia_noite_local
+from .custo import precos_por_hora
+from .indice import IndiceTarifas
+
+_LOGGER = logging.getLogger(__name__)
+
+# Horas enviadas ao recorder por chamada; o bloco seguinte só é enfileirado
+# depois que o recorder grava o anterior.
+_BLOCO_HORAS = 24 * 90
+_HORA = 3600.0
+
+# Intervalo entre publicações incrementais.
+INTERVALO_PUBLICACAO = timedelta(hours=1)
+
+
+def statistic_id_tarifa(concessionaria: str) -> str:
+    return f"{DOMAIN}:tarifa_{slugify(concessionaria)}"
+
+
+class PublicadorEstatisticas:
+    """Publica o preço (R$/kWh) de cada hora do histórico de uma concessionária.
+
+    Os preços vêm do índice em memória, calculados em blocos com NumPy, e só
+    as horas posteriores ao último ponto já gravado são enviadas, de modo que
+    a primeira publicação pode cobrir anos de histórico e as seguintes
+    enviam apenas as horas novas. Horas sem preço (fora das vigências ou em
+    meses sem bandeira conhecida) não são publicadas; quando uma bandeira ou
+    vigência chega depois, ``async_agendar(desde=...)`` republica a partir do
+    mês afetado.
+    """
+
+    def __init__(self, hass: HomeAssistant, indice: IndiceTarifas, concessionaria: str):
+        self._hass = hass
+        self._indice = indice
+        self.concessionaria = concessionaria
+        self.statistic_id = statistic_id_tarifa(concessionaria)
+        self._tarefa: asyncio.Task | None = None
+        self._completo = False
+        self._desde: float | None = None
+
+    @callback
+    def async_agendar(self, completo: bool = False, desde: date | None = None) -> None:
+        """Publica em segundo plano.
+
+        ``completo`` republica todo o histórico; ``desde``, a partir do início
+        do mês dessa data.
+        """
+        self._completo |= completo
+        if desde is not None:
+            inicio_mes = meia_noite_local(desde.replace(day=1)).timestamp()
+            self._desde = inicio_mes if self._desde is None else min(self._desde, inicio_mes)
+        if self._tarefa is not None or "recorder" not in self._hass.config.components:
+            return
+        self._tarefa = self._hass.async_create_background_task(
+            self._async_publicar(), f"{DOMAIN}_estatisticas_{self.statistic_id}"
+        )
+        self._tarefa.add_done_callback(self._publicacao_concluida)
+
+    @callback
+    def async_cancelar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+
+    def _publicacao_concluida(self, tarefa: asyncio.Task) -> None:
+        self._tarefa = None
+        if tarefa.cancelled():
+            return
+        if tarefa.exception() is not None:
+            _LOGGER.warning(
+                "Falha ao publicar estatísticas de '%s': %s",
+                self.concessionaria,
+                tarefa.exception(),
+            )
+        elif self._completo or self._desde is not None:
+            self.async_agendar()
+
+    async def _async_publicar(self) -> int:
+        import numpy as np
+
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+            get_last_statistics,
+        )
+
+        completo, self._completo = self._completo, False
+        desde, self._desde = self._desde, None
+        # Cópias feitas no event loop: o índice não é acessado pela thread do cálculo.
+        vigencias = self._indice.vigencias(self.concessionaria)
+        adicionais_bandeira = {b.competencia: b.valor_adicional for b in self._indice.bandeiras()}
+        if not vigencias:
+            return 0
+
+        recorder = get_instance(self._hass)
+        primeira_hora = meia_noite_local(vigencias[0].inicio).timestamp()
+        primeira_hora -= primeira_hora % _HORA
+        inicio = primeira_hora
+        if not completo:
+            ultimo = await recorder.async_add_executor_job(
+                get_last_statistics, self._hass, 1, self.statistic_id, True, {"mean"}
+            )
+            if linhas := ultimo.get(self.statistic_id):
+                inicio = max(inicio, linhas[0]["start"] + _HORA)
+            if desde is not None:
+                inicio = max(primeira_hora, min(inicio, desde))
+        # Apenas horas completas.
+        fim = dt_util.utcnow().replace(minute=0, second=0, microsecond=0).timestamp()
+
+        metadata = StatisticMetaData(
+            has_mean=True,
+            has_sum=False,
+            name=f"Tarifa {self.concessionaria}",
+            source=DOMAIN,
+            statistic_id=self.statistic_id,
+            unit_of_measurement="R$/kWh",
+        )
+        publicadas = 0
+        while inicio < fim:
+            bloco_fim = min(inicio + _BLOCO_HORAS * _HORA, fim)
+            horas = np.arange(inicio, bloco_fim, _HORA)
+            precos = await self._hass.async_add_executor_job(
+                precos_por_hora, vigencias, adicionais_bandeira, horas
+            )
+            estatisticas = [
+                StatisticData(
+                    start=dt_util.utc_from_timestamp(hora), mean=preco, min=preco, max=preco
+                )
+                for hora, preco in zip(horas.tolist(), precos.tolist())
+                if not math.isnan(preco)
+            ]
+            if estatisticas:
+                async_add_external_statistics(self._hass, metadata, estatisticas)
+                publicadas += len(estatisticas)
+                await recorder.async_block_till_done()
+            inicio = bloco_fim
+
+        if publicadas:
+            _LOGGER.debug(
+                "%s horas de preço publicadas em '%s'.", publicadas, self.statistic_id
+            )
+        return publicadas
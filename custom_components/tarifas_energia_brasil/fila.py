@@ -0,0 +1,175 @@
+"""Fila com prioridade e limite de taxa para as requisições ao Cloudflare Worker."""
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from .metricas import Metricas
+
+# Classes de prioridade; valores menores são atendidos primeiro.
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_CONFIGURACAO = 1
+PRIORIDADE_AGENDADA = 2
+
+_NOMES_PRIORIDADE = {
+    PRIORIDADE_INTERATIVA: "interativa",
+    PRIORIDADE_CONFIGURACAO: "configuracao",
+    PRIORIDADE_AGENDADA: "agendada",
+}
+
+# O worker é um serviço gratuito compartilhado: em regime, no máximo uma
+# requisição a cada 2 s, com rajadas de até 5 e 2 requisições simultâneas.
+TAXA_POR_SEGUNDO = 0.5
+RAJADA = 5
+MAX_SIMULTANEAS = 2
+
+
+class _Espera:
+    """Pedido de vaga aguardando na fila."""
+
+    __slots__ = ("chave", "prioridade", "futuro", "pendente")
+
+    def __init__(self, chave: str, prioridade: int, futuro: asyncio.Future):
+        self.chave = chave
+        self.prioridade = prioridade
+        self.futuro = futuro
+        self.pendente = True
+
+
+class FilaRequisicoes:
+    """Escalonador único das requisições HTTP ao worker.
+
+    Cada requisição espera uma vaga: o número de requisições em andamento é
+    limitado e cada vaga consome uma ficha de um token bucket reposto a uma
+    taxa fixa. Os pedidos são atendidos por classe de prioridade e, dentro
+    dela, por ordem de chegada. Um pedido repetido para a mesma chave enquanto
+    o primeiro ainda está na fila não ocupa outra posição; apenas eleva a
+    prioridade do que já aguarda (``elevar``).
+    """
+
+    def __init__(
+        self,
+        metricas: Metricas,
+        taxa: float = TAXA_POR_SEGUNDO,
+        rajada: int = RAJADA,
+        max_simultaneas: int = MAX_SIMULTANEAS,
+    ):
+        self._metricas = metricas
+        self._taxa = taxa
+        self._rajada = rajada
+        self._max_simultaneas = max_simultaneas
+        self._fichas = float(rajada)
+        self._reposto_em = time.monotonic()
+        self._heap: list[tuple[int, int, _Espera]] = []
+        self._aguardando: dict[str, _Espera] = {}
+        self._sequencia = itertools.count()
+        self._despertador: asyncio.TimerHandle | None = None
+        self.em_andamento = 0
+        self.profundidade_maxima = 0
+
+    @property
+    def profundidade(self) -> int:
+        """Pedidos aguardando vaga."""
+        return len(self._aguardando)
+
+    @asynccontextmanager
+    async def vaga(self, chave: str, prioridade: int) -> AsyncIterator[None]:
+        """Aguarda a vez de ``chave`` e mantém a vaga ocupada durante o bloco."""
+        if chave in self._aguardando:
+            raise RuntimeError(f"Pedido '{chave}' já está na fila.")
+        espera = _Espera(chave, prioridade, asyncio.get_running_loop().create_future())
+        self._aguardando[chave] = espera
+        self._empilhar(espera)
+        self.profundidade_maxima = max(self.profundidade_maxima, self.profundidade)
+        inicio = time.monotonic()
+        self._despachar()
+        try:
+            await espera.futuro
+        except asyncio.CancelledError:
+            if espera.pendente:
+                espera.pendente = False
+                self._aguardando.pop(chave, None)
+            else:
+                # A vaga foi concedida junto com o cancelamento.
+                self._liberar()
+            raise
+        self._metricas.registrar_tempo(
+            f"fila_{_NOMES_PRIORIDADE.get(espera.prioridade, espera.prioridade)}",
+            time.monotonic() - inicio,
+        )
+        try:
+            yield
+        finally:
+            self._liberar()
+
+    def elevar(self, chave: str, prioridade: int) -> bool:
+        """Eleva a prioridade do pedido de ``chave`` se ele ainda estiver na fila."""
+        espera = self._aguardando.get(chave)
+        if espera is None:
+            return False
+        if prioridade < espera.prioridade:
+            # A entrada antiga fica no heap e é descartada ao chegar ao topo.
+            espera.prioridade = prioridade
+            self._empilhar(espera)
+            self._despachar()
+        return True
+
+    def como_dict(self) -> dict:
+        """Retorna o estado atual da fila e dos limites configurados."""
+        self._repor()
+        por_prioridade = {nome: 0 for nome in _NOMES_PRIORIDADE.values()}
+        for espera in list(self._aguardando.values()):
+            nome = _NOMES_PRIORIDADE.get(espera.prioridade, str(espera.prioridade))
+            por_prioridade[nome] = por_prioridade.get(nome, 0) + 1
+        return {
+            "profundidade": self.profundidade,
+            "por_prioridade": por_prioridade,
+            "profundidade_maxima": self.profundidade_maxima,
+            "em_andamento": self.em_andamento,
+            "fichas": round(self._fichas, 2),
+            "taxa_por_segundo": self._taxa,
+            "rajada": self._rajada,
+            "max_simultaneas": self._max_simultaneas,
+        }
+
+    def _empilhar(self, espera: _Espera) -> None:
+        heapq.heappush(self._heap, (espera.prioridade, next(self._sequencia), espera))
+
+    def _repor(self) -> None:
+        agora = time.monotonic()
+        self._fichas = min(self._rajada, self._fichas + (agora - self._reposto_em) * self._taxa)
+        self._reposto_em = agora
+
+    def _liberar(self) -> None:
+        self.em_andamento -= 1
+        self._despachar()
+
+    def _despachar(self) -> None:
+        """Concede vagas enquanto houver pedidos, vagas livres e fichas."""
+        while self._heap and self.em_andamento < self._max_simultaneas:
+            prioridade, _, espera = self._heap[0]
+            if not espera.pendente or prioridade != espera.prioridade or espera.futuro.done():
+                # Entrada substituída por ``elevar`` ou pedido cancelado.
+                heapq.heappop(self._heap)
+                continue
+            self._repor()
+            if self._fichas < 1:
+                self._agendar_despertar((1 - self._fichas) / self._taxa)
+                return
+            heapq.heappop(self._heap)
+            self._fichas -= 1
+            self.em_andamento += 1
+            espera.pendente = False
+            del self._aguardando[espera.chave]
+            espera.futuro.set_result(None)
+
+    def _agendar_despertar(self, atraso: float) -> None:
+        if self._despertador is not None:
+            return
+        self._despertador = asyncio.get_running_loop().call_later(atraso, self._despertar)
+
+    def _despertar(self) -> None:
+        self._despertador = None
+        self._despachar()
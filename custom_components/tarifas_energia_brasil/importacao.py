@@ -0,0 +1,110 @@
+"""Leitura em streaming dos dados abertos da ANEEL (tarifas homologadas e bandeiras)."""
+import csv
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import date
+
+# Filtro da tarifa residencial convencional (B1) publicada pela ANEEL, a mesma
+# usada pela integração para a tarifa vigente.
+_FILTRO_TARIFA_B1 = {
+    "DscBaseTarifaria": "Tarifa de Aplicação",
+    "DscSubGrupo": "B1",
+    "DscModalidadeTarifaria": "Convencional",
+    "DscClasse": "Residencial",
+    "DscSubClasse": "Residencial",
+    "DscDetalhe": "Não se aplica",
+}
+
+_UNIDADE_MWH = "MWh"
+
+
+@dataclass(frozen=True)
+class LinhaTarifa:
+    """Tarifa homologada de uma distribuidora (valores em R$/kWh)."""
+
+    concessionaria: str
+    dat_inicio_vigencia: date
+    dat_fim_vigencia: date | None
+    tarifa_base_te: float
+    tarifa_base_tusd: float
+
+
+@dataclass(frozen=True)
+class LinhaBandeira:
+    """Bandeira acionada em um mês (valor adicional em R$/kWh)."""
+
+    data_geracao_conjunto: date
+    data_competencia: date
+    nome_bandeira: str
+    valor_adicional: float
+
+
+def _detectar_encoding(caminho: str) -> str:
+    """Os arquivos da ANEEL já foram publicados em UTF-8 e em Latin-1."""
+    with open(caminho, "rb") as arquivo:
+        amostra = arquivo.read(65536)
+    try:
+        amostra.decode("utf-8")
+    except UnicodeDecodeError as err:
+        # Um caractere multibyte pode ter sido cortado no fim da amostra.
+        if err.start < len(amostra) - 3:
+            return "latin-1"
+    return "utf-8-sig"
+
+
+def _ler_linhas(caminho: str) -> Iterator[dict[str, str]]:
+    with open(caminho, encoding=_detectar_encoding(caminho), newline="") as arquivo:
+        yield from csv.DictReader(arquivo, delimiter=";")
+
+
+def _numero(valor: str | None) -> float | None:
+    if valor is None:
+        return None
+    valor = valor.strip()
+    if "," in valor:
+        valor = valor.replace(".", "").replace(",", ".")
+    if not valor:
+        return None
+    return float(valor)
+
+
+def _data(valor: str | None) -> date | None:
+    if not valor or not valor.strip():
+        return None
+    return date.fromisoformat(valor.strip()[:10])
+
+
+def ler_tarifas_aneel(caminho: str) -> Iterator[LinhaTarifa]:
+    """Percorre o CSV de tarifas homologadas, uma linha por vez, convertendo R$/MWh em R$/kWh."""
+    for linha in _ler_linhas(caminho):
+        if any(linha.get(coluna) != valor for coluna, valor in _FILTRO_TARIFA_B1.items()):
+            continue
+        if linha.get("DscUnidadeTerciaria", _UNIDADE_MWH) != _UNIDADE_MWH:
+            continue
+        inicio = _data(linha.get("DatInicioVigencia"))
+        te = _numero(linha.get("VlrTE"))
+        tusd = _numero(linha.get("VlrTUSD"))
+        if inicio is None or te is None or tusd is None:
+            continue
+        yield LinhaTarifa(
+            concessionaria=linha["SigAgente"].strip(),
+            dat_inicio_vigencia=inicio,
+            dat_fim_vigencia=_data(linha.get("DatFimVigencia")),
+            tarifa_base_te=te / 1000,
+            tarifa_base_tusd=tusd / 1000,
+        )
+
+
+def ler_bandeiras_aneel(caminho: str) -> Iterator[LinhaBandeira]:
+    """Percorre o CSV de acionamento de bandeiras, convertendo R$/MWh em R$/kWh."""
+    for linha in _ler_linhas(caminho):
+        competencia = _data(linha.get("DatCompetencia"))
+        nome = (linha.get("NomBandeiraAcionada") or "").strip()
+        if competencia is None or not nome:
+            continue
+        yield LinhaBandeira(
+            data_geracao_conjunto=_data(linha.get("DatGeracaoConjuntoDados")) or competencia,
+            data_competencia=competencia.replace(day=1),
+            nome_bandeira=nome,
+            valor_adicional=(_numero(linha.get("VlrAdicionalBandeira")) or 0.0) / 1000,
+        )
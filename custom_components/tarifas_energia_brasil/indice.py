@@ -0,0 +1,157 @@
+"""Índice em memória para consultar a tarifa e a bandeira vigentes em uma data."""
+from bisect import bisect_right, insort
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from homeassistant.util import dt as dt_util
+
+from .snapshot import para_data
+
+
+@dataclass(frozen=True)
+class VigenciaTarifa:
+    """Tarifa vigente em um intervalo [inicio, fim] (fim aberto quando None)."""
+
+    inicio: date
+    fim: date | None
+    tarifa_vigente: float
+    tarifa_base_te: float | None
+    tarifa_base_tusd: float | None
+
+
+@dataclass(frozen=True)
+class BandeiraMes:
+    """Bandeira acionada em um mês de competência."""
+
+    competencia: date
+    nome_bandeira: str
+    valor_adicional: float
+
+
+def data_local(momento: datetime | date) -> date:
+    """Converte um instante para a data local (instantes sem fuso são tratados como locais)."""
+    if isinstance(momento, datetime):
+        if momento.tzinfo is None:
+            momento = momento.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        return dt_util.as_local(momento).date()
+    return momento
+
+
+class IndiceTarifas:
+    """Índice de intervalos sobre o histórico de tarifas e bandeiras.
+
+    Para cada concessionária mantém as vigências ordenadas pela data de início
+    em um array paralelo às datas, e as bandeiras ordenadas pela competência;
+    cada consulta é uma busca binária (``bisect``), sem acesso ao banco.
+    """
+
+    def __init__(self) -> None:
+        self._inicios: dict[str, list[date]] = {}
+        self._vigencias: dict[str, list[VigenciaTarifa]] = {}
+        self._competencias: list[date] = []
+        self._bandeiras: list[BandeiraMes] = []
+
+    def adicionar_tarifa(
+        self,
+        concessionaria: str,
+        dat_inicio_vigencia: date | str | None,
+        dat_fim_vigencia: date | str | None,
+        tarifa_vigente: float,
+        tarifa_base_te: float | None = None,
+        tarifa_base_tusd: float | None = None,
+    ) -> bool:
+        """Inclui ou substitui a vigência que começa em ``dat_inicio_vigencia``.
+
+        Retorna True se o índice mudou (vigência nova ou com outros valores).
+        """
+        inicio = para_data(dat_inicio_vigencia)
+        if inicio is None or tarifa_vigente is None:
+            return False
+        vigencia = VigenciaTarifa(
+            inicio, para_data(dat_fim_vigencia), tarifa_vigente, tarifa_base_te, tarifa_base_tusd
+        )
+        inicios = self._inicios.setdefault(concessionaria, [])
+        vigencias = self._vigencias.setdefault(concessionaria, [])
+        pos = bisect_right(inicios, inicio)
+        if pos and inicios[pos - 1] == inicio:
+            if vigencias[pos - 1] == vigencia:
+                return False
+            vigencias[pos - 1] = vigencia
+        else:
+            inicios.insert(pos, inicio)
+            vigencias.insert(pos, vigencia)
+        return True
+
+    def adicionar_bandeira(
+        self,
+        data_competencia: date | str | None,
+        nome_bandeira: str | None,
+        valor_adicional: float | None,
+    ) -> bool:
+        """Inclui ou substitui a bandeira do mês de ``data_competencia``.
+
+        Retorna True se o índice mudou (mês novo ou com outra bandeira).
+        """
+        competencia = para_data(data_competencia)
+        if competencia is None or nome_bandeira is None:
+            return False
+        competencia = competencia.replace(day=1)
+        bandeira = BandeiraMes(competencia, nome_bandeira, valor_adicional or 0.0)
+        pos = bisect_right(self._competencias, competencia)
+        if pos and self._competencias[pos - 1] == competencia:
+            if self._bandeiras[pos - 1] == bandeira:
+                return False
+            self._bandeiras[pos - 1] = bandeira
+        else:
+            insort(self._competencias, competencia)
+            self._bandeiras.insert(pos, bandeira)
+        return True
+
+    def tarifa_em(self, concessionaria: str, dia: date) -> VigenciaTarifa | None:
+        """Retorna a vigência que contém ``dia``, se houver."""
+        inicios = self._inicios.get(concessionaria)
+        if not inicios:
+            return None
+        pos = bisect_right(inicios, dia) - 1
+        if pos < 0:
+            return None
+        vigencia = self._vigencias[concessionaria][pos]
+        if vigencia.fim is not None and dia > vigencia.fim:
+            return None
+        return vigencia
+
+    def bandeira_em(self, dia: date) -> BandeiraMes | None:
+        """Retorna a bandeira acionada no mês de ``dia``, se conhecida."""
+        competencia = dia.replace(day=1)
+        pos = bisect_right(self._competencias, competencia) - 1
+        if pos < 0 or self._competencias[pos] != competencia:
+            return None
+        return self._bandeiras[pos]
+
+    def vigencias(self, concessionaria: str) -> list[VigenciaTarifa]:
+        """Retorna as vigências conhecidas da concessionária, em ordem."""
+        return list(self._vigencias.get(concessionaria, ()))
+
+    def bandeiras(self) -> list[BandeiraMes]:
+        """Retorna as bandeiras conhecidas, em ordem de competência."""
+        return list(self._bandeiras)
+
+    def consultar(self, concessionaria: str, momento: datetime | date) -> dict | None:
+        """Retorna tarifa e bandeira aplicáveis ao instante informado."""
+        dia = data_local(momento)
+        vigencia = self.tarifa_em(concessionaria, dia)
+        bandeira = self.bandeira_em(dia)
+        if vigencia is None and bandeira is None:
+            return None
+        return {
+            "data": dia.isoformat(),
+            "tarifa_vigente": vigencia.tarifa_vigente if vigencia else None,
+            "tarifa_base_te": vigencia.tarifa_base_te if vigencia else None,
+            "tarifa_base_tusd": vigencia.tarifa_base_tusd if vigencia else None,
+            "dat_inicio_vigencia": vigencia.inicio.isoformat() if vigencia else None,
+            "dat_fim_vigencia": (
+                vigencia.fim.isoformat() if vigencia and vigencia.fim else None
+            ),
+            "bandeira": bandeira.nome_bandeira if bandeira else None,
+            "valor_adicional_bandeira": bandeira.valor_adicional if bandeira else None,
+        }
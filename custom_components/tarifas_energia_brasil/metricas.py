@@ -0,0 +1,91 @@
+"""Contadores e tempos de execução dos caminhos críticos da integração."""
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from homeassistant.util import dt as dt_util
+
+
+@dataclass
+class Medicao:
+    """Tempos acumulados de uma operação, em milissegundos."""
+
+    contagem: int = 0
+    total_ms: float = 0.0
+    ultimo_ms: float = 0.0
+    maximo_ms: float = 0.0
+
+    @property
+    def media_ms(self) -> float:
+        return self.total_ms / self.contagem if self.contagem else 0.0
+
+
+class Metricas:
+    """Métricas de um componente (cliente HTTP, banco de dados ou coordinator).
+
+    Pode ser atualizado pela thread de banco e lido no event loop: cada
+    operação altera um único item de dicionário, e a leitura copia os
+    dicionários antes de iterar.
+    """
+
+    def __init__(self) -> None:
+        self._contadores: dict[str, int] = {}
+        self._tempos: dict[str, Medicao] = {}
+        self.ultimo_erro: str | None = None
+        self.ultimo_erro_em: str | None = None
+
+    def incrementar(self, nome: str, valor: int = 1) -> None:
+        """Soma ``valor`` ao contador ``nome``."""
+        self._contadores[nome] = self._contadores.get(nome, 0) + valor
+
+    def contador(self, nome: str) -> int:
+        """Retorna o valor atual do contador ``nome``."""
+        return self._contadores.get(nome, 0)
+
+    def registrar_tempo(self, nome: str, segundos: float) -> None:
+        """Acumula a duração de uma execução de ``nome``."""
+        medicao = self._tempos.get(nome)
+        if medicao is None:
+            medicao = self._tempos[nome] = Medicao()
+        ms = segundos * 1000
+        medicao.contagem += 1
+        medicao.total_ms += ms
+        medicao.ultimo_ms = ms
+        medicao.maximo_ms = max(medicao.maximo_ms, ms)
+
+    def tempo(self, nome: str) -> Medicao | None:
+        """Retorna os tempos acumulados de ``nome``, se já medido."""
+        return self._tempos.get(nome)
+
+    @contextmanager
+    def medir(self, nome: str) -> Iterator[None]:
+        """Mede a duração do bloco com ``time.perf_counter``."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(nome, time.perf_counter() - inicio)
+
+    def registrar_erro(self, err: BaseException) -> None:
+        """Guarda o último erro ocorrido e conta as falhas."""
+        self.incrementar("erros")
+        self.ultimo_erro = f"{type(err).__name__}: {err}"
+        self.ultimo_erro_em = dt_util.utcnow().isoformat()
+
+    def como_dict(self) -> dict:
+        """Retorna um retrato serializável das métricas."""
+        return {
+            "contadores": dict(self._contadores),
+            "tempos": {
+                nome: {
+                    "contagem": medicao.contagem,
+                    "media_ms": round(medicao.media_ms, 3),
+                    "ultimo_ms": round(medicao.ultimo_ms, 3),
+                    "maximo_ms": round(medicao.maximo_ms, 3),
+                }
+                for nome, medicao in list(self._tempos.items())
+            },
+            "ultimo_erro": self.ultimo_erro,
+            "ultimo_erro_em": self.ultimo_erro_em,
+        }
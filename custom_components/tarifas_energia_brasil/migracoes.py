@@ -0,0 +1,173 @@
+"""Migrações versionadas do schema SQLite, registradas em PRAGMA user_version."""
+import logging
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migracao:
+    """Passo do schema; ``versao`` é gravada em PRAGMA user_version após aplicado."""
+
+    versao: int
+    descricao: str
+    aplicar: Callable[[sqlite3.Connection], None]
+
+
+def _executar(*comandos: str) -> Callable[[sqlite3.Connection], None]:
+    def _aplicar(conn: sqlite3.Connection) -> None:
+        for comando in comandos:
+            conn.execute(comando)
+
+    return _aplicar
+
+
+# Colunas adicionadas a historico_tarifas antes das migrações versionadas;
+# bancos antigos podem não ter algumas delas.
+_COLUNAS_LEGADAS = [
+    ("dat_competencia", "DATE"),
+    ("tarifa_base_te", "REAL"),
+    ("tarifa_base_tusd", "REAL"),
+    ("dat_inicio_vigencia", "TEXT"),
+    ("dat_fim_vigencia", "TEXT"),
+    ("dat_competencia_bandeira", "TEXT"),
+    ("valor_adicional_bandeira", "REAL"),
+]
+
+
+def _schema_inicial(conn: sqlite3.Connection) -> None:
+    """Cria as tabelas e completa bancos criados antes do versionamento."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS concessionarias (
+            id INTEGER NOT NULL,
+            nome VARCHAR(100) NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (nome)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bandeiras_tarifarias (
+            id INTEGER NOT NULL,
+            data_geracao_conjunto DATE NOT NULL,
+            data_competencia DATE NOT NULL,
+            nome_bandeira VARCHAR(30) NOT NULL,
+            valor_adicional FLOAT NOT NULL,
+            PRIMARY KEY (id),
+            UNIQUE (data_competencia)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS historico_tarifas (
+            id INTEGER NOT NULL,
+            bandeira_vigente VARCHAR(50) NOT NULL,
+            tarifa_vigente FLOAT NOT NULL,
+            dat_competencia DATE NOT NULL,
+            api_status VARCHAR(20) NOT NULL,
+            timestamp DATETIME NOT NULL,
+            tarifa_base_te FLOAT,
+            tarifa_base_tusd FLOAT,
+            dat_inicio_vigencia VARCHAR(20),
+            dat_fim_vigencia VARCHAR(20),
+            dat_competencia_bandeira VARCHAR(20),
+            valor_adicional_bandeira FLOAT,
+            concessionaria_id INTEGER NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY(concessionaria_id) REFERENCES concessionarias (id)
+        )
+        """
+    )
+    colunas = {row[1] for row in conn.execute("PRAGMA table_info(historico_tarifas)")}
+    for nome, tipo in _COLUNAS_LEGADAS:
+        if nome not in colunas:
+            conn.execute(f"ALTER TABLE historico_tarifas ADD COLUMN {nome} {tipo}")
+            _LOGGER.info("Migração: coluna '%s' adicionada.", nome)
+
+
+MIGRACOES: list[Migracao] = [
+    Migracao(1, "schema inicial", _schema_inicial),
+    Migracao(
+        2,
+        "índices de historico_tarifas",
+        _executar(
+            "CREATE INDEX IF NOT EXISTS ix_historico_concessionaria_competencia"
+            " ON historico_tarifas (concessionaria_id, dat_competencia)",
+            "CREATE INDEX IF NOT EXISTS ix_historico_concessionaria_timestamp"
+            " ON historico_tarifas (concessionaria_id, timestamp)",
+        ),
+    ),
+    Migracao(
+        3,
+        "catálogo de concessionárias",
+        _executar(
+            """
+            CREATE TABLE IF NOT EXISTS catalogo_concessionarias (
+                nome VARCHAR(100) NOT NULL,
+                atualizado_em DATETIME NOT NULL,
+                PRIMARY KEY (nome)
+            )
+            """,
+        ),
+    ),
+    Migracao(
+        4,
+        "preços da Tarifa Branca",
+        _executar(
+            "ALTER TABLE historico_tarifas ADD COLUMN tarifa_branca_ponta FLOAT",
+            "ALTER TABLE historico_tarifas ADD COLUMN tarifa_branca_intermediario FLOAT",
+            "ALTER TABLE historico_tarifas ADD COLUMN tarifa_branca_fora_ponta FLOAT",
+        ),
+    ),
+    Migracao(
+        5,
+        "subgrupo tarifário em historico_tarifas",
+        _executar(
+            # Todo o histórico anterior é da tarifa B1 residencial.
+            "ALTER TABLE historico_tarifas"
+            " ADD COLUMN subgrupo VARCHAR(20) NOT NULL DEFAULT 'B1'",
+            "DROP INDEX IF EXISTS ix_historico_concessionaria_competencia",
+            "DROP INDEX IF EXISTS ix_historico_concessionaria_timestamp",
+            "CREATE INDEX ix_historico_concessionaria_competencia"
+            " ON historico_tarifas (concessionaria_id, subgrupo, dat_competencia)",
+            "CREATE INDEX ix_historico_concessionaria_timestamp"
+            " ON historico_tarifas (concessionaria_id, subgrupo, timestamp)",
+        ),
+    ),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1].versao
+
+
+def aplicar_migracoes(conn: sqlite3.Connection) -> int:
+    """Aplica as migrações pendentes em uma única transação e retorna a versão final.
+
+    Com o schema em dia, o custo é a leitura de PRAGMA user_version.
+    """
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    pendentes = [migracao for migracao in MIGRACOES if migracao.versao > versao]
+    if not pendentes:
+        return versao
+
+    isolation_level = conn.isolation_level
+    # Controle manual da transação, para que DDL e user_version sejam atômicos.
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for migracao in pendentes:
+                migracao.aplicar(conn)
+                _LOGGER.info("Migração %s aplicada: %s.", migracao.versao, migracao.descricao)
+            conn.execute(f"PRAGMA user_version = {pendentes[-1].versao}")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.isolation_level = isolation_level
+    return pendentes[-1].versao
@@ -0,0 +1,138 @@
+"""Perfilamento sob demanda do ciclo de atualização das tarifas."""
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import TarifasEnergiaCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Intervalo de amostragem das pilhas usadas no formato "collapsed".
+_INTERVALO_AMOSTRAGEM = 0.005
+
+# A partir do Python 3.12 o cProfile usa sys.monitoring, que cobre todas as
+# threads e admite um único perfilador ativo; antes disso, cada thread precisa
+# do seu.
+_PERFIL_GLOBAL = sys.version_info >= (3, 12)
+
+
+class _AmostradorPilhas(threading.Thread):
+    """Amostra periodicamente as pilhas das threads informadas (event loop e banco).
+
+    Cada amostra vira uma linha do formato "collapsed" (``a;b;c contagem``),
+    aceito por flamegraph.pl, speedscope e similares.
+    """
+
+    def __init__(self, threads: dict[int, str]):
+        super().__init__(name=f"{DOMAIN}_perfil", daemon=True)
+        self._threads = threads
+        self._parar = threading.Event()
+        self.pilhas: Counter[str] = Counter()
+
+    def run(self) -> None:
+        while not self._parar.wait(_INTERVALO_AMOSTRAGEM):
+            frames = sys._current_frames()
+            for ident, nome in self._threads.items():
+                frame = frames.get(ident)
+                pilha: list[str] = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    pilha.append(
+                        f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                if pilha:
+                    self.pilhas[";".join([nome, *reversed(pilha)])] += 1
+
+    def parar(self) -> None:
+        self._parar.set()
+        self.join()
+
+
+def _gravar_arquivos(
+    perfis: list[cProfile.Profile], pilhas: Counter[str], caminho_base: str
+) -> tuple[str, str]:
+    caminho_pstats = f"{caminho_base}.pstats"
+    caminho_collapsed = f"{caminho_base}.collapsed"
+    stats = pstats.Stats(perfis[0])
+    for perfil in perfis[1:]:
+        stats.add(perfil)
+    stats.dump_stats(caminho_pstats)
+    with open(caminho_collapsed, "w", encoding="utf-8") as arquivo:
+        for pilha, contagem in pilhas.most_common():
+            arquivo.write(f"{pilha} {contagem}\n")
+    return caminho_pstats, caminho_collapsed
+
+
+async def async_perfilar_atualizacoes(
+    hass: HomeAssistant,
+    coordinator: TarifasEnergiaCoordinator,
+    atualizacoes: int,
+    nocache: bool = False,
+) -> dict:
+    """Executa ``atualizacoes`` atualizações da entrada sob perfilamento.
+
+    O cProfile é ativado no event loop (chamada HTTP e parse) e na thread de
+    banco (gravação do snapshot) apenas durante as atualizações; ao mesmo
+    tempo um amostrador registra as pilhas das duas threads. Os resultados
+    são gravados no diretório de configuração em ``.pstats`` e ``.collapsed``.
+    """
+    db = coordinator.db
+    perfil_loop = cProfile.Profile()
+    perfil_db = None if _PERFIL_GLOBAL else cProfile.Profile()
+    ident_db = await db.async_executar_na_thread(threading.get_ident)
+    amostrador = _AmostradorPilhas(
+        {threading.get_ident(): "event_loop", ident_db: "banco_de_dados"}
+    )
+
+    duracoes: list[float] = []
+    if perfil_db is not None:
+        await db.async_executar_na_thread(perfil_db.enable)
+    amostrador.start()
+    perfil_loop.enable()
+    try:
+        for _ in range(atualizacoes):
+            inicio = time.perf_counter()
+            if nocache:
+                await coordinator.async_force_refresh_nocache()
+            else:
+                await coordinator.async_refresh()
+            duracoes.append(round((time.perf_counter() - inicio) * 1000, 1))
+    finally:
+        perfil_loop.disable()
+        if perfil_db is not None:
+            await db.async_executar_na_thread(perfil_db.disable)
+        await hass.async_add_executor_job(amostrador.parar)
+
+    caminho_base = hass.config.path(
+        f"{DOMAIN}_perfil_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+    )
+    caminho_pstats, caminho_collapsed = await hass.async_add_executor_job(
+        _gravar_arquivos,
+        [perfil for perfil in (perfil_loop, perfil_db) if perfil is not None],
+        amostrador.pilhas,
+        caminho_base,
+    )
+    _LOGGER.info(
+        "Perfil de %s atualizações de '%s' gravado em %s e %s.",
+        atualizacoes,
+        coordinator.concessionaria,
+        caminho_pstats,
+        caminho_collapsed,
+    )
+    return {
+        "concessionaria": coordinator.concessionaria,
+        "duracoes_ms": duracoes,
+        "arquivo_pstats": caminho_pstats,
+        "arquivo_collapsed": caminho_collapsed,
+        "amostras": sum(amostrador.pilhas.values()),
+    }
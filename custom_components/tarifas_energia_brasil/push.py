@@ -0,0 +1,135 @@
+"""Assinatura de eventos de mudança de tarifa enviados pelo worker (SSE)."""
+import asyncio
+import logging
+import random
+from typing import Callable
+
+from aiohttp import ClientError
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.json import json_loads
+
+from .cloudflare_api import CloudflareAPI, PushIndisponivelError
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+_BACKOFF_INICIAL = 5.0
+_BACKOFF_MAXIMO = 900.0
+# Sem endpoint de eventos, o worker só é consultado de novo após este prazo (s).
+_ESPERA_INDISPONIVEL = 6 * 3600
+
+# A bandeira é nacional: o evento vale para todas as concessionárias.
+_EVENTO_TARIFA = "tarifa"
+_EVENTO_BANDEIRA = "bandeira"
+
+
+def _concessionarias_do_evento(tipo: str, dados: str) -> list[str] | None:
+    """Concessionárias afetadas pelo evento; None quando afeta todas."""
+    if tipo == _EVENTO_BANDEIRA:
+        return None
+    conteudo = json_loads(dados)
+    if not isinstance(conteudo, dict):
+        return None
+    if nome := conteudo.get("concessionaria"):
+        return [nome]
+    nomes = conteudo.get("concessionarias")
+    return list(nomes) if isinstance(nomes, list) else None
+
+
+class AssinaturaEventos:
+    """Conexão SSE única para todas as concessionárias com push ativo.
+
+    A conexão é refeita com backoff exponencial e jitter quando cai, e
+    reaberta quando o conjunto de concessionárias muda. Enquanto ela não
+    estiver ativa, ``conectada`` é False e o hub mantém o polling agendado.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: CloudflareAPI,
+        concessionarias: Callable[[], list[str]],
+        ao_mudar: Callable[[list[str] | None], None],
+        ao_mudar_conexao: Callable[[bool, bool], None],
+    ):
+        self._hass = hass
+        self._api = api
+        self._concessionarias = concessionarias
+        self._ao_mudar = ao_mudar
+        self._ao_mudar_conexao = ao_mudar_conexao
+        self._tarefa: asyncio.Task | None = None
+        self._ultimo_id: str | None = None
+        self._falhas = 0
+        self._ja_conectou = False
+        self.conectada = False
+
+    @callback
+    def async_reiniciar(self) -> None:
+        """Reabre a assinatura com as concessionárias atuais (ou a encerra se não houver)."""
+        self.async_parar()
+        if self._concessionarias():
+            self._tarefa = self._hass.async_create_background_task(
+                self._async_manter_conexao(), f"{DOMAIN}_eventos"
+            )
+
+    @callback
+    def async_parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            self._tarefa = None
+        self._definir_conexao(False)
+
+    @callback
+    def _definir_conexao(self, conectada: bool) -> None:
+        if conectada == self.conectada:
+            return
+        self.conectada = conectada
+        reconexao = conectada and self._ja_conectou
+        self._ja_conectou |= conectada
+        self._ao_mudar_conexao(conectada, reconexao)
+
+    @callback
+    def _ao_conectar(self) -> None:
+        _LOGGER.debug("Assinatura de eventos de tarifa ativa.")
+        self._falhas = 0
+        self._definir_conexao(True)
+
+    @callback
+    def _ao_receber(self, tipo: str, dados: str, evento_id: str | None) -> None:
+        if evento_id is not None:
+            self._ultimo_id = evento_id
+        if tipo not in (_EVENTO_TARIFA, _EVENTO_BANDEIRA):
+            return
+        try:
+            nomes = _concessionarias_do_evento(tipo, dados)
+        except ValueError as err:
+            _LOGGER.debug("Evento '%s' inválido ignorado: %s", tipo, err)
+            return
+        _LOGGER.debug("Evento '%s' recebido para %s.", tipo, nomes or "todas")
+        self._ao_mudar(nomes)
+
+    async def _async_manter_conexao(self) -> None:
+        while True:
+            try:
+                await self._api.async_escutar_eventos(
+                    self._concessionarias(), self._ultimo_id, self._ao_conectar, self._ao_receber
+                )
+                espera = None
+            except PushIndisponivelError as err:
+                _LOGGER.info("%s Mantendo atualizações periódicas.", err)
+                espera = _ESPERA_INDISPONIVEL
+            except (asyncio.TimeoutError, ClientError) as err:
+                _LOGGER.debug("Conexão de eventos perdida: %s", err)
+                espera = None
+            except Exception as err:
+                _LOGGER.warning("Erro inesperado na assinatura de eventos: %s", err)
+                espera = None
+            self._definir_conexao(False)
+            if espera is None:
+                self._falhas += 1
+                self._api.metricas.incrementar("reconexoes_eventos")
+                espera = random.uniform(0.5, 1.0) * min(
+                    _BACKOFF_MAXIMO, _BACKOFF_INICIAL * 2 ** (self._falhas - 1)
+                )
+            await asyncio.sleep(espera)
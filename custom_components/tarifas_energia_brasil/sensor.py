@@ -1,18 +1,52 @@
 """Define as entidades de sensor para a integração Tarifas de Energia Brasil."""
 import logging
-from datetime import date
+from datetime import date, datetime, time
+from typing import Any
 
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    EntityCategory,
+    UnitOfTime,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import (
+    async_track_point_in_time,
+    async_track_state_change_event,
+)
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-
-from .const import DOMAIN, CONF_CONCESSIONARIA
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    CONF_CONCESSIONARIA,
+    CONF_DIA_LEITURA,
+    CONF_GRANULARIDADE_CONTA,
+    CONF_INICIO_PONTA,
+    CONF_MEDIDOR,
+    DEFAULT_DIA_LEITURA,
+    DEFAULT_GRANULARIDADE_CONTA,
+    DEFAULT_INICIO_PONTA,
+    MODALIDADE_BRANCA,
+    SUBGRUPO_PADRAO,
+    SUBGRUPOS,
+)
+from .combinacoes import combinacoes_da_entrada
+from .conta import FATORES_KWH, AcumuladorConta, fim_ciclo, inicio_ciclo, meia_noite_local
 from .coordinator import TarifasEnergiaCoordinator
+from .metricas import Medicao
+from .snapshot import TarifaSnapshot
+from .tarifa_branca import GradeTarifaBranca
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,25 +59,76 @@ async def async_setup_entry(
     """Configura as entidades de sensor a partir de uma entrada de configuração."""
     coordinator: TarifasEnergiaCoordinator = hass.data[DOMAIN][entry.entry_id]
 
-    entities = [
-        TarifaVigenteSensor(coordinator, entry),
+    combinacoes = combinacoes_da_entrada(entry.options)
+    entities: list[SensorEntity] = []
+    for subgrupo in coordinator.subgrupos:
+        entities += [
+            TarifaVigenteSensor(coordinator, entry, subgrupo),
+            DataInicioCompetenciaSensor(coordinator, entry, subgrupo),
+            DataFimCompetenciaSensor(coordinator, entry, subgrupo),
+        ]
+    entities += [
         BandeiraVigenteSensor(coordinator, entry),
         DataCompetenciaBandeiraSensor(coordinator, entry),
-        DataInicioCompetenciaSensor(coordinator, entry),
-        DataFimCompetenciaSensor(coordinator, entry),
         UltimaAtualizacaoSensor(coordinator, entry),
+        LatenciaApiSensor(coordinator, entry),
+        EsperaFilaSensor(coordinator, entry),
+        TempoAtualizacaoSensor(coordinator, entry),
+        TempoBancoDadosSensor(coordinator, entry),
+        AtualizacoesPeloCacheSensor(coordinator, entry),
+        UltimoErroSensor(coordinator, entry),
     ]
 
+    grade = GradeTarifaBranca(time(entry.options.get(CONF_INICIO_PONTA, DEFAULT_INICIO_PONTA)))
+    subgrupos_branca = [c.subgrupo for c in combinacoes if c.modalidade == MODALIDADE_BRANCA]
+    for subgrupo in subgrupos_branca:
+        entities.append(TarifaBrancaSensor(coordinator, entry, grade, subgrupo))
+    if medidor := entry.options.get(CONF_MEDIDOR):
+        # A conta do mês usa o primeiro subgrupo da entrada.
+        entities.append(
+            ContaMesSensor(
+                coordinator,
+                entry,
+                medidor,
+                entry.options.get(CONF_DIA_LEITURA, DEFAULT_DIA_LEITURA),
+                entry.options.get(CONF_GRANULARIDADE_CONTA, DEFAULT_GRANULARIDADE_CONTA),
+                grade if coordinator.subgrupos[0] in subgrupos_branca else None,
+            )
+        )
+
     async_add_entities(entities)
 
 
-class TarifasEnergiaBaseSensor(CoordinatorEntity[TarifasEnergiaCoordinator], SensorEntity):
-    """Classe base para os sensores da integração."""
+def _sufixo_nome(subgrupo: str) -> str:
+    """Os sensores do subgrupo padrão mantêm os nomes e unique_ids originais."""
+    return "" if subgrupo == SUBGRUPO_PADRAO else f" {SUBGRUPOS[subgrupo]}"
 
-    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+
+def _sufixo_id(subgrupo: str) -> str:
+    return "" if subgrupo == SUBGRUPO_PADRAO else f"_{subgrupo.lower()}"
+
+
+class TarifasEnergiaBaseSensor(CoordinatorEntity[TarifasEnergiaCoordinator], SensorEntity):
+    """Classe base para os sensores da integração.
+
+    Cada sensor lê o snapshot de um subgrupo (o primeiro da entrada, se não
+    informado). O valor e os atributos são calculados uma vez por
+    atualização do coordinator, e o estado só é gravado quando algum deles
+    (ou a disponibilidade) muda.
+    """
+
+    def __init__(
+        self,
+        coordinator: TarifasEnergiaCoordinator,
+        entry: ConfigEntry,
+        subgrupo: str | None = None,
+    ):
         super().__init__(coordinator)
         self.entry = entry
+        self._subgrupo = subgrupo or coordinator.subgrupos[0]
         self._attr_has_entity_name = True
+        self._disponivel_gravado: bool | None = None
+        self._attr_native_value, self._attr_extra_state_attributes = self._calcular_estado()
 
     @property
     def device_info(self):
@@ -53,9 +138,49 @@ class TarifasEnergiaBaseSensor(CoordinatorEntity[TarifasEnergiaCoordinator], Sen
             "name": f"Tarifas {concessionaria_nome}",
             "manufacturer": "ANEEL",
             "model": "Tarifas de Energia Elétrica",
-            "entry_type": "service",
+            "entry_type": DeviceEntryType.SERVICE,
         }
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._disponivel_gravado = self.available
+
+    def _ler(self, snapshot: TarifaSnapshot) -> Any:
+        """Valor do sensor no snapshot."""
+        return None
+
+    def _atributos(self, snapshot: TarifaSnapshot) -> dict | None:
+        """Atributos extras do sensor no snapshot."""
+        return None
+
+    def _snapshot(self) -> TarifaSnapshot | None:
+        return (self.coordinator.data or {}).get(self._subgrupo)
+
+    def _calcular_estado(self) -> tuple[Any, dict | None]:
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return None, None
+        return self._ler(snapshot), self._atributos(snapshot)
+
+    @callback
+    def _async_gravar_se_mudou(self) -> None:
+        valor, atributos = self._calcular_estado()
+        disponivel = self.available
+        if (
+            valor == self._attr_native_value
+            and atributos == self._attr_extra_state_attributes
+            and disponivel == self._disponivel_gravado
+        ):
+            return
+        self._attr_native_value = valor
+        self._attr_extra_state_attributes = atributos
+        self._disponivel_gravado = disponivel
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._async_gravar_se_mudou()
+
 
 class TarifaVigenteSensor(TarifasEnergiaBaseSensor):
     """Sensor que representa o valor da tarifa vigente."""
@@ -65,26 +190,22 @@ class TarifaVigenteSensor(TarifasEnergiaBaseSensor):
     _attr_icon = "mdi:cash-multiple"
     _attr_native_unit_of_measurement = "R$/kWh"
 
-    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
-        super().__init__(coordinator, entry)
-        self._attr_unique_id = f"{self.entry.entry_id}_tarifa_vigente"
+    def __init__(
+        self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry, subgrupo: str
+    ):
+        super().__init__(coordinator, entry, subgrupo)
+        self._attr_name = f"Tarifa Vigente{_sufixo_nome(subgrupo)}"
+        self._attr_unique_id = f"{self.entry.entry_id}_tarifa_vigente{_sufixo_id(subgrupo)}"
 
-    @property
-    def native_value(self) -> float | None:
-        if self.coordinator.data:
-            return self.coordinator.data.get("tarifa_vigente")
-        return None
+    def _ler(self, snapshot: TarifaSnapshot) -> float | None:
+        return snapshot.tarifa_vigente
 
-    @property
-    def extra_state_attributes(self) -> dict | None:
-        if not self.coordinator.data:
-            return None
-        d = self.coordinator.data
+    def _atributos(self, snapshot: TarifaSnapshot) -> dict | None:
         return {
-            "tarifa_base_te": d.get("tarifa_base_te"),
-            "tarifa_base_tusd": d.get("tarifa_base_tusd"),
-            "valor_adicional_bandeira": d.get("valor_adicional_bandeira"),
-            "api_status": d.get("api_status"),
+            "tarifa_base_te": snapshot.tarifa_base_te,
+            "tarifa_base_tusd": snapshot.tarifa_base_tusd,
+            "valor_adicional_bandeira": snapshot.valor_adicional_bandeira,
+            "api_status": snapshot.api_status,
         }
 
 
@@ -98,11 +219,8 @@ class BandeiraVigenteSensor(TarifasEnergiaBaseSensor):
         super().__init__(coordinator, entry)
         self._attr_unique_id = f"{self.entry.entry_id}_bandeira_vigente"
 
-    @property
-    def native_value(self) -> str | None:
-        if self.coordinator.data:
-            return self.coordinator.data.get("bandeira_vigente")
-        return None
+    def _ler(self, snapshot: TarifaSnapshot) -> str | None:
+        return snapshot.bandeira_vigente
 
 
 class DataCompetenciaBandeiraSensor(TarifasEnergiaBaseSensor):
@@ -116,11 +234,8 @@ class DataCompetenciaBandeiraSensor(TarifasEnergiaBaseSensor):
         super().__init__(coordinator, entry)
         self._attr_unique_id = f"{self.entry.entry_id}_dat_competencia_bandeira"
 
-    @property
-    def native_value(self):
-        if self.coordinator.data:
-            return self.coordinator.data.get("dat_competencia_bandeira")
-        return None
+    def _ler(self, snapshot: TarifaSnapshot) -> date | None:
+        return snapshot.dat_competencia_bandeira
 
 
 class DataInicioCompetenciaSensor(TarifasEnergiaBaseSensor):
@@ -130,17 +245,15 @@ class DataInicioCompetenciaSensor(TarifasEnergiaBaseSensor):
     _attr_device_class = SensorDeviceClass.DATE
     _attr_icon = "mdi:calendar-arrow-right"
 
-    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
-        super().__init__(coordinator, entry)
-        self._attr_unique_id = f"{self.entry.entry_id}_dat_inicio_vigencia"
+    def __init__(
+        self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry, subgrupo: str
+    ):
+        super().__init__(coordinator, entry, subgrupo)
+        self._attr_name = f"Data Início Vigência{_sufixo_nome(subgrupo)}"
+        self._attr_unique_id = f"{self.entry.entry_id}_dat_inicio_vigencia{_sufixo_id(subgrupo)}"
 
-    @property
-    def native_value(self) -> date | None:
-        if self.coordinator.data:
-            val = self.coordinator.data.get("dat_inicio_vigencia")
-            if isinstance(val, str):
-                return date.fromisoformat(val[:10])
-        return None
+    def _ler(self, snapshot: TarifaSnapshot) -> date | None:
+        return snapshot.dat_inicio_vigencia
 
 
 class DataFimCompetenciaSensor(TarifasEnergiaBaseSensor):
@@ -150,17 +263,15 @@ class DataFimCompetenciaSensor(TarifasEnergiaBaseSensor):
     _attr_device_class = SensorDeviceClass.DATE
     _attr_icon = "mdi:calendar-arrow-left"
 
-    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
-        super().__init__(coordinator, entry)
-        self._attr_unique_id = f"{self.entry.entry_id}_dat_fim_vigencia"
+    def __init__(
+        self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry, subgrupo: str
+    ):
+        super().__init__(coordinator, entry, subgrupo)
+        self._attr_name = f"Data Fim Vigência{_sufixo_nome(subgrupo)}"
+        self._attr_unique_id = f"{self.entry.entry_id}_dat_fim_vigencia{_sufixo_id(subgrupo)}"
 
-    @property
-    def native_value(self) -> date | None:
-        if self.coordinator.data:
-            val = self.coordinator.data.get("dat_fim_vigencia")
-            if isinstance(val, str):
-                return date.fromisoformat(val[:10])
-        return None
+    def _ler(self, snapshot: TarifaSnapshot) -> date | None:
+        return snapshot.dat_fim_vigencia
 
 
 class UltimaAtualizacaoSensor(TarifasEnergiaBaseSensor):
@@ -173,8 +284,410 @@ class UltimaAtualizacaoSensor(TarifasEnergiaBaseSensor):
         super().__init__(coordinator, entry)
         self._attr_unique_id = f"{self.entry.entry_id}_ultima_atualizacao"
 
+    def _ler(self, snapshot: TarifaSnapshot) -> str | None:
+        return snapshot.timestamp
+
+
+class TarifaBrancaSensor(TarifasEnergiaBaseSensor):
+    """Sensor com o preço do posto tarifário vigente na Tarifa Branca.
+
+    Em vez de consultar o relógio periodicamente, agenda um único callback
+    para o próximo limite entre postos e reagenda a cada mudança.
+    """
+
+    _attr_name = "Tarifa Branca"
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_icon = "mdi:clock-time-four-outline"
+    _attr_native_unit_of_measurement = "R$/kWh"
+
+    def __init__(
+        self,
+        coordinator: TarifasEnergiaCoordinator,
+        entry: ConfigEntry,
+        grade: GradeTarifaBranca,
+        subgrupo: str = SUBGRUPO_PADRAO,
+    ):
+        self._grade = grade
+        self._posto, self._proxima_mudanca, self._proximo_posto = grade.posto_em(dt_util.now())
+        self._cancelar_mudanca: CALLBACK_TYPE | None = None
+        super().__init__(coordinator, entry, subgrupo)
+        self._attr_name = f"Tarifa Branca{_sufixo_nome(subgrupo)}"
+        self._attr_unique_id = f"{self.entry.entry_id}_tarifa_branca{_sufixo_id(subgrupo)}"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._async_agendar_mudanca()
+        self.async_on_remove(self._async_cancelar_mudanca)
+
+    @callback
+    def _async_agendar_mudanca(self) -> None:
+        self._posto, self._proxima_mudanca, self._proximo_posto = self._grade.posto_em(
+            dt_util.now()
+        )
+        self._cancelar_mudanca = async_track_point_in_time(
+            self.hass, self._async_mudanca_de_posto, self._proxima_mudanca
+        )
+
+    @callback
+    def _async_cancelar_mudanca(self) -> None:
+        if self._cancelar_mudanca is not None:
+            self._cancelar_mudanca()
+            self._cancelar_mudanca = None
+
+    @callback
+    def _async_mudanca_de_posto(self, _now: datetime) -> None:
+        self._async_agendar_mudanca()
+        self._async_gravar_se_mudou()
+
+    @staticmethod
+    def _preco(snapshot: TarifaSnapshot, posto: str) -> float | None:
+        if not snapshot.tarifa_branca:
+            return None
+        # A bandeira é cobrada igualmente em todos os postos.
+        return snapshot.tarifa_branca[posto] + (snapshot.valor_adicional_bandeira or 0.0)
+
+    def _ler(self, snapshot: TarifaSnapshot) -> float | None:
+        return self._preco(snapshot, self._posto)
+
+    def _atributos(self, snapshot: TarifaSnapshot) -> dict | None:
+        precos = snapshot.tarifa_branca or {}
+        return {
+            "posto": self._posto,
+            "proxima_mudanca": self._proxima_mudanca.isoformat(),
+            "proximo_posto": self._proximo_posto,
+            "preco_proximo_posto": self._preco(snapshot, self._proximo_posto),
+            **{f"tarifa_base_{posto}": preco for posto, preco in precos.items()},
+            "api_status": snapshot.api_status,
+        }
+
+
+class ContaMesSensor(TarifasEnergiaBaseSensor, RestoreSensor):
+    """Sensor com o custo acumulado no ciclo de faturamento e sua projeção.
+
+    O acumulador é atualizado a cada mudança do medidor de energia, sem
+    consultar o histórico do recorder, e sobrevive a reinícios pelo
+    restore state. O estado só é gravado quando o custo, arredondado à
+    granularidade configurada, muda.
+    """
+
+    _attr_name = "Conta do Mês"
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_native_unit_of_measurement = "BRL"
+    _attr_icon = "mdi:receipt-text-outline"
+
+    def __init__(
+        self,
+        coordinator: TarifasEnergiaCoordinator,
+        entry: ConfigEntry,
+        medidor: str,
+        dia_leitura: int,
+        granularidade: float,
+        grade: GradeTarifaBranca | None = None,
+    ):
+        self._medidor = medidor
+        self._dia_leitura = dia_leitura
+        self._granularidade = granularidade
+        self._grade = grade
+        self._acumulador = AcumuladorConta(inicio_ciclo(dt_util.now().date(), dia_leitura))
+        self._cancelar_fim_ciclo: CALLBACK_TYPE | None = None
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_conta_mes"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if (dados := await self.async_get_last_extra_data()) is not None:
+            if (restaurado := AcumuladorConta.from_dict(dados.as_dict())) is not None:
+                self._acumulador = restaurado
+        self._async_verificar_ciclo()
+        # Com acumulador restaurado, conta o consumo enquanto o HA esteve parado.
+        self._registrar_leitura(self.hass.states.get(self._medidor))
+        self._attr_native_value, self._attr_extra_state_attributes = self._calcular_estado()
+
+        self.async_on_remove(
+            async_track_state_change_event(
+                self.hass, [self._medidor], self._async_medidor_alterado
+            )
+        )
+        self.async_on_remove(self._async_cancelar_fim_ciclo)
+
+    @property
+    def extra_restore_state_data(self) -> AcumuladorConta:
+        return self._acumulador
+
     @property
-    def native_value(self) -> str | None:
-        if self.coordinator.data:
-            return self.coordinator.data.get("timestamp")
+    def last_reset(self) -> datetime:
+        return meia_noite_local(self._acumulador.inicio_ciclo)
+
+    def _preco(self) -> float | None:
+        """Preço (R$/kWh) vigente agora, com o adicional da bandeira."""
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return None
+        if self._grade is not None and snapshot.tarifa_branca:
+            base = snapshot.tarifa_branca[self._grade.posto_em(dt_util.now())[0]]
+        else:
+            base = snapshot.tarifa_vigente
+        if base is None:
+            return None
+        return base + (snapshot.valor_adicional_bandeira or 0.0)
+
+    def _registrar_leitura(self, estado: State | None) -> bool:
+        if estado is None or estado.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return False
+        try:
+            leitura = float(estado.state)
+        except ValueError:
+            return False
+        fator = FATORES_KWH.get(estado.attributes.get(ATTR_UNIT_OF_MEASUREMENT), 1.0)
+        self._acumulador.registrar(leitura * fator, self._preco())
+        return True
+
+    def _quantizar(self, custo: float) -> float:
+        return round(round(custo / self._granularidade) * self._granularidade, 2)
+
+    def _calcular_estado(self) -> tuple[Any, dict | None]:
+        acumulador = self._acumulador
+        preco = self._preco()
+        projecao = acumulador.projecao(dt_util.now(), preco)
+        return self._quantizar(acumulador.custo), {
+            "consumo_kwh": round(acumulador.consumo_kwh, 3),
+            "preco_kwh": preco,
+            "projecao": round(projecao, 2) if projecao is not None else None,
+            "inicio_ciclo": acumulador.inicio_ciclo.isoformat(),
+            "fim_ciclo": fim_ciclo(acumulador.inicio_ciclo).isoformat(),
+            "consumo_sem_tarifa_kwh": round(acumulador.consumo_sem_tarifa_kwh, 3),
+            "medidor": self._medidor,
+        }
+
+    @callback
+    def _async_medidor_alterado(self, evento: Event) -> None:
+        if not self._registrar_leitura(evento.data["new_state"]):
+            return
+        if self._quantizar(self._acumulador.custo) != self._attr_native_value:
+            self._async_gravar_se_mudou()
+
+    @callback
+    def _async_verificar_ciclo(self) -> None:
+        """Inicia um novo ciclo se o atual terminou e agenda o fim do próximo."""
+        inicio = inicio_ciclo(dt_util.now().date(), self._dia_leitura)
+        if inicio != self._acumulador.inicio_ciclo:
+            _LOGGER.debug("Novo ciclo de faturamento em %s para '%s'.", inicio, self._medidor)
+            self._acumulador.novo_ciclo(inicio)
+        self._async_cancelar_fim_ciclo()
+        self._cancelar_fim_ciclo = async_track_point_in_time(
+            self.hass, self._async_fim_ciclo, meia_noite_local(fim_ciclo(inicio))
+        )
+
+    @callback
+    def _async_cancelar_fim_ciclo(self) -> None:
+        if self._cancelar_fim_ciclo is not None:
+            self._cancelar_fim_ciclo()
+            self._cancelar_fim_ciclo = None
+
+    @callback
+    def _async_fim_ciclo(self, _now: datetime) -> None:
+        self._cancelar_fim_ciclo = None
+        self._async_verificar_ciclo()
+        self._async_gravar_se_mudou()
+
+
+def _ms(medicao: Medicao | None) -> float | None:
+    return round(medicao.ultimo_ms, 1) if medicao else None
+
+
+class MetricaBaseSensor(TarifasEnergiaBaseSensor):
+    """Base dos sensores de diagnóstico de desempenho, desativados por padrão.
+
+    As métricas não fazem parte do snapshot; são lidas a cada atualização do
+    coordinator. Com ``_escopo_global`` o sensor lê métricas do cliente da API
+    ou do banco, compartilhados por todas as entradas: cada entrada exibe os
+    mesmos números, e o atributo ``escopo`` indica isso.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _escopo_global = False
+
+
+class DuracaoBaseSensor(MetricaBaseSensor):
+    """Base dos sensores que exibem a duração da última execução (ms)."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_icon = "mdi:timer-outline"
+
+    def _medicao(self) -> Medicao | None:
+        """Medição exibida pelo sensor."""
         return None
+
+    def _detalhes(self) -> dict:
+        """Atributos específicos do sensor, além das estatísticas da medição."""
+        return {}
+
+    def _calcular_estado(self) -> tuple[Any, dict | None]:
+        medicao = self._medicao()
+        atributos = (
+            {
+                "contagem": medicao.contagem,
+                "media_ms": round(medicao.media_ms, 1),
+                "maximo_ms": round(medicao.maximo_ms, 1),
+            }
+            if medicao
+            else {}
+        )
+        atributos.update(self._detalhes())
+        if self._escopo_global:
+            atributos["escopo"] = "global"
+        return _ms(medicao), atributos or None
+
+
+class LatenciaApiSensor(DuracaoBaseSensor):
+    """Sensor com a latência da última requisição HTTP ao Cloudflare Worker.
+
+    Métrica global: a última requisição pode ter sido de outra entrada.
+    """
+
+    _attr_name = "Latência API"
+    _attr_icon = "mdi:cloud-clock"
+    _escopo_global = True
+
+    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_latencia_api"
+
+    def _medicao(self) -> Medicao | None:
+        return self.coordinator.api.metricas.tempo("http")
+
+    def _detalhes(self) -> dict:
+        metricas = self.coordinator.api.metricas
+        return {
+            "json_ms": _ms(metricas.tempo("json")),
+            "requisicoes": metricas.contador("requisicoes"),
+            "bytes_recebidos": metricas.contador("bytes_recebidos"),
+            "cache_hits": metricas.contador("cache_hits"),
+            "cache_misses": metricas.contador("cache_misses"),
+            "retentativas": metricas.contador("retentativas"),
+            "circuito_aberto": metricas.contador("circuito_aberto"),
+        }
+
+
+class EsperaFilaSensor(DuracaoBaseSensor):
+    """Sensor com a espera na fila de requisições das atualizações agendadas.
+
+    Métrica global: a fila é única para todas as entradas.
+    """
+
+    _attr_name = "Espera na Fila"
+    _attr_icon = "mdi:tray-full"
+    _escopo_global = True
+
+    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_espera_fila"
+
+    def _medicao(self) -> Medicao | None:
+        return self.coordinator.api.metricas.tempo("fila_agendada")
+
+    def _detalhes(self) -> dict:
+        metricas = self.coordinator.api.metricas
+        fila = self.coordinator.api.fila
+        return {
+            "interativa_ms": _ms(metricas.tempo("fila_interativa")),
+            "configuracao_ms": _ms(metricas.tempo("fila_configuracao")),
+            "profundidade": fila.profundidade,
+            "profundidade_maxima": fila.profundidade_maxima,
+            "em_andamento": fila.em_andamento,
+            "deduplicadas": metricas.contador("deduplicadas"),
+        }
+
+
+class TempoAtualizacaoSensor(DuracaoBaseSensor):
+    """Sensor com a duração da última atualização bem-sucedida, por etapa."""
+
+    _attr_name = "Tempo de Atualização"
+
+    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_tempo_atualizacao"
+
+    def _medicao(self) -> Medicao | None:
+        return self.coordinator.metricas.tempo("atualizacao")
+
+    def _detalhes(self) -> dict:
+        metricas = self.coordinator.metricas
+        return {
+            "busca_ms": _ms(metricas.tempo("busca")),
+            "parse_ms": _ms(metricas.tempo("parse")),
+            "gravacao_ms": _ms(metricas.tempo("gravacao")),
+        }
+
+
+class TempoBancoDadosSensor(DuracaoBaseSensor):
+    """Sensor com o tempo da última gravação de snapshot na thread de banco.
+
+    Métrica global: o banco é compartilhado e a gravação pode ter sido de outra entrada.
+    """
+
+    _attr_name = "Tempo Banco de Dados"
+    _attr_icon = "mdi:database-clock"
+    _escopo_global = True
+
+    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_tempo_banco_dados"
+
+    def _medicao(self) -> Medicao | None:
+        return self.coordinator.db.metricas.tempo("save_tarifa_snapshots")
+
+    def _detalhes(self) -> dict:
+        metricas = self.coordinator.db.metricas
+        return {
+            "leitura_ms": _ms(metricas.tempo("get_latest_tarifa_snapshots")),
+            "snapshots_inseridos": metricas.contador("snapshots_inseridos"),
+            "snapshots_em_memoria": metricas.contador("snapshots_em_memoria"),
+        }
+
+
+class AtualizacoesPeloCacheSensor(MetricaBaseSensor):
+    """Sensor que conta as atualizações atendidas pelo banco local por falha na API."""
+
+    _attr_name = "Atualizações pelo Cache"
+    _attr_icon = "mdi:database-arrow-left"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_atualizacoes_pelo_cache"
+
+    def _calcular_estado(self) -> tuple[Any, dict | None]:
+        metricas = self.coordinator.metricas
+        return metricas.contador("fallbacks_cache"), {
+            "atualizacoes": metricas.contador("atualizacoes")
+        }
+
+
+class UltimoErroSensor(MetricaBaseSensor):
+    """Sensor que exibe o último erro de atualização da entrada.
+
+    ``erros_api`` e ``erros_banco_de_dados`` somam os erros de todas as entradas.
+    """
+
+    _attr_name = "Último Erro"
+    _attr_icon = "mdi:alert-circle-outline"
+
+    def __init__(self, coordinator: TarifasEnergiaCoordinator, entry: ConfigEntry):
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{self.entry.entry_id}_ultimo_erro"
+
+    def _calcular_estado(self) -> tuple[Any, dict | None]:
+        metricas = self.coordinator.metricas
+        erro = metricas.ultimo_erro
+        # O estado de um sensor é limitado a 255 caracteres.
+        return erro[:255] if erro else None, {
+            "ultimo_erro_em": metricas.ultimo_erro_em,
+            "erros": metricas.contador("erros"),
+            "erros_api": self.coordinator.api.metricas.contador("erros"),
+            "erros_banco_de_dados": self.coordinator.db.metricas.contador("erros"),
+        }
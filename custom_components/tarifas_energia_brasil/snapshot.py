@@ -0,0 +1,44 @@
+"""Snapshot imutável dos dados de tarifa publicados pelo coordinator."""
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from typing import Any
+
+
+def para_data(valor: date | str | None) -> date | None:
+    """Converte datas recebidas como date ou string ISO (com ou sem horário)."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(valor[:10])
+
+
+@dataclass(frozen=True, slots=True)
+class TarifaSnapshot:
+    """Tarifa e bandeira vigentes, com as datas já convertidas.
+
+    Criado uma vez por atualização (resposta da API ou banco local) e
+    compartilhado por todas as entidades da entrada.
+    """
+
+    bandeira_vigente: str | None
+    tarifa_vigente: float | None
+    api_status: str
+    timestamp: str | None
+    tarifa_base_te: float | None = None
+    tarifa_base_tusd: float | None = None
+    dat_competencia_bandeira: date | None = None
+    dat_competencia_tarifa: date | None = None
+    dat_inicio_vigencia: date | None = None
+    dat_fim_vigencia: date | None = None
+    valor_adicional_bandeira: float | None = None
+    tarifa_branca: dict[str, float] | None = None
+
+    def como_dict(self) -> dict[str, Any]:
+        """Retorna os campos em formato serializável (datas em ISO)."""
+        return {
+            campo: valor.isoformat() if isinstance(valor, date) else valor
+            for campo, valor in asdict(self).items()
+        }
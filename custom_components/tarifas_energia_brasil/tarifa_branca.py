@@ -0,0 +1,94 @@
+"""Postos tarifários da Tarifa Branca: grade semanal e calendário de feriados."""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from homeassistant.util import dt as dt_util
+
+POSTO_PONTA = "ponta"
+POSTO_INTERMEDIARIO = "intermediario"
+POSTO_FORA_PONTA = "fora_ponta"
+POSTOS = (POSTO_PONTA, POSTO_INTERMEDIARIO, POSTO_FORA_PONTA)
+
+# Duração regulatória dos postos (REN ANEEL 1.000/2021): 3 h de ponta, com
+# 1 h de intermediário imediatamente antes e depois.
+DURACAO_PONTA = timedelta(hours=3)
+DURACAO_INTERMEDIARIO = timedelta(hours=1)
+
+# Feriados nacionais de data fixa considerados pela ANEEL (mês, dia).
+_FERIADOS_FIXOS = ((1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25))
+# Dia Nacional de Zumbi e da Consciência Negra (Lei 14.759/2023).
+_CONSCIENCIA_NEGRA = (11, 20)
+_ANO_CONSCIENCIA_NEGRA = 2024
+
+
+def _pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=8)
+def feriados_nacionais(ano: int) -> frozenset[date]:
+    """Feriados em que todo o dia é fora de ponta: fixos, Carnaval, Paixão e Corpus Christi."""
+    pascoa = _pascoa(ano)
+    feriados = {date(ano, mes, dia) for mes, dia in _FERIADOS_FIXOS}
+    if ano >= _ANO_CONSCIENCIA_NEGRA:
+        feriados.add(date(ano, *_CONSCIENCIA_NEGRA))
+    feriados.update(
+        pascoa + timedelta(days=delta)
+        for delta in (-48, -47, -2, 60)  # Carnaval (seg. e ter.), Paixão, Corpus Christi
+    )
+    return frozenset(feriados)
+
+
+def dia_util(dia: date) -> bool:
+    """Indica se há postos de ponta e intermediário no dia (segunda a sexta, exceto feriados)."""
+    return dia.weekday() < 5 and dia not in feriados_nacionais(dia.year)
+
+
+class GradeTarifaBranca:
+    """Grade de postos tarifários de uma distribuidora.
+
+    Os segmentos de um dia útil são calculados uma única vez a partir do
+    início da ponta; sábados, domingos e feriados são inteiros fora de ponta.
+    """
+
+    def __init__(self, inicio_ponta: time):
+        ponta = timedelta(hours=inicio_ponta.hour, minutes=inicio_ponta.minute)
+        self._segmentos_dia_util: tuple[tuple[timedelta, str], ...] = (
+            (timedelta(0), POSTO_FORA_PONTA),
+            (ponta - DURACAO_INTERMEDIARIO, POSTO_INTERMEDIARIO),
+            (ponta, POSTO_PONTA),
+            (ponta + DURACAO_PONTA, POSTO_INTERMEDIARIO),
+            (ponta + DURACAO_PONTA + DURACAO_INTERMEDIARIO, POSTO_FORA_PONTA),
+        )
+
+    def _segmentos(self, dia: date) -> list[tuple[datetime, str]]:
+        meia_noite = datetime.combine(dia, time.min, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+        if not dia_util(dia):
+            return [(meia_noite, POSTO_FORA_PONTA)]
+        return [(meia_noite + inicio, posto) for inicio, posto in self._segmentos_dia_util]
+
+    def posto_em(self, momento: datetime) -> tuple[str, datetime, str]:
+        """Retorna o posto vigente no instante, quando ele muda e o posto seguinte."""
+        momento = dt_util.as_local(momento)
+        dia = momento.date()
+        atual = None
+        # Uma semana sempre contém um dia útil, exceto em sequências de feriados.
+        for _ in range(15):
+            for inicio, posto in self._segmentos(dia):
+                if inicio <= momento:
+                    atual = posto
+                elif posto != atual:
+                    return atual, inicio, posto
+            dia += timedelta(days=1)
+        return atual, momento + timedelta(days=15), atual
@@ -0,0 +1 @@
+"""Testes da integração Tarifas de Energia Brasil."""
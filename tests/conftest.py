@@ -0,0 +1,43 @@
+"""Fixtures comuns aos testes."""
+import threading
+
+import pytest
+
+from custom_components.tarifas_energia_brasil.cloudflare_api import CloudflareAPI
+from custom_components.tarifas_energia_brasil.database import DB_THREAD_NAME, DatabaseManager
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .worker import ConfiguracaoWorker, WorkerSimulado
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Permite carregar a integração de custom_components."""
+    yield
+
+
+@pytest.fixture
+async def worker(socket_enabled):
+    """Worker simulado em uma porta local, sem latência nem erros."""
+    simulado = WorkerSimulado(ConfiguracaoWorker(concessionarias=10))
+    await simulado.iniciar()
+    yield simulado
+    await simulado.parar()
+
+
+@pytest.fixture
+async def api(hass, worker):
+    """Cliente da API apontando para o worker simulado."""
+    return CloudflareAPI(hass, async_get_clientsession(hass), worker.url)
+
+
+@pytest.fixture
+async def db(hass, tmp_path):
+    """Banco local em diretório temporário; a thread de banco é encerrada no fim."""
+    manager = DatabaseManager(hass, str(tmp_path / "tarifas.sqlite"))
+    await manager.async_setup_database()
+    yield manager
+    await manager.async_close()
+    for thread in threading.enumerate():
+        if thread.name.startswith(DB_THREAD_NAME):
+            thread.join(timeout=5)
@@ -0,0 +1,87 @@
+"""Testes do cliente da API contra o worker simulado."""
+import asyncio
+
+import pytest
+from aiohttp import ClientResponseError
+
+from custom_components.tarifas_energia_brasil import cloudflare_api
+
+from .worker import nome_concessionaria
+
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    """O cache HTTP é salvo em disco com atraso."""
+    return True
+
+
+async def test_busca_concessionarias(api, worker) -> None:
+    assert await api.async_fetch_concessionarias() == worker.nomes()
+    assert worker.requisicoes["concessionarias"] == 1
+
+
+async def test_resposta_304_reaproveita_payload(api, worker) -> None:
+    nome = nome_concessionaria(0)
+    primeira = await api.async_fetch_tarifas(nome)
+    segunda = await api.async_fetch_tarifas(nome)
+
+    assert segunda == primeira == worker.tarifa(nome)
+    assert worker.requisicoes["atual"] == 2
+    assert api.metricas.como_dict()["contadores"]["cache_hits"] == 1
+
+
+async def test_chamadas_identicas_compartilham_requisicao(api, worker) -> None:
+    worker.config.latencia = 0.05
+    nome = nome_concessionaria(1)
+    respostas = await asyncio.gather(*(api.async_fetch_tarifas(nome) for _ in range(5)))
+
+    assert all(resposta == worker.tarifa(nome) for resposta in respostas)
+    assert worker.requisicoes["atual"] == 1
+
+
+async def test_erro_transitorio_e_repetido(api, worker, monkeypatch) -> None:
+    monkeypatch.setattr(cloudflare_api, "_BACKOFF_BASE", 0.0)
+    worker.config.taxa_erro = 1.0
+
+    with pytest.raises(ClientResponseError):
+        await api.async_fetch_tarifas(nome_concessionaria(2))
+    assert worker.requisicoes["atual"] == cloudflare_api._TENTATIVAS
+
+
+async def test_lote_nao_e_guardado_no_cache(api, worker) -> None:
+    nomes = [nome_concessionaria(i) for i in range(3)]
+    await api.async_fetch_tarifas_lote(nomes)
+    await api.async_fetch_tarifas_lote(nomes)
+
+    assert worker.requisicoes == {"lote": 2}
+    assert api.metricas.como_dict()["contadores"].get("cache_hits", 0) == 0
+    assert not api._cache._entradas
+
+
+async def test_cache_descarta_as_respostas_mais_antigas(api, worker, monkeypatch) -> None:
+    monkeypatch.setattr(cloudflare_api, "_CACHE_MAX_ENTRADAS", 3)
+    nomes = [nome_concessionaria(i) for i in range(5)]
+    for nome in nomes[:3]:
+        await api.async_fetch_tarifas(nome)
+    # Reusar a primeira a torna a mais recente; a segunda passa a ser a mais antiga.
+    await api.async_fetch_tarifas(nomes[0])
+    for nome in nomes[3:]:
+        await api.async_fetch_tarifas(nome)
+
+    guardadas = [chave.rsplit("=", 1)[1] for chave in api._cache._entradas]
+    assert guardadas == [nomes[0], nomes[3], nomes[4]]
+
+
+async def test_cache_salvo_descarta_respostas_de_lote(hass, hass_storage, worker) -> None:
+    atual = f"{worker.url}/tarifas/atual?concessionaria={nome_concessionaria(0)}"
+    lote = f"{worker.url}/tarifas/lote?concessionarias={nome_concessionaria(0)}"
+    entrada = {"etag": '"x"', "last_modified": None, "payload": {}}
+    hass_storage[cloudflare_api._CACHE_STORAGE_KEY] = {
+        "version": cloudflare_api._CACHE_STORAGE_VERSION,
+        "key": cloudflare_api._CACHE_STORAGE_KEY,
+        "data": {atual: entrada, lote: entrada},
+    }
+    cache = cloudflare_api._CacheRespostas(hass)
+
+    assert await cache.async_get(atual) == entrada
+    assert await cache.async_get(lote) is None
@@ -0,0 +1,90 @@
+"""Testes da thread dedicada do DatabaseManager."""
+import inspect
+import threading
+from datetime import datetime
+
+import pytest
+
+from custom_components.tarifas_energia_brasil.coordinator import (
+    TarifasEnergiaCoordinator,
+    _campos_gravacao,
+)
+from custom_components.tarifas_energia_brasil.database import DB_THREAD_NAME, DatabaseManager
+
+from .worker import WorkerSimulado, nome_concessionaria
+
+NOME = nome_concessionaria(0)
+
+
+def _aguardar_thread_banco() -> None:
+    for thread in threading.enumerate():
+        if thread.name.startswith(DB_THREAD_NAME):
+            thread.join(timeout=5)
+
+
+def _registrar_thread(threads: list[str]) -> None:
+    threads.append(threading.current_thread().name)
+
+
+@pytest.fixture
+async def manager(hass, tmp_path):
+    db = DatabaseManager(hass, str(tmp_path / "tarifas.sqlite"))
+    await db.async_setup_database()
+    yield db
+    await db.async_close()
+    _aguardar_thread_banco()
+
+
+def _chamadas(manager: DatabaseManager, threads: list[str]) -> dict[str, tuple]:
+    """Argumentos de cada método ``async_*`` público, na ordem de execução."""
+    snapshot = TarifasEnergiaCoordinator._parse_api_response(WorkerSimulado().tarifa(NOME))
+    return {
+        "async_setup_database": (),
+        "async_save_tarifa_snapshots": (NOME, {"B1": _campos_gravacao(snapshot)}),
+        "async_get_latest_tarifa_snapshots": (NOME, ["B1", "B3"]),
+        "async_salvar_catalogo": ([NOME], datetime.now()),
+        "async_get_catalogo": (),
+        "async_compactar_historico": (365, True),
+        "async_importar_historico": (None, None),
+        "async_executar_na_thread": (lambda: _registrar_thread(threads),),
+        "async_close": (),
+    }
+
+
+async def test_metodos_async_executam_na_thread_de_banco(hass, tmp_path, monkeypatch) -> None:
+    """Cada método ``async_*`` público, inclusive ``async_close``, roda na thread de banco."""
+    manager = DatabaseManager(hass, str(tmp_path / "tarifas.sqlite"))
+    threads: list[str] = []
+    executar_medido = manager._executar_medido
+
+    def _espiao(func, *args, **kwargs):
+        _registrar_thread(threads)
+        return executar_medido(func, *args, **kwargs)
+
+    monkeypatch.setattr(manager, "_executar_medido", _espiao)
+    chamadas = _chamadas(manager, threads)
+    publicos = {
+        nome
+        for nome, _ in inspect.getmembers(DatabaseManager, inspect.iscoroutinefunction)
+        if nome.startswith("async_")
+    }
+    # Um método novo precisa ser incluído em _chamadas.
+    assert publicos == set(chamadas)
+
+    try:
+        for nome, args in chamadas.items():
+            threads.clear()
+            await getattr(manager, nome)(*args)
+            assert threads, nome
+            assert all(thread.startswith(DB_THREAD_NAME) for thread in threads), (nome, threads)
+    finally:
+        _aguardar_thread_banco()
+
+
+async def test_chamada_direta_no_event_loop_falha(manager) -> None:
+    with pytest.raises(RuntimeError, match="fora da thread dedicada"):
+        manager._get_latest_tarifa_snapshots(NOME, ["B1"])
+    with pytest.raises(RuntimeError, match="fora da thread dedicada"):
+        manager._compactar_historico(365, True)
+    with pytest.raises(RuntimeError, match="fora da thread dedicada"):
+        manager._conexao()
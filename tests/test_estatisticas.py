@@ -0,0 +1,153 @@
+"""Testes da publicação do preço horário nas estatísticas do recorder."""
+from datetime import date, datetime, timedelta
+from unittest.mock import Mock, call
+
+import numpy as np
+import pytest
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.tarifas_energia_brasil.coordinator import (
+    TarifasEnergiaCoordinator,
+    async_get_hub,
+)
+from custom_components.tarifas_energia_brasil.custo import _meia_noite_local, precos_por_hora
+from custom_components.tarifas_energia_brasil.estatisticas import PublicadorEstatisticas
+from custom_components.tarifas_energia_brasil.indice import IndiceTarifas
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.util import dt as dt_util
+
+from .worker import nome_concessionaria
+
+NOME = "CONCESSIONARIA_TESTE"
+TARIFA = 0.8
+AMARELA = 0.01874
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_db_url, enable_custom_integrations):
+    """O banco do recorder precisa ser preparado antes do ``hass``."""
+    yield
+
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    """O cache HTTP é salvo em disco com atraso."""
+    return True
+
+
+def _indice_sem_fevereiro() -> IndiceTarifas:
+    indice = IndiceTarifas()
+    indice.adicionar_tarifa(NOME, date(2024, 1, 1), None, TARIFA)
+    indice.adicionar_bandeira(date(2024, 1, 1), "Verde", 0.0)
+    indice.adicionar_bandeira(date(2024, 3, 1), "Verde", 0.0)
+    return indice
+
+
+def _horas(inicio: date, fim: date):
+    return np.arange(_meia_noite_local(inicio), _meia_noite_local(fim), 3600.0)
+
+
+async def _precos_publicados(hass, publicador: PublicadorEstatisticas) -> dict[datetime, float]:
+    from homeassistant.components.recorder import get_instance
+
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        datetime(2023, 12, 1, tzinfo=dt_util.UTC),
+        None,
+        {publicador.statistic_id},
+        "hour",
+        None,
+        {"mean"},
+    )
+    return {
+        dt_util.as_local(dt_util.utc_from_timestamp(linha["start"])): linha["mean"]
+        for linha in stats.get(publicador.statistic_id, ())
+    }
+
+
+def test_mes_sem_bandeira_fica_sem_preco() -> None:
+    indice = _indice_sem_fevereiro()
+    adicionais = {b.competencia: b.valor_adicional for b in indice.bandeiras()}
+    horas = _horas(date(2024, 1, 31), date(2024, 3, 2))
+
+    precos = precos_por_hora(indice.vigencias(NOME), adicionais, horas)
+
+    fevereiro = (horas >= _meia_noite_local(date(2024, 2, 1))) & (
+        horas < _meia_noite_local(date(2024, 3, 1))
+    )
+    assert np.isnan(precos[fevereiro]).all()
+    assert (precos[~fevereiro] == TARIFA).all()
+
+
+def test_indice_informa_se_mudou() -> None:
+    indice = _indice_sem_fevereiro()
+
+    assert not indice.adicionar_bandeira(date(2024, 1, 15), "Verde", 0.0)
+    assert indice.adicionar_bandeira(date(2024, 1, 1), "Amarela", AMARELA)
+    assert indice.adicionar_bandeira(date(2024, 2, 1), "Amarela", AMARELA)
+    assert not indice.adicionar_tarifa(NOME, date(2024, 1, 1), None, TARIFA)
+    assert indice.adicionar_tarifa(NOME, date(2024, 1, 1), date(2024, 12, 31), TARIFA)
+    assert indice.adicionar_tarifa(NOME, date(2025, 1, 1), None, 0.9)
+
+
+async def test_bandeira_tardia_republica_o_mes(recorder_mock, hass, freezer) -> None:
+    await hass.config.async_update(time_zone="America/Sao_Paulo")
+    freezer.move_to("2024-03-10T15:00:00+00:00")
+    indice = _indice_sem_fevereiro()
+    publicador = PublicadorEstatisticas(hass, indice, NOME)
+
+    await publicador._async_publicar()
+    await async_wait_recording_done(hass)
+    publicados = await _precos_publicados(hass, publicador)
+
+    # Fevereiro, sem bandeira, fica de fora em vez de ser publicado com adicional zero.
+    assert {hora.month for hora in publicados} == {1, 3}
+    assert len(publicados) == 31 * 24 + 9 * 24 + 12
+    assert set(publicados.values()) == {TARIFA}
+
+    # Publicação incremental não volta a fevereiro: só a bandeira nova o publica.
+    freezer.tick(timedelta(hours=1))
+    assert await publicador._async_publicar() == 1
+    assert indice.adicionar_bandeira(date(2024, 2, 1), "Amarela", AMARELA)
+    publicador.async_agendar(desde=date(2024, 2, 1))
+    await hass.async_block_till_done()
+    while publicador._tarefa is not None:
+        await publicador._tarefa
+    await async_wait_recording_done(hass)
+    publicados = await _precos_publicados(hass, publicador)
+
+    assert len(publicados) == (31 + 29) * 24 + 9 * 24 + 13
+    fevereiro = [preco for hora, preco in publicados.items() if hora.month == 2]
+    assert fevereiro == pytest.approx([TARIFA + AMARELA] * len(fevereiro))
+    assert {preco for hora, preco in publicados.items() if hora.month != 2} == {TARIFA}
+
+
+async def test_atualizacao_republica_a_partir_do_mes_alterado(hass, api, worker, db) -> None:
+    hub = async_get_hub(hass, api)
+    coordenadores = [
+        TarifasEnergiaCoordinator(hass, api, db, nome_concessionaria(i), hub) for i in range(2)
+    ]
+    for coord in coordenadores:
+        hub.async_register(coord)
+        coord.estatisticas.async_agendar = Mock()
+    coord, outro = coordenadores
+    resposta = worker.tarifa(coord.concessionaria)
+    competencia = date.fromisoformat(resposta["bandeira_tarifaria"]["data_competencia"])
+    inicio_vigencia = date.fromisoformat(resposta["tarifa"]["dat_inicio_vigencia"])
+
+    await coord.async_refresh()
+
+    # A bandeira vale para todas as entradas; a vigência, só para a atualizada.
+    assert coord.estatisticas.async_agendar.call_args_list == [
+        call(desde=competencia),
+        call(desde=inicio_vigencia),
+    ]
+    assert outro.estatisticas.async_agendar.call_args_list == [call(desde=competencia)]
+
+    coord.estatisticas.async_agendar.reset_mock()
+    await coord.async_refresh()
+
+    assert not coord.estatisticas.async_agendar.called
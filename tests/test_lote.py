@@ -0,0 +1,97 @@
+"""Testes da busca em lote contra o endpoint ``/tarifas/lote`` do worker simulado."""
+import asyncio
+import gc
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.tarifas_energia_brasil.coordinator import async_get_hub
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .worker import nome_concessionaria
+
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    """O cache HTTP é salvo em disco com atraso."""
+    return True
+
+
+async def test_lote_usa_uma_requisicao(api, worker) -> None:
+    nomes = [nome_concessionaria(i) for i in range(5)]
+
+    resultados = await api.async_fetch_tarifas_lote(nomes)
+
+    assert resultados == {nome: worker.tarifa(nome) for nome in nomes}
+    assert worker.requisicoes == {"lote": 1}
+    assert worker.consultas[0][1] == {"concessionarias": ",".join(sorted(nomes))}
+
+
+async def test_lote_omite_concessionarias_desconhecidas(api, worker) -> None:
+    resultados = await api.async_fetch_tarifas_lote([nome_concessionaria(0), "INEXISTENTE"])
+
+    assert list(resultados) == [nome_concessionaria(0)]
+
+
+async def test_lote_indisponivel_usa_requisicoes_individuais(api, worker) -> None:
+    worker.config.lote = False
+    nomes = [nome_concessionaria(i) for i in range(3)]
+
+    assert await api.async_fetch_tarifas_lote(nomes) == {nome: worker.tarifa(nome) for nome in nomes}
+    assert await api.async_fetch_tarifas_lote(nomes[:1]) == {nomes[0]: worker.tarifa(nomes[0])}
+    # O 404 é lembrado: o endpoint de lote não é consultado de novo.
+    assert worker.requisicoes["atual"] == 4
+
+
+async def test_hub_agrupa_pedidos_da_janela(hass, api, worker) -> None:
+    hub = async_get_hub(hass, api)
+    nomes = [nome_concessionaria(i) for i in range(4)]
+
+    respostas = await asyncio.gather(
+        *(hub.async_fetch_tarifa(nome) for nome in nomes),
+        hub.async_fetch_tarifa(nomes[0], subgrupo="B3"),
+        hub.async_fetch_tarifa(nomes[1], nocache=True),
+    )
+
+    assert respostas[:4] == [worker.tarifa(nome) for nome in nomes]
+    assert respostas[4] == worker.tarifa(nomes[0], "B3")
+    assert worker.requisicoes == {"lote": 3}
+    consultas = sorted(
+        (consulta.get("subgrupo", "B1"), consulta.get("nocache", "false"), consulta["concessionarias"])
+        for _, consulta in worker.consultas
+    )
+    assert consultas == [
+        ("B1", "false", ",".join(nomes)),
+        ("B1", "true", nomes[1]),
+        ("B3", "false", nomes[0]),
+    ]
+
+
+async def test_remover_ultima_entrada_falha_pedidos_pendentes(hass, api, worker) -> None:
+    hub = async_get_hub(hass, api)
+    remover = hub.async_register(SimpleNamespace(concessionaria=nome_concessionaria(0), push=False))
+    pedido = hass.async_create_task(hub.async_fetch_tarifa(nome_concessionaria(1)))
+    await asyncio.sleep(0)
+
+    remover()
+
+    with pytest.raises(UpdateFailed):
+        await asyncio.wait_for(pedido, 1)
+    assert not worker.requisicoes
+
+
+async def test_remover_ultima_entrada_com_busca_cancelada(hass, api, worker, caplog) -> None:
+    """A busca cancelada junto com a entrada não deixa exceção sem leitura no loop."""
+    hub = async_get_hub(hass, api)
+    remover = hub.async_register(SimpleNamespace(concessionaria=nome_concessionaria(0), push=False))
+    pedido = hass.async_create_task(hub.async_fetch_tarifa(nome_concessionaria(0)))
+    await asyncio.sleep(0)
+    pedido.cancel()
+
+    remover()
+    await hass.async_block_till_done()
+    gc.collect()
+
+    assert pedido.cancelled()
+    assert "never retrieved" not in caplog.text
+    assert not worker.requisicoes
@@ -0,0 +1,252 @@
+"""Testes da assinatura de eventos (SSE) contra a rota ``/tarifas/eventos`` do worker simulado."""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from aiohttp import ClientError, ClientResponseError
+
+from custom_components.tarifas_energia_brasil import coordinator as coordinator_mod, push
+from custom_components.tarifas_energia_brasil.agendador import INTERVALO_JANELA, INTERVALO_MAXIMO
+from custom_components.tarifas_energia_brasil.cloudflare_api import PushIndisponivelError
+from custom_components.tarifas_energia_brasil.coordinator import (
+    TarifasEnergiaCoordinator,
+    async_get_hub,
+)
+from custom_components.tarifas_energia_brasil.metricas import Metricas
+from homeassistant.util import dt as dt_util
+
+from .worker import nome_concessionaria
+
+
+@pytest.fixture
+def expected_lingering_timers() -> bool:
+    """O cache HTTP é salvo em disco com atraso e o agendador fica armado."""
+    return True
+
+
+# Guardado antes que o fixture ``esperas`` substitua asyncio.sleep.
+_dormir = asyncio.sleep
+
+
+async def _aguardar(condicao, timeout: float = 5) -> None:
+    async with asyncio.timeout(timeout):
+        while not condicao():
+            await _dormir(0.01)
+
+
+async def _escutar(api, concessionarias, ultimo_id=None):
+    """Escuta até a conexão fechar; retorna se conectou e os eventos recebidos."""
+    conectou: list[bool] = []
+    recebidos: list[tuple[str, str, str | None]] = []
+    await api.async_escutar_eventos(
+        concessionarias,
+        ultimo_id,
+        lambda: conectou.append(True),
+        lambda *evento: recebidos.append(evento),
+    )
+    return bool(conectou), recebidos
+
+
+async def test_escutar_eventos_interpreta_o_stream(api, worker) -> None:
+    tarefa = asyncio.create_task(_escutar(api, ["B", "A"]))
+    await _aguardar(lambda: worker.assinantes == 1)
+
+    worker.publicar_evento("tarifa", {"concessionaria": "A"}, "1")
+    worker.publicar_evento("bandeira", "primeira\nsegunda", "2")
+    worker.encerrar_eventos()
+    conectou, recebidos = await tarefa
+
+    # O comentário enviado ao conectar não gera evento.
+    assert conectou
+    assert recebidos == [
+        ("tarifa", '{"concessionaria": "A"}', "1"),
+        ("bandeira", "primeira\nsegunda", "2"),
+    ]
+    assert worker.consultas == [("eventos", {"concessionarias": "A,B"})]
+    assert worker.ultimos_ids_eventos == [None]
+    assert api.metricas.como_dict()["contadores"]["eventos"] == 2
+
+
+async def test_escutar_eventos_envia_last_event_id(api, worker) -> None:
+    for evento_id in ("1", "2", "3"):
+        worker.publicar_evento("tarifa", {"concessionaria": "A"}, evento_id)
+    tarefa = asyncio.create_task(_escutar(api, ["A"], ultimo_id="1"))
+    await _aguardar(lambda: worker.assinantes == 1)
+    worker.encerrar_eventos()
+
+    _, recebidos = await tarefa
+
+    assert worker.ultimos_ids_eventos == ["1"]
+    assert [evento_id for _, _, evento_id in recebidos] == ["2", "3"]
+
+
+@pytest.mark.parametrize(
+    ("eventos", "status"), [(False, None), (True, 405), (True, 501), (True, 200)]
+)
+async def test_escutar_eventos_indisponivel(api, worker, eventos, status) -> None:
+    """404, 405, 501 ou uma resposta que não é SSE indicam que não há push."""
+    worker.config.eventos = eventos
+    worker.config.status_eventos = status
+
+    with pytest.raises(PushIndisponivelError):
+        await _escutar(api, ["A"])
+
+
+async def test_escutar_eventos_erro_transitorio(api, worker) -> None:
+    worker.config.status_eventos = 503
+
+    with pytest.raises(ClientResponseError) as erro:
+        await _escutar(api, ["A"])
+
+    assert not isinstance(erro.value, PushIndisponivelError)
+
+
+class _ApiFalsa:
+    """Simula ``async_escutar_eventos`` com uma sequência de resultados."""
+
+    def __init__(self, resultados: list[str]):
+        self.metricas = Metricas()
+        self.resultados = resultados
+        self.aguardando = False
+
+    async def async_escutar_eventos(self, concessionarias, ultimo_id, ao_conectar, ao_receber):
+        if not self.resultados:
+            self.aguardando = True
+            await asyncio.Event().wait()
+        resultado = self.resultados.pop(0)
+        if resultado == "indisponivel":
+            raise PushIndisponivelError("Eventos indisponíveis.")
+        if resultado == "conecta":
+            ao_conectar()
+        raise ClientError("conexão perdida")
+
+
+@pytest.fixture
+def esperas(monkeypatch) -> list[float]:
+    """Registra as esperas da assinatura sem dormir; o jitter fica no máximo."""
+    registradas: list[float] = []
+
+    async def _registrar(atraso, *args):
+        registradas.append(atraso)
+        await _dormir(0)
+
+    monkeypatch.setattr(push.asyncio, "sleep", _registrar)
+    monkeypatch.setattr(push.random, "uniform", lambda _inicio, fim: fim)
+    return registradas
+
+
+async def _assinar(hass, api: _ApiFalsa) -> list[tuple[bool, bool]]:
+    conexoes: list[tuple[bool, bool]] = []
+    assinatura = push.AssinaturaEventos(
+        hass, api, lambda: ["A"], lambda _nomes: None, lambda *estado: conexoes.append(estado)
+    )
+    assinatura.async_reiniciar()
+    try:
+        await _aguardar(lambda: api.aguardando)
+    finally:
+        assinatura.async_parar()
+    return conexoes
+
+
+async def test_reconexao_com_backoff_exponencial(hass, esperas) -> None:
+    api = _ApiFalsa(["falha"] * 9 + ["conecta", "falha"])
+
+    conexoes = await _assinar(hass, api)
+
+    # Dobra a cada falha até 15 minutos e volta ao início depois de conectar.
+    assert esperas == [5, 10, 20, 40, 80, 160, 320, 640, 900, 5, 10]
+    assert api.metricas.como_dict()["contadores"]["reconexoes_eventos"] == 11
+    assert conexoes == [(True, False), (False, False)]
+
+
+async def test_push_indisponivel_espera_6_horas(hass, esperas) -> None:
+    api = _ApiFalsa(["indisponivel"])
+
+    conexoes = await _assinar(hass, api)
+
+    assert esperas == [6 * 3600]
+    assert "reconexoes_eventos" not in api.metricas.como_dict()["contadores"]
+    assert not conexoes
+
+
+def _lotes(worker) -> list[tuple[str, str]]:
+    return [
+        (consulta["concessionarias"], consulta.get("nocache", "false"))
+        for rota, consulta in worker.consultas
+        if rota == "lote"
+    ]
+
+
+@pytest.fixture
+def janela(monkeypatch):
+    """Fixa o agendamento sem push em ``INTERVALO_JANELA``."""
+    monkeypatch.setattr(
+        coordinator_mod, "planejar_proxima_atualizacao", lambda agora, *_: agora + INTERVALO_JANELA
+    )
+
+
+def _espera_agendada(hub, coord) -> timedelta:
+    return hub.agendador.proxima(coord.concessionaria) - dt_util.now()
+
+
+async def test_eventos_atualizam_apenas_as_entradas_afetadas(
+    hass, api, worker, db, janela, monkeypatch
+) -> None:
+    monkeypatch.setattr(push, "_BACKOFF_INICIAL", 0.01)
+    hub = async_get_hub(hass, api)
+    tarifa, bandeira, sem_push = (
+        TarifasEnergiaCoordinator(hass, api, db, nome_concessionaria(i), hub, push=i < 2)
+        for i in range(3)
+    )
+    removedores = [hub.async_register(coord) for coord in (tarifa, bandeira, sem_push)]
+    try:
+        await _aguardar(lambda: hub.eventos.conectada)
+        assert worker.consultas == [
+            ("eventos", {"concessionarias": f"{tarifa.concessionaria},{bandeira.concessionaria}"})
+        ]
+
+        worker.publicar_evento("tarifa", {"concessionaria": tarifa.concessionaria}, "1")
+        await _aguardar(lambda: tarifa.data is not None)
+        assert _lotes(worker) == [(tarifa.concessionaria, "true")]
+        # Com a assinatura ativa, a busca periódica fica só como garantia.
+        assert _espera_agendada(hub, tarifa) > INTERVALO_MAXIMO - timedelta(minutes=1)
+
+        worker.publicar_evento("bandeira", {"competencia": "2024-01-01"}, "2")
+        await _aguardar(lambda: bandeira.data is not None)
+        ambas = f"{tarifa.concessionaria},{bandeira.concessionaria}"
+        assert _lotes(worker)[1:] == [(ambas, "true")]
+        assert sem_push.data is None
+
+        # Ao reconectar, o worker recebe o último id e as entradas com push são
+        # atualizadas em um único lote, pois eventos podem ter sido perdidos.
+        worker.encerrar_eventos()
+        await _aguardar(lambda: len(_lotes(worker)) == 3)
+        assert worker.ultimos_ids_eventos == [None, "2"]
+        assert _lotes(worker)[2:] == [(ambas, "false")]
+        assert hub.eventos.conectada
+        await asyncio.sleep(0.6)
+        assert len(_lotes(worker)) == 3
+    finally:
+        for remover in removedores:
+            remover()
+    await hass.async_block_till_done()
+
+
+async def test_sem_endpoint_de_eventos_mantem_agendamento(hass, api, worker, db, janela) -> None:
+    worker.config.eventos = False
+    hub = async_get_hub(hass, api)
+    coord = TarifasEnergiaCoordinator(hass, api, db, nome_concessionaria(0), hub, push=True)
+    remover = hub.async_register(coord)
+    try:
+        await _aguardar(lambda: worker.requisicoes["eventos"] == 1)
+        await coord.async_refresh()
+
+        assert not hub.eventos.conectada
+        assert _espera_agendada(hub, coord) <= INTERVALO_JANELA
+        # O endpoint só volta a ser consultado após 6 horas, sem contar como reconexão.
+        await asyncio.sleep(0.2)
+        assert worker.requisicoes["eventos"] == 1
+        assert "reconexoes_eventos" not in api.metricas.como_dict()["contadores"]
+    finally:
+        remover()
+    await hass.async_block_till_done()
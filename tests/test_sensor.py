@@ -0,0 +1,47 @@
+"""Testes dos sensores de diagnóstico."""
+from types import SimpleNamespace
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tarifas_energia_brasil.const import CONF_CONCESSIONARIA, DOMAIN
+from custom_components.tarifas_energia_brasil.fila import FilaRequisicoes
+from custom_components.tarifas_energia_brasil.metricas import Metricas
+from custom_components.tarifas_energia_brasil.sensor import (
+    DuracaoBaseSensor,
+    EsperaFilaSensor,
+    LatenciaApiSensor,
+    TempoAtualizacaoSensor,
+    TempoBancoDadosSensor,
+)
+
+
+def _coordinator() -> SimpleNamespace:
+    metricas_api = Metricas()
+    metricas_api.registrar_tempo("http", 0.05)
+    return SimpleNamespace(
+        subgrupos=["B1"],
+        data=None,
+        metricas=Metricas(),
+        api=SimpleNamespace(metricas=metricas_api, fila=FilaRequisicoes(metricas_api)),
+        db=SimpleNamespace(metricas=Metricas()),
+    )
+
+
+def test_metricas_globais_sao_identificadas() -> None:
+    coordinator = _coordinator()
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_CONCESSIONARIA: "X"})
+
+    for classe in (LatenciaApiSensor, EsperaFilaSensor, TempoBancoDadosSensor):
+        assert classe(coordinator, entry).extra_state_attributes["escopo"] == "global"
+    atributos = TempoAtualizacaoSensor(coordinator, entry).extra_state_attributes
+    assert "escopo" not in atributos
+
+    latencia = LatenciaApiSensor(coordinator, entry)
+    assert latencia.native_value == 50.0
+
+
+def test_duracao_sem_medicao() -> None:
+    sensor = DuracaoBaseSensor(_coordinator(), MockConfigEntry(domain=DOMAIN, data={}))
+
+    assert sensor.native_value is None
+    assert sensor.extra_state_attributes is None
@@ -0,0 +1,246 @@
+"""Worker simulado que imita a API de tarifas, para testes e benchmarks offline.
+
+Atende ``/tarifas/atual``, ``/tarifas/lote``, ``/tarifas/concessionarias`` e
+o stream de eventos ``/tarifas/eventos`` (SSE) com latência, taxa de erros e
+tamanho de resposta configuráveis, e conta as requisições recebidas por rota. Também pode ser executado à parte para apontar uma instalação de
+teste para ele::
+
+    python -m tests.worker --porta 8787 --latencia 0.2 --taxa-erro 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from aiohttp import web
+
+SUBGRUPO_PADRAO = "B1"
+
+
+@dataclass
+class ConfiguracaoWorker:
+    """Comportamento do worker simulado; pode ser alterado com ele em execução."""
+
+    # Atraso de cada resposta e variação aleatória somada a ele (s).
+    latencia: float = 0.0
+    jitter: float = 0.0
+    # Fração das requisições respondidas com ``status_erro``.
+    taxa_erro: float = 0.0
+    status_erro: int = 503
+    # Bytes de preenchimento acrescentados a cada tarifa.
+    tamanho_extra: int = 0
+    concessionarias: int = 100
+    # Sem o endpoint de lote o worker responde 404, como as versões antigas.
+    lote: bool = True
+    # Sem o endpoint de eventos o worker responde 404; ``status_eventos``
+    # responde com esse status e um corpo JSON em vez do stream (200 simula
+    # um proxy que não repassa SSE).
+    eventos: bool = True
+    status_eventos: int | None = None
+    semente: int = 0
+
+
+def nome_concessionaria(indice: int) -> str:
+    return f"CONCESSIONARIA_{indice:04d}"
+
+
+class WorkerSimulado:
+    """Aplicação aiohttp com as rotas do worker e contadores de requisições."""
+
+    def __init__(self, config: ConfiguracaoWorker | None = None):
+        self.config = config or ConfiguracaoWorker()
+        self.requisicoes: Counter[str] = Counter()
+        # Rota e query string de cada requisição, na ordem de chegada.
+        self.consultas: list[tuple[str, dict[str, str]]] = []
+        # Last-Event-ID recebido em cada conexão de eventos, na ordem.
+        self.ultimos_ids_eventos: list[str | None] = []
+        self._eventos: list[tuple[str, bytes]] = []
+        self._assinantes: list[asyncio.Queue[bytes | None]] = []
+        self._aleatorio = random.Random(self.config.semente)
+        self._runner: web.AppRunner | None = None
+        self.url: str | None = None
+        self.app = web.Application()
+        self.app.router.add_get("/tarifas/atual", self._atual)
+        self.app.router.add_get("/tarifas/lote", self._lote)
+        self.app.router.add_get("/tarifas/concessionarias", self._concessionarias)
+        self.app.router.add_get("/tarifas/eventos", self._eventos_sse)
+
+    def nomes(self) -> list[str]:
+        return [nome_concessionaria(i) for i in range(self.config.concessionarias)]
+
+    def tarifa(self, concessionaria: str, subgrupo: str = SUBGRUPO_PADRAO) -> dict:
+        """Resposta de ``/tarifas/atual``, determinística por concessionária e subgrupo."""
+        semente = int(hashlib.sha1(f"{concessionaria}:{subgrupo}".encode()).hexdigest()[:8], 16)
+        te = round(0.25 + (semente % 1000) / 10000, 5)
+        tusd = round(0.35 + (semente // 1000 % 1000) / 10000, 5)
+        inicio = date.today().replace(day=1) - timedelta(days=semente % 300)
+        competencia = date.today().replace(day=1)
+        tarifa = {
+            "tarifa_vigente": round(te + tusd, 5),
+            "tarifa_base_te": te,
+            "tarifa_base_tusd": tusd,
+            "dat_inicio_vigencia": inicio.isoformat(),
+            "dat_fim_vigencia": (inicio + timedelta(days=364)).isoformat(),
+            "timestamp": f"{competencia.isoformat()}T00:00:00",
+            "subgrupo": subgrupo,
+        }
+        if self.config.tamanho_extra:
+            tarifa["preenchimento"] = "x" * self.config.tamanho_extra
+        return {
+            "concessionaria": concessionaria,
+            "subgrupo": subgrupo,
+            "bandeira_tarifaria": {
+                "nome_bandeira": "Verde",
+                "data_competencia": competencia.isoformat(),
+                "valor_adicional": 0.0,
+            },
+            "tarifa": tarifa,
+        }
+
+    async def iniciar(self, host: str = "127.0.0.1", porta: int = 0) -> str:
+        """Sobe o servidor e retorna a URL base a ser passada ao CloudflareAPI."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, porta)
+        await site.start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}"
+        return self.url
+
+    @property
+    def assinantes(self) -> int:
+        """Conexões de eventos abertas."""
+        return len(self._assinantes)
+
+    def publicar_evento(self, tipo: str, dados: dict | str, evento_id: str) -> None:
+        """Envia um evento às conexões abertas e o guarda para reenvio por Last-Event-ID."""
+        corpo = dados if isinstance(dados, str) else json.dumps(dados)
+        mensagem = f"id: {evento_id}\nevent: {tipo}\n"
+        mensagem += "".join(f"data: {linha}\n" for linha in corpo.split("\n")) + "\n"
+        self._eventos.append((evento_id, mensagem.encode()))
+        for fila in self._assinantes:
+            fila.put_nowait(self._eventos[-1][1])
+
+    def encerrar_eventos(self) -> None:
+        """Fecha as conexões de eventos abertas, como uma queda do worker."""
+        for fila in self._assinantes:
+            fila.put_nowait(None)
+
+    async def parar(self) -> None:
+        if self._runner is not None:
+            self.encerrar_eventos()
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _simular(self, rota: str, request: web.Request) -> web.Response | None:
+        """Conta a requisição, aplica a latência e retorna a resposta de erro sorteada."""
+        self.requisicoes[rota] += 1
+        self.consultas.append((rota, dict(request.query)))
+        atraso = self.config.latencia + self._aleatorio.uniform(0, self.config.jitter)
+        if atraso > 0:
+            await asyncio.sleep(atraso)
+        if self._aleatorio.random() < self.config.taxa_erro:
+            return web.Response(status=self.config.status_erro, text="erro simulado")
+        return None
+
+    def _json(self, request: web.Request, conteudo) -> web.Response:
+        corpo = json.dumps(conteudo).encode()
+        etag = f'"{hashlib.sha1(corpo).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=corpo, content_type="application/json", headers={"ETag": etag})
+
+    async def _atual(self, request: web.Request) -> web.Response:
+        if (erro := await self._simular("atual", request)) is not None:
+            return erro
+        nome = request.query.get("concessionaria")
+        if nome not in self.nomes():
+            return web.json_response({"erro": "concessionária desconhecida"}, status=404)
+        subgrupo = request.query.get("subgrupo", SUBGRUPO_PADRAO)
+        return self._json(request, self.tarifa(nome, subgrupo))
+
+    async def _lote(self, request: web.Request) -> web.Response:
+        """Tarifas de várias concessionárias; as desconhecidas ficam fora da lista."""
+        if not self.config.lote:
+            return web.Response(status=404, text="not found")
+        if (erro := await self._simular("lote", request)) is not None:
+            return erro
+        subgrupo = request.query.get("subgrupo", SUBGRUPO_PADRAO)
+        conhecidas = set(self.nomes())
+        nomes = [
+            nome for nome in request.query.get("concessionarias", "").split(",") if nome in conhecidas
+        ]
+        return self._json(request, {"tarifas": [self.tarifa(nome, subgrupo) for nome in nomes]})
+
+    async def _concessionarias(self, request: web.Request) -> web.Response:
+        if (erro := await self._simular("concessionarias", request)) is not None:
+            return erro
+        return self._json(request, self.nomes())
+
+    async def _eventos_sse(self, request: web.Request) -> web.StreamResponse:
+        """Stream SSE; reenvia os eventos posteriores ao Last-Event-ID recebido."""
+        if (erro := await self._simular("eventos", request)) is not None:
+            return erro
+        if not self.config.eventos:
+            return web.Response(status=404, text="not found")
+        if self.config.status_eventos is not None:
+            return web.json_response({"erro": "sem eventos"}, status=self.config.status_eventos)
+        ultimo_id = request.headers.get("Last-Event-ID")
+        self.ultimos_ids_eventos.append(ultimo_id)
+        resp = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await resp.prepare(request)
+        await resp.write(b": conectado\n\n")
+        ids = [evento_id for evento_id, _ in self._eventos]
+        if ultimo_id in ids:
+            for _, mensagem in self._eventos[ids.index(ultimo_id) + 1 :]:
+                await resp.write(mensagem)
+        fila: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self._assinantes.append(fila)
+        try:
+            while (mensagem := await fila.get()) is not None:
+                await resp.write(mensagem)
+        finally:
+            self._assinantes.remove(fila)
+        return resp
+
+
+async def _executar(args: argparse.Namespace) -> None:
+    worker = WorkerSimulado(
+        ConfiguracaoWorker(
+            latencia=args.latencia,
+            jitter=args.jitter,
+            taxa_erro=args.taxa_erro,
+            tamanho_extra=args.tamanho_extra,
+            concessionarias=args.concessionarias,
+            lote=not args.sem_lote,
+            eventos=not args.sem_eventos,
+        )
+    )
+    url = await worker.iniciar(args.host, args.porta)
+    print(f"Worker simulado em {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker.parar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8787)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--tamanho-extra", type=int, default=0)
+    parser.add_argument("--concessionarias", type=int, default=100)
+    parser.add_argument("--sem-lote", action="store_true")
+    parser.add_argument("--sem-eventos", action="store_true")
+    try:
+        asyncio.run(_executar(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass